@@ -0,0 +1,62 @@
+"""
+Kiểm tra các GET dùng conditional_get: token sai role gửi kèm If-None-Match: * vẫn phải nhận 403
+(không được 304 / lộ ETag, Last-Modified), token đúng role nhận 304.
+
+Chạy trên file SQLite tạm đã migrate tới head và seed bằng /seed/seed-all.
+
+    cd backend
+    python benchmarks/check_conditional_get.py
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+# src.config đọc biến môi trường khi import
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'conditional_get.db')}"
+os.environ["DB_AUTO_MIGRATE"] = "true"
+
+ACCOUNTS = {
+    "admin": ("admin1@englishcenter.com", "admin123"),
+    "student": ("student1@gmail.com", "student123"),
+}
+
+# (đường dẫn, role được phép, role không được phép)
+ROUTES = [
+    ("/admin/courses", "admin", "student"),
+    ("/admin/classrooms", "admin", "student"),
+    ("/staff/courses", "admin", "student"),
+    ("/staff/classrooms", "admin", "student"),
+    ("/staff/schedules", "admin", "student"),
+    ("/student/classes", "student", "admin"),
+]
+
+
+def main() -> int:
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    failures = 0
+    with TestClient(app_module.app) as client:
+        response = client.post("/seed/seed-all")
+        assert response.status_code == 200, response.text
+        headers = {}
+        for role, (email, password) in ACCOUNTS.items():
+            response = client.post("/auth/login", json={"email": email, "password": password})
+            assert response.status_code == 200, response.text
+            headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for path, allowed, denied in ROUTES:
+            for role, expected in ((denied, 403), (allowed, 304)):
+                response = client.get(path, headers={**headers[role], "If-None-Match": "*"})
+                leaked = response.status_code == 403 and ("etag" in response.headers or "last-modified" in response.headers)
+                ok = response.status_code == expected and not leaked
+                failures += not ok
+                print(f"{'OK  ' if ok else 'FAIL'} {path:<20} {role:<8} {response.status_code} (cần {expected})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
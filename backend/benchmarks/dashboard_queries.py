@@ -0,0 +1,160 @@
+"""
+Kiểm tra số câu lệnh SQL của dashboard không tăng theo số lớp / học sinh.
+
+Tạo database SQLite tạm ở revision head, sinh dữ liệu ở hai quy mô khác nhau và đếm số
+câu lệnh mỗi dashboard thực thi (qua QueryStats). Thoát với mã 1 nếu số câu lệnh khác nhau.
+
+    cd backend
+    python benchmarks/dashboard_queries.py
+    python benchmarks/dashboard_queries.py --small 2 --large 8 --students 25
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, time as dt_time, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small", type=int, default=1, help="Số lớp ở quy mô nhỏ")
+    parser.add_argument("--large", type=int, default=8, help="Số lớp ở quy mô lớn")
+    parser.add_argument("--students", type=int, default=25, help="Số học sinh mỗi lớp")
+    parser.add_argument("--sessions", type=int, default=10, help="Số buổi học mỗi lớp")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def seed(db, classes: int, students: int, sessions: int, rng: random.Random) -> dict:
+    """
+    Một giáo viên với `classes` lớp đang hoạt động, mỗi lớp `students` học sinh.
+    Học sinh đầu tiên của mọi lớp là cùng một người, nên lịch sử của học sinh đó cũng tăng theo số lớp
+    """
+    from sqlalchemy import insert
+    from src.models import (
+        Attendance, Class, ClassStatus, Course, CourseLevel, Enrollment, Exam, Homework,
+        Schedule, Score, Session, User, Weekday
+    )
+    from src.models.attendance import HomeworkStatus
+
+    suffix = uuid.uuid4().hex[:8]
+    teacher_id = uuid.uuid4()
+    course_id = uuid.uuid4()
+    shared_student_id = uuid.uuid4()
+    db.execute(insert(User), [{"id": teacher_id, "name": f"Teacher {suffix}", "email": f"teacher-{suffix}@bench.local",
+                               "password": "x", "role_name": "teacher", "status": "active"}])
+    db.execute(insert(Course), [{"id": course_id, "course_name": f"Course {suffix}", "price": 1000.0}])
+
+    users = [{"id": shared_student_id, "name": f"Student {suffix}", "email": f"student-{suffix}@bench.local",
+              "password": "x", "role_name": "student", "status": "active"}]
+    class_rows, schedules, enrollments = [], [], []
+    session_rows, attendances, homeworks, exams, scores = [], [], [], [], []
+    now = datetime.now()
+    for c in range(classes):
+        class_id, schedule_id, exam_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        class_rows.append({"id": class_id, "class_name": f"Class {suffix}-{c}", "course_id": course_id,
+                           "teacher_id": teacher_id, "course_level": CourseLevel.A1, "status": ClassStatus.ACTIVE,
+                           "start_date": now.date() + timedelta(days=rng.randrange(30)),
+                           "end_date": now.date() + timedelta(days=rng.randrange(30))})
+        schedules.append({"id": schedule_id, "class_id": class_id, "weekday": rng.choice(list(Weekday)),
+                          "start_time": dt_time(18, 0), "end_time": dt_time(19, 30)})
+        exams.append({"id": exam_id, "exam_name": "Exam", "class_id": class_id, "start_time": now})
+        session_ids = [uuid.uuid4() for _ in range(sessions)]
+        session_rows.extend({"id": session_id, "topic": "Topic", "class_id": class_id, "schedule_id": schedule_id,
+                             "created_at": now - timedelta(days=rng.randrange(60))} for session_id in session_ids)
+        for s in range(students):
+            student_id, enrollment_id = (shared_student_id if s == 0 else uuid.uuid4()), uuid.uuid4()
+            if s > 0:
+                users.append({"id": student_id, "name": f"Student {suffix}-{c}-{s}",
+                              "email": f"student-{suffix}-{c}-{s}@bench.local", "password": "x",
+                              "role_name": "student", "status": "active"})
+            enrollments.append({"id": enrollment_id, "class_id": class_id, "student_id": student_id,
+                                "status": "active"})
+            scores.append({"id": uuid.uuid4(), "enrollment_id": enrollment_id, "exam_id": exam_id,
+                           "student_id": student_id, "listening": float(rng.randrange(496)),
+                           "reading": float(rng.randrange(496))})
+            # Một phần học sinh vắng nhiều để danh sách absentStudents không rỗng
+            absence = 0.5 if s % 5 == 0 else 0.1
+            for session_id in session_ids:
+                attendances.append({"id": uuid.uuid4(), "session_id": session_id, "student_id": student_id,
+                                    "is_present": rng.random() >= absence})
+                homeworks.append({"id": uuid.uuid4(), "session_id": session_id, "student_id": student_id,
+                                  "status": rng.choice(list(HomeworkStatus))})
+
+    for model, rows in ((User, users), (Class, class_rows), (Schedule, schedules), (Enrollment, enrollments),
+                        (Session, session_rows), (Attendance, attendances), (Homework, homeworks),
+                        (Exam, exams), (Score, scores)):
+        if rows:
+            db.execute(insert(model), rows)
+    db.commit()
+    return {"teacher": teacher_id, "student": shared_student_id}
+
+
+def count_queries(db, build, *build_args):
+    from src.query_stats import QueryStats, _current_stats
+
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        build(db, *build_args)
+    finally:
+        _current_stats.reset(token)
+    return stats.count, (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    args = parse_args()
+    temp_dir = tempfile.mkdtemp(prefix="dashboard-queries-")
+    url = "sqlite:///" + os.path.join(temp_dir, "bench.db")
+    # src.config đọc DATABASE_URL khi import
+    os.environ["DATABASE_URL"] = url
+    try:
+        from src.schema import upgrade_to_head
+        from src.database import SessionLocal, engine
+        from src.query_stats import register_query_listeners
+        from src.controllers.staff import _build_staff_dashboard
+        from src.controllers.student import _build_student_dashboard
+        from src.controllers.teacher import _build_teacher_dashboard
+
+        upgrade_to_head(url)
+        register_query_listeners(engine)
+        rng = random.Random(args.seed)
+
+        dashboards = {
+            "teacher": _build_teacher_dashboard,
+            "student": _build_student_dashboard,
+            "staff": _build_staff_dashboard,
+        }
+        failed = False
+        results = {name: {} for name in dashboards}
+        with SessionLocal() as db:
+            # Dashboard của staff không theo người dùng: đo ngay sau mỗi lần sinh dữ liệu
+            for classes in (args.small, args.large):
+                ids = seed(db, classes, args.students, args.sessions, rng)
+                for name, build in dashboards.items():
+                    build_args = (ids[name],) if name in ids else ()
+                    results[name][classes] = count_queries(db, build, *build_args)
+            for name in dashboards:
+                counts = {count for count, _ in results[name].values()}
+                for classes, (count, elapsed) in results[name].items():
+                    print(f"{name} dashboard, {classes} class(es) x {args.students} students: "
+                          f"{count} queries, {elapsed:.1f} ms")
+                if len(counts) != 1:
+                    print(f"FAIL: {name} dashboard query count depends on data size")
+                    failed = True
+        engine.dispose()
+        return 1 if failed else 0
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Đo bộ nhớ (tracemalloc peak) khi export học viên theo từng số dòng:
+
+    stream      services.export.export_students: yield_per + encode từng partition (endpoint /export/students)
+    fetch_all   cách cũ: nạp hết kết quả rồi ghi ra một body
+
+Peak của stream phải gần như không đổi khi số dòng tăng (phụ thuộc EXPORT_BATCH_SIZE), fetch_all
+tăng tuyến tính. Dữ liệu được tạo trong một file SQLite tạm.
+
+    cd backend
+    python benchmarks/export_memory.py
+    python benchmarks/export_memory.py --sizes 10000,100000 --format ndjson --batch-size 500
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+DB_PATH = os.path.join(tempfile.mkdtemp(), "export_memory.db")
+# src.config đọc DATABASE_URL khi import
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Số học viên, phân tách bằng dấu phẩy")
+    parser.add_argument("--format", default="csv", choices=("csv", "ndjson"))
+    parser.add_argument("--batch-size", type=int, default=1000, help="EXPORT_BATCH_SIZE")
+    return parser.parse_args()
+
+
+def seed_students(total: int) -> None:
+    from sqlalchemy import func, select
+    from src.database import engine
+    from src.models import User
+
+    with engine.connect() as conn:
+        start = conn.execute(select(func.count(User.id))).scalar()
+    rows = [
+        {
+            "id": uuid.uuid4(), "name": f"Học viên {i}", "email": f"student{i}@example.com", "password": "x",
+            "role_name": "student", "phone_number": "0907654321", "input_level": "A1",
+            "date_of_birth": date(2008, 1, 1) + timedelta(days=i % 3000), "parent_name": f"Phụ huynh {i}",
+            "parent_phone": "0901234567", "address": "Hà Nội", "status": "active",
+            "created_at": datetime(2024, 1, 1) + timedelta(seconds=i),
+        }
+        for i in range(start, total)
+    ]
+    if rows:
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), rows)
+
+
+async def run_stream(format: str) -> int:
+    from src.services import export as export_service
+
+    size = 0
+    async for chunk in export_service.export_students(format):
+        size += len(chunk)
+    return size
+
+async def run_fetch_all(format: str) -> int:
+    from src.cruds import export as export_crud
+    from src.database import AsyncSessionLocal
+    from src.utils.streaming import csv_chunk, ndjson_chunk
+
+    stmt = export_crud.students_statement()
+    keys = list(stmt.selected_columns.keys())
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(stmt)).all()
+    body = csv_chunk([keys, *rows]) if format == "csv" else ndjson_chunk(keys, rows)
+    return len(body)
+
+
+def run_once(run, format: str) -> int:
+    from src.database import async_engine
+
+    async def main():
+        try:
+            return await run(format)
+        finally:
+            # Connection aiosqlite gắn với event loop của lần chạy này
+            await async_engine.dispose()
+    return asyncio.run(main())
+
+def measure(run, format: str):
+    # Lần chạy đầu import module / compile câu lệnh, không tính vào peak
+    run_once(run, format)
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = run_once(run, format)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 2 ** 20, size / 2 ** 20
+
+
+def main() -> None:
+    args = parse_args()
+    from src.config import settings
+    from src.database import Base, engine
+    import src.models  # noqa: F401  đăng ký bảng vào Base.metadata
+
+    settings.EXPORT_BATCH_SIZE = args.batch_size
+    Base.metadata.create_all(engine)
+
+    print(f"{'rows':>8}  {'method':<10}{'time ms':>10}{'peak MiB':>10}{'body MiB':>10}")
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        seed_students(size)
+        for name, run in (("stream", run_stream), ("fetch_all", run_fetch_all)):
+            elapsed, peak, body = measure(run, args.format)
+            print(f"{size:>8}  {name:<10}{elapsed:>10.1f}{peak:>10.1f}{body:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+So sánh thời gian và bộ nhớ serialize response theo từng cách:
+
+    jsonable+json      handler trả về dict/model không có response_model: jsonable_encoder + json.dumps
+    model+json         response_model (validate + serialize mode="json") + JSONResponse (json.dumps)
+    model+orjson       như trên nhưng render bằng ORJSONResponse (default_response_class của app)
+    dump_json          utils.responses.dump_json_list / dump_json: pydantic-core ra thẳng bytes
+
+cho StudentResponse, ClassroomResponse (course, teacher, lịch học; --enrollments thêm ghi danh kèm
+học sinh + điểm) và StaffDashboardResponse (N dòng classProgress). Dữ liệu là object thường đọc qua
+from_attributes như ORM row, không cần database.
+
+    cd backend
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --sizes 1000,10000 --repeat 3 --payloads classroom --enrollments 2
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# src.config đọc DATABASE_URL khi import, benchmark không kết nối database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Số dòng, phân tách bằng dấu phẩy")
+    parser.add_argument("--repeat", type=int, default=1, help="Lấy thời gian nhỏ nhất sau n lần chạy")
+    parser.add_argument("--payloads", default="student,classroom,dashboard", help="Các payload cần đo")
+    parser.add_argument("--enrollments", type=int, default=0,
+                        help="Số ghi danh (kèm học sinh + điểm) mỗi lớp trong ClassroomResponse")
+    return parser.parse_args()
+
+
+def make_student(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.uuid4(), name=f"Học viên {i}", email=f"student{i}@example.com", input_level="A1",
+        parent_name=f"Phụ huynh {i}", parent_phone="0901234567", status="active", bio=None,
+        phone_number="0907654321", date_of_birth=date(2008, 1, 1) + timedelta(days=i % 3000),
+        address="Hà Nội", created_at=datetime(2024, 1, 1) + timedelta(minutes=i),
+        attendances=[], homeworks=[], enrollments=None,
+    )
+
+def make_classroom(i: int, courses: list, teachers: list, enrollments: int) -> SimpleNamespace:
+    created_at = datetime(2024, 1, 1) + timedelta(minutes=i)
+    return SimpleNamespace(
+        id=uuid.uuid4(), class_name=f"Lớp {i}", course_id=courses[i % len(courses)].id,
+        teacher_id=teachers[i % len(teachers)].id, room=f"P{i % 20}", course_level="A1", status="active",
+        start_date=date(2024, 1, 1), end_date=date(2024, 6, 1), created_at=created_at,
+        course=courses[i % len(courses)], teacher=teachers[i % len(teachers)],
+        schedules=[
+            SimpleNamespace(id=uuid.uuid4(), weekday=weekday, start_time=dt_time(18), end_time=dt_time(19, 30))
+            for weekday in ("monday", "thursday")
+        ],
+        enrollments=[
+            SimpleNamespace(
+                id=uuid.uuid4(), enrollment_at=created_at.date(), status="active", student=make_student(i * 10 + k),
+                score=[SimpleNamespace(id=uuid.uuid4(), listening=300.0, reading=250.0, speaking=None,
+                                       writing=None, feedback="Tốt")]
+            )
+            for k in range(enrollments)
+        ],
+        sessions=[],
+    )
+
+def make_dashboard(rows: int):
+    from src.schemas.staff import (
+        AttendanceWeekData, ClassProgress, EndingClass, HomeworkStatusData, StaffDashboardResponse,
+        TopLateStudent, UpcomingClass
+    )
+    return StaffDashboardResponse(
+        totalStudents=rows * 20, unassignedStudents=12, activeClasses=rows, weeklySchedules=rows * 2,
+        attendanceData=[AttendanceWeekData(week=f"Tuần {w}", attendance=92.5) for w in range(1, 7)],
+        homeworkStatus=[HomeworkStatusData(name=n, value=10, color="#000", percentage=33.3)
+                        for n in ("passed", "failed", "pending")],
+        upcomingClasses=[UpcomingClass(className=f"Lớp {i}", startDate="2024-01-01", teacher="GV", room="P1",
+                                       students=20) for i in range(5)],
+        endingClasses=[EndingClass(className=f"Lớp {i}", endDate="2024-06-01", teacher="GV", room="P1",
+                                   students=20, progress=80.0) for i in range(5)],
+        classProgress=[ClassProgress(className=f"Lớp {i}", totalSessions=24, completedSessions=i % 24,
+                                     progress=round(i % 24 / 24 * 100, 1), students=20) for i in range(rows)],
+        topLateStudents=[TopLateStudent(name=f"Học viên {i}", pendingHomework=3, className="Lớp 1",
+                                        phone="0901234567") for i in range(5)],
+    )
+
+
+def serializers(schema, many: bool):
+    """Các cách biến payload thành body của response, giống đường đi trong FastAPI"""
+    from typing import List
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from src.utils.responses import dump_json, dump_json_list
+
+    adapter = TypeAdapter(List[schema] if many else schema)
+
+    def stdlib_dumps(content) -> bytes:
+        # Giống JSONResponse.render
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    def response_model(payload):
+        return adapter.dump_python(adapter.validate_python(payload, from_attributes=True), mode="json")
+
+    def direct(payload) -> bytes:
+        return dump_json_list(schema, payload) if many else dump_json(schema, payload)
+
+    return {
+        "jsonable+json": lambda payload: stdlib_dumps(jsonable_encoder(response_model(payload))),
+        "model+json": lambda payload: stdlib_dumps(response_model(payload)),
+        "model+orjson": lambda payload: orjson.dumps(response_model(payload)),
+        "dump_json": direct,
+    }
+
+
+def measure(serialize, payload, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        body = serialize(payload)
+        timings.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    serialize(payload)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings) * 1000, peak / 2 ** 20, len(body)
+
+
+def main() -> None:
+    args = parse_args()
+    from src.schemas.classroom import ClassroomResponse
+    from src.schemas.staff import StaffDashboardResponse
+    from src.schemas.user import StudentResponse
+
+    courses = [SimpleNamespace(id=uuid.uuid4(), course_name=f"Khoá {i}", level="A1") for i in range(20)]
+    teachers = [SimpleNamespace(id=uuid.uuid4(), name=f"Giáo viên {i}", email=f"teacher{i}@example.com")
+                for i in range(50)]
+    cases = {
+        "student": (StudentResponse, True, lambda n: [make_student(i) for i in range(n)]),
+        "classroom": (ClassroomResponse, True,
+                      lambda n: [make_classroom(i, courses, teachers, args.enrollments) for i in range(n)]),
+        "dashboard": (StaffDashboardResponse, False, make_dashboard),
+    }
+
+    print(f"{'payload':<24}{'rows':>8}  {'method':<14}{'time ms':>10}{'peak MiB':>10}{'body MiB':>10}")
+    for payload_name in args.payloads.split(","):
+        schema, many, build = cases[payload_name]
+        name = schema.__name__
+        methods = serializers(schema, many)
+        for size in (int(s) for s in args.sizes.split(",")):
+            payload = build(size)
+            bodies = set()
+            for method, serialize in methods.items():
+                elapsed, peak, length = measure(serialize, payload, args.repeat)
+                bodies.add(length)
+                print(f"{name:<24}{size:>8}  {method:<14}{elapsed:>10.1f}{peak:>10.1f}{length / 2 ** 20:>10.2f}")
+            if len(bodies) != 1:
+                print(f"  chú ý: kích thước body khác nhau giữa các cách: {sorted(bodies)}")
+            del payload
+
+
+if __name__ == "__main__":
+    main()
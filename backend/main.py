@@ -1,29 +1,93 @@
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.routes import api_router
 from src.config import settings
-from src.dependencies import init_dependencies
-
-app = FastAPI(
-    title="English Center Management",
-    description="API for managing an English learning center",
-    version="1.0.0"
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
-)
-
-# Initialize dependencies
-init_dependencies()
-
-# Include API routes
-app.include_router(api_router)
+from src.dashboard_cache import register_invalidation_listeners
+from src.database import async_engine, engine
+from src.query_stats import QueryStatsMiddleware, register_query_listeners
+from src.schema import SchemaVersionError, check_schema_version, upgrade_to_head
+from src.services.revision import register_revision_tracking
+from src.services import password as password_service
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger("main")
+
+
+def prepare_database() -> None:
+    """Schema do Alembic quản lý, khi khởi động chỉ kiểm tra revision (1 câu truy vấn)"""
+    if settings.DB_AUTO_MIGRATE:
+        upgrade_to_head()
+    with engine.connect() as connection:
+        try:
+            revision = check_schema_version(connection)
+        except SchemaVersionError as e:
+            if settings.DB_SCHEMA_CHECK:
+                raise
+            logger.warning(str(e))
+        else:
+            logger.info("Database schema at revision %s", revision)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    prepare_database()
+    logger.info("Startup completed in %.1f ms", (time.perf_counter() - started) * 1000)
+    yield
+    password_service.shutdown()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="English Center Management",
+        description="API for managing an English learning center",
+        version="1.0.0",
+        lifespan=lifespan,
+        # orjson thay cho json của thư viện chuẩn khi render response
+        default_response_class=ORJSONResponse
+    )
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[
+            "X-DB-Query-Count", "X-DB-Query-Time-Ms", "X-DB-Repeated-Queries",
+            "X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified"
+        ]
+    )
+
+    # Per-request SQL statement counter / N+1 detector
+    if settings.QUERY_STATS_ENABLED:
+        register_query_listeners(engine)
+        register_query_listeners(async_engine.sync_engine)
+        app.add_middleware(QueryStatsMiddleware)
+
+    # Dashboard cache bị xoá sau mỗi commit ghi vào các bảng nó đọc
+    register_invalidation_listeners()
+    # Phiên bản bảng cho ETag / Last-Modified, tăng trong transaction ghi
+    register_revision_tracking()
+
+    # Include API routes
+    app.include_router(api_router)
+
+    @app.get("/health", include_in_schema=False)
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
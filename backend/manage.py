@@ -0,0 +1,35 @@
+import argparse
+import logging
+
+from src.database import SessionLocal
+from src import models  # noqa: F401  (register tables)
+from src.schema import upgrade_to_head
+from src.services import rollup as rollup_service
+
+
+def migrate():
+    """Apply pending Alembic migrations (same as `alembic upgrade head`)"""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-5.5s [%(name)s] %(message)s")
+    upgrade_to_head()
+
+
+def backfill_rollups():
+    """Rebuild monthly dashboard rollups from enrollments and users"""
+    db = SessionLocal()
+    try:
+        result = rollup_service.backfill(db)
+        print(f"Đã cập nhật rollup: {result}")
+    finally:
+        db.close()
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "backfill-rollups": backfill_rollups,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="English Center Management commands")
+    parser.add_argument("command", choices=COMMANDS.keys())
+    args = parser.parse_args()
+    COMMANDS[args.command]()
@@ -0,0 +1,197 @@
+"""initial schema
+
+Bảng như Base.metadata.create_all tạo ra trước khi có migration (chưa có bảng rollup, xem 0001a).
+Database đã tạo bằng create_all: chạy `alembic stamp 0001`, `alembic upgrade head`
+rồi `python manage.py backfill-rollups` để tính rollup từ dữ liệu đã có.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 19:40:33.635456
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.database import UUID
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('courses',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('course_name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('level', sa.String(length=50), nullable=True),
+    sa.Column('total_weeks', sa.Integer(), nullable=True),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_courses_id'), 'courses', ['id'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('role_name', sa.String(length=50), nullable=False),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('date_of_birth', sa.Date(), nullable=True),
+    sa.Column('phone_number', sa.String(length=20), nullable=True),
+    sa.Column('input_level', sa.String(length=50), nullable=True),
+    sa.Column('specialization', sa.String(length=255), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('education', sa.String(length=255), nullable=True),
+    sa.Column('experience_years', sa.Integer(), nullable=True),
+    sa.Column('parent_name', sa.String(length=255), nullable=True),
+    sa.Column('parent_phone', sa.String(length=20), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table('classes',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('class_name', sa.String(length=255), nullable=False),
+    sa.Column('course_id', UUID(), nullable=False),
+    sa.Column('teacher_id', UUID(), nullable=False),
+    sa.Column('room', sa.String(length=255), nullable=True),
+    sa.Column('course_level', sa.Enum('A1', 'A2', 'B1', 'B2', 'C1', name='courselevel'), nullable=False),
+    sa.Column('status', sa.Enum('ACTIVE', 'COMPLETED', 'CANCELLED', name='classstatus'), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['teacher_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_classes_id'), 'classes', ['id'], unique=False)
+
+    op.create_table('enrollments',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('class_id', UUID(), nullable=False),
+    sa.Column('student_id', UUID(), nullable=False),
+    sa.Column('enrollment_at', sa.Date(), server_default=sa.func.current_date(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_enrollments_id'), 'enrollments', ['id'], unique=False)
+
+    op.create_table('exams',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('exam_name', sa.String(length=255), nullable=True),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('duration', sa.Integer(), nullable=True),
+    sa.Column('class_id', UUID(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_exams_id'), 'exams', ['id'], unique=False)
+
+    op.create_table('schedules',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('class_id', UUID(), nullable=False),
+    sa.Column('weekday', sa.Enum('MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY', name='weekday'), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_schedules_id'), 'schedules', ['id'], unique=False)
+
+    op.create_table('scores',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('listening', sa.Float(), nullable=True),
+    sa.Column('reading', sa.Float(), nullable=True),
+    sa.Column('speaking', sa.Float(), nullable=True),
+    sa.Column('writing', sa.Float(), nullable=True),
+    sa.Column('feedback', sa.String(length=255), nullable=True),
+    sa.Column('enrollment_id', UUID(), nullable=True),
+    sa.Column('exam_id', UUID(), nullable=True),
+    sa.Column('student_id', UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['enrollment_id'], ['enrollments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('enrollment_id')
+    )
+    op.create_index(op.f('ix_scores_id'), 'scores', ['id'], unique=False)
+
+    op.create_table('sessions',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('topic', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('class_id', UUID(), nullable=False),
+    sa.Column('schedule_id', UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['schedule_id'], ['schedules.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sessions_id'), 'sessions', ['id'], unique=False)
+
+    op.create_table('attendances',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('student_id', UUID(), nullable=False),
+    sa.Column('session_id', UUID(), nullable=False),
+    sa.Column('is_present', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_attendances_id'), 'attendances', ['id'], unique=False)
+
+    op.create_table('homeworks',
+    sa.Column('id', UUID(), nullable=False),
+    sa.Column('student_id', UUID(), nullable=False),
+    sa.Column('session_id', UUID(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PASSED', 'FAILED', name='homeworkstatus'), nullable=False),
+    sa.Column('feedback', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_homeworks_id'), 'homeworks', ['id'], unique=False)
+
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_homeworks_id'), table_name='homeworks')
+    op.drop_table('homeworks')
+    op.drop_index(op.f('ix_attendances_id'), table_name='attendances')
+    op.drop_table('attendances')
+    op.drop_index(op.f('ix_sessions_id'), table_name='sessions')
+    op.drop_table('sessions')
+    op.drop_index(op.f('ix_scores_id'), table_name='scores')
+    op.drop_table('scores')
+    op.drop_index(op.f('ix_schedules_id'), table_name='schedules')
+    op.drop_table('schedules')
+    op.drop_index(op.f('ix_exams_id'), table_name='exams')
+    op.drop_table('exams')
+    op.drop_index(op.f('ix_enrollments_id'), table_name='enrollments')
+    op.drop_table('enrollments')
+    op.drop_index(op.f('ix_classes_id'), table_name='classes')
+    op.drop_table('classes')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_courses_id'), table_name='courses')
+    op.drop_table('courses')
+
+    # PostgreSQL giữ lại các kiểu ENUM sau khi xoá bảng
+    bind = op.get_bind()
+    for name in ('homeworkstatus', 'weekday', 'classstatus', 'courselevel'):
+        sa.Enum(name=name).drop(bind, checkfirst=True)
@@ -0,0 +1,56 @@
+"""rollup tables for the admin dashboard
+
+Sau khi upgrade chạy `python manage.py backfill-rollups` để tính rollup từ enrollments / users đã có.
+Database tạo bằng bản 0001 cũ (đã gồm 2 bảng này) bỏ qua bảng đã tồn tại.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-17 19:45:02.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.database import UUID
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'student_monthly_stats' not in existing:
+        op.create_table('student_monthly_stats',
+        sa.Column('id', UUID(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('new_students', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('month')
+        )
+        op.create_index(op.f('ix_student_monthly_stats_id'), 'student_monthly_stats', ['id'], unique=False)
+
+    if 'enrollment_monthly_stats' not in existing:
+        op.create_table('enrollment_monthly_stats',
+        sa.Column('id', UUID(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('course_id', UUID(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('enrollment_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('month', 'course_id', 'status', name='uq_enrollment_monthly_stats_key')
+        )
+        op.create_index(op.f('ix_enrollment_monthly_stats_id'), 'enrollment_monthly_stats', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_enrollment_monthly_stats_id'), table_name='enrollment_monthly_stats')
+    op.drop_table('enrollment_monthly_stats')
+    op.drop_index(op.f('ix_student_monthly_stats_id'), table_name='student_monthly_stats')
+    op.drop_table('student_monthly_stats')
@@ -0,0 +1,41 @@
+"""composite indexes for dashboard filters
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-17 19:55:12.408113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_enrollments_class_id_status', 'enrollments', ['class_id', 'status']),
+    ('ix_enrollments_student_id_status', 'enrollments', ['student_id', 'status']),
+    ('ix_attendances_session_id_is_present', 'attendances', ['session_id', 'is_present']),
+    ('ix_attendances_student_id', 'attendances', ['student_id']),
+    ('ix_homeworks_student_id_status', 'homeworks', ['student_id', 'status']),
+    ('ix_homeworks_session_id_status', 'homeworks', ['session_id', 'status']),
+    ('ix_sessions_class_id_created_at', 'sessions', ['class_id', 'created_at']),
+    ('ix_classes_teacher_id_status', 'classes', ['teacher_id', 'status']),
+    ('ix_users_role_name_status_created_at', 'users', ['role_name', 'status', 'created_at']),
+    ('ix_scores_exam_id_student_id', 'scores', ['exam_id', 'student_id']),
+]
+
+
+def upgrade() -> None:
+    # if_not_exists: database tạo bằng create_all sau khi khai báo index trong models đã có sẵn các index này
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
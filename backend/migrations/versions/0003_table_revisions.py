@@ -0,0 +1,31 @@
+"""table revisions for conditional GET
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 20:31:08.220514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('table_revisions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('revision', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('table_revisions')
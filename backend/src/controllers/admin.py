@@ -1,21 +1,31 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..database import get_db
-from ..dependencies import get_current_admin_user
+from .. import dashboard_cache
+from ..database import async_engine, engine, get_async_db, get_db
+from ..dependencies import get_current_admin_user, get_page_params, conditional_get, classroom_fieldset
+from ..pool_metrics import pool_status
 from ..models.user import User
+from ..utils.fieldsets import Fieldset
+from ..utils.pagination import PageParams, set_page_headers
+from ..utils.responses import dump_json_list, json_response
+from ..utils.streaming import EXPORT_MEDIA_TYPES, IMPORT_OPENAPI, spool_body
 from ..services import user as user_service
 from ..services import course as course_service
 from ..services import classroom as classroom_service
 from ..services import schedule as schedule_service
+from ..services import kpi as kpi_service
+from ..services import rollup as rollup_service
+from ..services import password as password_service
 from ..schemas.user import UserResponse, UserCreate, UserUpdate, TeacherResponse, StudentResponse, UserRole
 from ..schemas.course import CourseResponse, CourseCreate, CourseUpdate
 from ..schemas.classroom import ClassroomResponse, ClassroomCreate, ClassroomUpdate
-from ..models.attendance import HomeworkStatus
-from sqlalchemy import func, desc, select
-from ..models import Course, Enrollment, Class, User, CourseLevel
+from sqlalchemy import func, desc
+from ..models import Course, Enrollment, Class, User
 from ..schemas.admin import *
 
 router = APIRouter()
@@ -23,18 +33,20 @@ router = APIRouter()
 # ==================== USER MANAGEMENT ====================
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
     role: Optional[str] = Query(None, description="Filter by user role"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by user status"),
+    search: Optional[str] = Query(None, description="Search by name, email or phone number"),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Lấy danh sách tất cả người dùng (chỉ admin)
     """
-    if role:
-        users = user_service.get_users_by_role(db, role)
-    else:
-        users = user_service.get_users(db)
-    return users
+    users = user_service.get_users_page(db, page, role, status_filter, search)
+    set_page_headers(response, users)
+    return json_response(dump_json_list(UserResponse, users.items), response)
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
@@ -77,7 +89,7 @@ async def create_user(
             detail="Email đã được sử dụng"
         )
     
-    user = user_service.create_user(db, user_data)
+    user = await user_service.create_user(db, user_data)
     return user
 
 @router.put("/users/{user_id}", response_model=UserResponse)
@@ -105,7 +117,7 @@ async def update_user(
             detail="Người dùng không tồn tại"
         )
     
-    updated_user = user_service.update_user(db, user_uuid, user_data)
+    updated_user = await user_service.update_user(db, user_uuid, user_data)
     return updated_user
 
 @router.delete("/users/{user_id}")
@@ -144,6 +156,8 @@ async def delete_user(
 @router.get("/users/role/{role_name}", response_model=List[UserResponse])
 async def get_users_by_role(
     role_name: str,
+    response: Response,
+    page: PageParams = Depends(get_page_params),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -158,8 +172,9 @@ async def get_users_by_role(
             detail=f"Role không hợp lệ. Chỉ chấp nhận: {', '.join(valid_roles)}"
         )
     
-    users = user_service.get_users_by_role(db, role_name)
-    return users
+    users = user_service.get_users_page(db, page, role_name)
+    set_page_headers(response, users)
+    return json_response(dump_json_list(UserResponse, users.items), response)
 
 @router.put("/users/{user_id}/role")
 async def update_user_role(
@@ -211,8 +226,13 @@ async def update_user_role(
     return updated_user
 
 # ==================== COURSE MANAGEMENT ====================
-@router.get("/courses", response_model=List[CourseResponse])
+@router.get(
+    "/courses",
+    response_model=List[CourseResponse],
+    dependencies=[conditional_get(get_current_admin_user, *course_service.RESPONSE_TABLES)]
+)
 async def get_all_courses(
+    response: Response,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -220,7 +240,7 @@ async def get_all_courses(
     Lấy danh sách tất cả khóa học
     """
     courses = course_service.get_courses(db)
-    return courses
+    return json_response(dump_json_list(CourseResponse, courses), response)
 
 @router.get("/courses/{course_id}", response_model=CourseResponse)
 async def get_course_by_id(
@@ -315,13 +335,20 @@ async def delete_course(
     return {"message": "Xóa khóa học thành công"}
 
 # ==================== CLASSROOM MANAGEMENT ====================
-@router.get("/classrooms", response_model=List[ClassroomResponse])
+@router.get(
+    "/classrooms",
+    response_model=List[ClassroomResponse],
+    dependencies=[conditional_get(get_current_admin_user, *classroom_service.RESPONSE_TABLES)]
+)
 async def get_all_classrooms(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    fieldset: Fieldset = classroom_fieldset,
     course_id: Optional[str] = Query(None, description="Filter by course ID"),
     teacher_id: Optional[str] = Query(None, description="Filter by teacher ID"),
     status: Optional[str] = Query(None, description="Filter by classroom status"),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lấy danh sách tất cả lớp học
@@ -348,17 +375,21 @@ async def get_all_classrooms(
                 detail="teacher_id không hợp lệ"
             )
     
-    classrooms = classroom_service.get_classrooms_with_filters(
+    classrooms = await classroom_service.get_classrooms_page(
         db, 
+        page,
         course_id=course_uuid, 
         teacher_id=teacher_uuid, 
         status=status,
+        expand=fieldset.expand,
     )
-    return classrooms
+    set_page_headers(response, classrooms)
+    return json_response(classroom_service.dump_classrooms_json(classrooms.items, fieldset), response)
 
 @router.get("/classrooms/{classroom_id}", response_model=ClassroomResponse)
 async def get_classroom_by_id(
     classroom_id: str,
+    fieldset: Fieldset = classroom_fieldset,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -373,13 +404,13 @@ async def get_classroom_by_id(
             detail="classroom_id không hợp lệ"
         )
     
-    classroom = classroom_service.get_classroom(db, classroom_uuid)
+    classroom = classroom_service.get_classroom_detail(db, classroom_uuid, fieldset.expand)
     if not classroom:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lớp học không tồn tại"
         )
-    return classroom
+    return json_response(classroom_service.dump_classroom_json(classroom, fieldset))
 
 @router.post("/classrooms", response_model=ClassroomResponse)
 async def create_classroom(
@@ -551,64 +582,21 @@ async def remove_student_from_classroom(
 # ==================== TEACHER MANAGEMENT ====================
 @router.get("/teachers", response_model=List[TeacherResponse])
 async def get_all_teachers(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by user status"),
+    search: Optional[str] = Query(None, description="Search by name, email or phone number"),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    teachers = user_service.get_teachers(db)
-    response = []
-
-    for teacher in teachers:
-        total = 0
-        total_attendanced = 0
-        total_passed_homework = 0
+    teachers = user_service.get_teachers_with_classes_page(db, page, status_filter, search)
+    set_page_headers(response, teachers)
+    kpis = kpi_service.get_teacher_kpis(db, [teacher.id for teacher in teachers.items])
 
-        total_passed = 0
-        total_scores = 0
-
-        class_ids = [cls.id for cls in teacher.taught_classes]
-        classrooms = db.execute(select(Class).where(Class.id.in_(class_ids))).scalars().all()
-        classrooms = [ClassroomResponse.model_validate(cls) for cls in classrooms]
-        for classroom in classrooms:
-            total_scores += len(classroom.enrollments)
-            range_score = 0
-            is_sw = True
-            if classroom.course_level == CourseLevel.C1:
-                range_score = 250
-            else:
-                is_sw = False
-                if classroom.course_level == CourseLevel.A1:
-                    range_score = 150
-                elif classroom.course_level == CourseLevel.A2:
-                    range_score = 350
-                elif classroom.course_level == CourseLevel.B1:
-                    range_score = 500
-                elif classroom.course_level == CourseLevel.B2:
-                    range_score = 750
-
-            for enrollment in classroom.enrollments:
-                if len(enrollment.score) > 0:
-                    if is_sw:
-                        if enrollment.score[0].speaking is not None and enrollment.score[0].writing is not None:
-                            total_passed += 1 if enrollment.score[0].speaking + enrollment.score[0].writing >= range_score else 0
-                    else:
-                        if enrollment.score[0].reading is not None and enrollment.score[0].listening is not None:
-                            total_passed += 1 if enrollment.score[0].reading + enrollment.score[0].listening >= range_score else 0
-
-            for session in classroom.sessions:
-                total += len(session.attendances)
-                present_attendances = [att for att in session.attendances if att.is_present]
-                total_attendanced += len(present_attendances)
-                passeds = [hw for hw in session.homeworks if hw.status == HomeworkStatus.PASSED]
-                total_passed_homework += len(passeds)
-
-        response.append(UserResponse(
-            **teacher.__dict__,
-            rate_passed_homework=round(total_passed_homework / total * 100, 2) if total > 0 else 0,
-            rate_attendanced=round(total_attendanced / total * 100, 2) if total > 0 else 0,
-            rate_passed=round(total_passed / total_scores * 100, 2) if total > 0 else 0,
-        ))
-
-    return response
+    return json_response(dump_json_list(TeacherResponse, [
+        UserResponse(**teacher.__dict__, **kpis[teacher.id])
+        for teacher in teachers.items
+    ]), response)
 
 @router.get("/teachers/{teacher_id}", response_model=TeacherResponse)
 async def get_teacher_by_id(
@@ -651,7 +639,7 @@ async def create_teacher(
             detail="Email đã được sử dụng"
         )
     
-    teacher = user_service.create_teacher(db, teacher_data.model_copy(
+    teacher = await user_service.create_teacher(db, teacher_data.model_copy(
             update={
                 "role_name": UserRole.TEACHER,
                 "password": teacher_data.password.strip()  # Ensure password is stripped of whitespace
@@ -684,7 +672,7 @@ async def update_teacher(
             detail="Giáo viên không tồn tại"
         )
     
-    updated_teacher = user_service.update_teacher(db, teacher_uuid, teacher_data)
+    updated_teacher = await user_service.update_teacher(db, teacher_uuid, teacher_data)
     return updated_teacher
 
 @router.delete("/teachers/{teacher_id}")
@@ -750,14 +738,19 @@ async def get_teacher_schedule(
 # ==================== STUDENT MANAGEMENT ====================
 @router.get("/students", response_model=List[StudentResponse])
 async def get_all_students(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by user status"),
+    search: Optional[str] = Query(None, description="Search by name, email or phone number"),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Lấy danh sách tất cả học sinh
     """
-    students = user_service.get_students(db)
-    return students
+    students = user_service.get_students_page(db, page, status_filter, search)
+    set_page_headers(response, students)
+    return json_response(dump_json_list(StudentResponse, students.items), response)
 
 @router.get("/students/{student_id}", response_model=StudentResponse)
 async def get_student_by_id(
@@ -784,6 +777,19 @@ async def get_student_by_id(
         )
     return student
 
+@router.post("/students/import", response_class=StreamingResponse, openapi_extra=IMPORT_OPENAPI)
+async def import_students(
+    request: Request,
+    format: Literal["csv", "ndjson"] = Query("csv", description="Định dạng body: csv (có dòng tiêu đề) hoặc ndjson"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Import học sinh hàng loạt từ file CSV/NDJSON gửi trực tiếp trong body.
+    Trả về báo cáo NDJSON được stream theo từng lô: lỗi của từng dòng, tiến độ và tổng kết
+    """
+    file = await spool_body(request)
+    return StreamingResponse(user_service.import_students(file, format), media_type=EXPORT_MEDIA_TYPES["ndjson"])
+
 @router.post("/students", response_model=StudentResponse)
 async def create_student(
     student_data: UserCreate,
@@ -800,7 +806,7 @@ async def create_student(
             detail="Email đã được sử dụng"
         )
     
-    student = user_service.create_student(
+    student = await user_service.create_student(
         db,
         student_data.model_copy(
             update={
@@ -836,7 +842,7 @@ async def update_student(
             detail="Học sinh không tồn tại"
         )
     
-    updated_student = user_service.update_student(db, student_uuid, student_data)
+    updated_student = await user_service.update_student(db, student_uuid, student_data)
     return updated_student
 
 @router.delete("/students/{student_id}")
@@ -875,14 +881,19 @@ async def delete_student(
 # ==================== STAFF MANAGEMENT ====================
 @router.get("/staff", response_model=List[UserResponse])
 async def get_all_staff(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by user status"),
+    search: Optional[str] = Query(None, description="Search by name, email or phone number"),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Lấy danh sách tất cả nhân viên (staff)
     """
-    staff = user_service.get_staff(db)
-    return staff
+    staff = user_service.get_staff_page(db, page, status_filter, search)
+    set_page_headers(response, staff)
+    return json_response(dump_json_list(UserResponse, staff.items), response)
 
 @router.get("/staff/{staff_id}", response_model=UserResponse)
 async def get_staff_by_id(
@@ -919,7 +930,7 @@ async def create_staff(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email đã được sử dụng"
         )
-    staff = user_service.create_staff(db, staff_data.model_copy(
+    staff = await user_service.create_staff(db, staff_data.model_copy(
         update={
             "role_name": UserRole.STAFF,
             "password": staff_data.password
@@ -947,7 +958,7 @@ async def update_staff(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Nhân viên không tồn tại"
         )
-    updated_staff = user_service.update_staff(db, staff_uuid, staff_data)
+    updated_staff = await user_service.update_staff(db, staff_uuid, staff_data)
     return updated_staff
 
 @router.delete("/staff/{staff_id}")
@@ -997,8 +1008,12 @@ async def delete_student_schedule(
 @router.get("/dashboard", response_model=AdminDashboardResponse)
 async def get_admin_dashboard(
     period: str = "thisMonth",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    # Code ORM đồng bộ chạy qua run_sync: I/O được await trên event loop
+    return await dashboard_cache.get_or_build(db, "admin", _build_admin_dashboard, period, period=period)
+
+def _build_admin_dashboard(db: Session, period: str) -> AdminDashboardResponse:
     now = datetime.now()
     if period == "thisWeek":
         start_date = now - timedelta(days=7)
@@ -1010,35 +1025,30 @@ async def get_admin_dashboard(
     else:
         start_date = now.replace(month=1, day=1)
     
-    total_revenue_query = db.query(
-        func.sum(Course.price).label('total_revenue'),
-        func.count(Enrollment.id).label('total_enrollments')
-    ).join(
-        Class, Course.id == Class.course_id
-    ).join(
-        Enrollment, Class.id == Enrollment.class_id
-    ).filter(
-        Enrollment.created_at >= start_date,
-        Enrollment.status == 'active'
-    ).first()
-    
-    total_revenue = float(total_revenue_query.total_revenue or 0)
-    total_enrollments = total_revenue_query.total_enrollments or 0
-    
-    active_students = db.query(func.count(User.id)).filter(
-        User.role_name == 'student',
-        User.status == 'active'
-    ).scalar()
-    
-    completed_students = db.query(func.count(User.id)).filter(
-        User.role_name == 'student',
-        User.status == 'graduated'
-    ).scalar()
+    if period == "thisWeek":
+        # Khoảng 7 ngày không trùng ranh giới tháng => đọc trực tiếp từ enrollments
+        total_revenue_query = db.query(
+            func.sum(Course.price).label('total_revenue'),
+            func.count(Enrollment.id).label('total_enrollments')
+        ).join(
+            Class, Course.id == Class.course_id
+        ).join(
+            Enrollment, Class.id == Enrollment.class_id
+        ).filter(
+            Enrollment.created_at >= start_date,
+            Enrollment.status == 'active'
+        ).first()
+        
+        total_revenue = float(total_revenue_query.total_revenue or 0)
+        total_enrollments = total_revenue_query.total_enrollments or 0
+    else:
+        total_revenue, total_enrollments = rollup_service.get_revenue_since(
+            db, rollup_service.month_of(start_date)
+        )
     
-    total_enrollments_ever = db.query(func.count(Enrollment.id)).scalar()
-    completed_enrollments = db.query(func.count(Enrollment.id)).filter(
-        Enrollment.status == 'completed'
-    ).scalar()
+    enrollment_totals = rollup_service.get_enrollment_totals_by_status(db)
+    total_enrollments_ever = sum(enrollment_totals.values())
+    completed_enrollments = enrollment_totals.get('completed', 0)
     
     completion_rate = (completed_enrollments / total_enrollments_ever * 100) if total_enrollments_ever > 0 else 0
     
@@ -1046,31 +1056,20 @@ async def get_admin_dashboard(
         Class.status == 'ACTIVE'
     ).scalar()
     
+    # Rollup đếm theo tháng dương lịch (ngày 1 -> cuối tháng). Trước đây mỗi cửa sổ bắt đầu từ ngày 1
+    # lúc giờ hiện tại nên số liệu các tháng có thể lệch nhẹ so với bản cũ
+    month_dates = [now - timedelta(days=30*i) for i in range(7, -1, -1)]
+    month_starts = [rollup_service.month_of(month_date) for month_date in month_dates]
+    monthly_revenue = rollup_service.get_revenue_by_months(db, month_starts)
+    
     revenue_by_month = []
-    for i in range(7, -1, -1):
-        month_date = now - timedelta(days=30*i)
-        month_start = month_date.replace(day=1)
-        next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
-        
-        monthly_data = db.query(
-            func.sum(Course.price).label('revenue'),
-            func.count(func.distinct(Class.course_id)).label('courses'),
-            func.count(Enrollment.id).label('enrollments')
-        ).join(
-            Class, Course.id == Class.course_id
-        ).join(
-            Enrollment, Class.id == Enrollment.class_id
-        ).filter(
-            Enrollment.created_at >= month_start,
-            Enrollment.created_at < next_month,
-            Enrollment.status == 'active'
-        ).first()
-        
+    for month_date, month_start in zip(month_dates, month_starts):
+        monthly_data = monthly_revenue.get(month_start, {})
         revenue_by_month.append(RevenueByMonthData(
             month=f"T{month_date.month}",
-            revenue=float(monthly_data.revenue or 0),
-            courses=monthly_data.courses or 0,
-            enrollments=monthly_data.enrollments or 0
+            revenue=monthly_data.get('revenue', 0),
+            courses=monthly_data.get('courses', 0),
+            enrollments=monthly_data.get('enrollments', 0)
         ))
     
     student_statuses = db.query(
@@ -1080,6 +1079,10 @@ async def get_admin_dashboard(
         User.role_name == 'student'
     ).group_by(User.status).all()
     
+    student_status_counts = {row.status: row.count for row in student_statuses}
+    active_students = student_status_counts.get('active', 0)
+    completed_students = student_status_counts.get('graduated', 0)
+    
     status_colors = {
         'active': '#10B981',
         'graduated': '#3B82F6', 
@@ -1103,22 +1106,14 @@ async def get_admin_dashboard(
         for status in student_statuses
     ]
     
-    new_students_by_month = []
-    for i in range(7, -1, -1):
-        month_date = now - timedelta(days=30*i)
-        month_start = month_date.replace(day=1)
-        next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
-        
-        new_count = db.query(func.count(User.id)).filter(
-            User.role_name == 'student',
-            User.created_at >= month_start,
-            User.created_at < next_month
-        ).scalar()
-        
-        new_students_by_month.append(NewStudentData(
+    monthly_new_students = rollup_service.get_new_students_by_months(db, month_starts)
+    new_students_by_month = [
+        NewStudentData(
             month=f"T{month_date.month}",
-            new_students=new_count
-        ))
+            new_students=monthly_new_students.get(month_start, 0)
+        )
+        for month_date, month_start in zip(month_dates, month_starts)
+    ]
     
     level_data = db.query(
         Class.course_level,
@@ -1290,4 +1285,25 @@ async def get_admin_dashboard(
         period=period
     )
     
-    return response
\ No newline at end of file
+    return response
+# ==================== SYSTEM ====================
+@router.get("/system/password-hashing")
+async def get_password_hashing_metrics(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Thống kê hàng đợi băm mật khẩu (queue depth, in-flight, thời gian chờ)
+    """
+    return password_service.get_metrics()
+
+@router.get("/system/db-pool")
+async def get_db_pool_metrics(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Thống kê connection pool (checked-out, overflow, thời gian chờ connection)
+    """
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine),
+    }
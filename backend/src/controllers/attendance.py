@@ -4,59 +4,28 @@ from src.database import get_db
 from typing import List
 import uuid
 from src.models import Session as SessionModel
-from src.models import Homework as HomeworkModel
 from src.models import Attendance as AttendanceModel
-from src.models.attendance import HomeworkStatus
 from ..dependencies import get_current_student_user
 from ..models.user import User
+from ..services import attendance as attendance_service
 
-from src.schemas.attendance import SessionCreate, SessionOut, AttendanceResponse
+from src.schemas.attendance import (
+    SessionCreate, SessionBulkCreate, SessionCreatedOut, SessionOut, AttendanceResponse
+)
 
 
 router = APIRouter()
 
 
-@router.post("/")
+@router.post("/", response_model=SessionCreatedOut)
 def create_session(data: SessionCreate, db: Session = Depends(get_db)):
-    session = SessionModel(
-        topic=data.topic,
-        schedule_id=data.schedule_id,
-        class_id=data.class_id
-    )
-    db.add(session)
-    db.flush()
-    db.refresh(session)
+    return attendance_service.create_session(db, data)
 
 
-    attendances = [
-        AttendanceModel(
-            student_id=a.student_id,
-            is_present=a.is_present,
-            session_id=session.id,
-        )
-        for a in data.attendances
-    ]
-
-    homeworks = [
-        HomeworkModel(
-            student_id=a.student_id,
-            status=HomeworkStatus.PENDING,
-            session_id=session.id,
-        )
-        for a in data.attendances
-    ]
-
-    db.add_all(attendances)
-    db.add_all(homeworks)
-    db.commit()
-
-    return {
-        "id": session.id,
-        "topic": session.topic,
-        "class_id": session.class_id,
-        "schedule_id": session.schedule_id,
-        "attendances": [{"id": a.id, "student_id": a.student_id, "is_present": a.is_present} for a in attendances]
-    }
+@router.post("/bulk/", response_model=List[SessionCreatedOut])
+def create_sessions(data: SessionBulkCreate, db: Session = Depends(get_db)):
+    """Tạo nhiều buổi học (điểm danh + bài tập) trong một request"""
+    return attendance_service.create_sessions(db, data.sessions)
 
 
 @router.get('/student/', response_model=List[AttendanceResponse])
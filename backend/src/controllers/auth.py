@@ -1,4 +1,4 @@
-from datetime import timedelta, date
+from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -7,7 +7,7 @@ from ..schemas.auth import LoginRequest, RegisterRequest, TokenResponse, ChangeP
 from ..schemas.user import UserResponse, UserUpdate
 from ..services import auth as auth_service
 from ..services import user as user_service
-from ..config import settings
+from ..services import password as password_service
 
 router = APIRouter()
 security = HTTPBearer()
@@ -29,7 +29,7 @@ async def register(
         )
     
     # Register the user
-    user = auth_service.register_user(db, register_request)
+    user = await auth_service.register_user(db, register_request)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -63,7 +63,7 @@ async def login(
     Đăng nhập người dùng và trả về JWT access token
     """
     # Authenticate user
-    user = auth_service.authenticate_user(db, login_request.email, login_request.password)
+    user = await auth_service.authenticate_user(db, login_request.email, login_request.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,12 +72,13 @@ async def login(
         )
     
     # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token_expires = auth_service.access_token_lifetime()
     access_token = auth_service.create_access_token(
         data={
             "sub": user.email,
             "user_id": str(user.id),
-            "role": user.role_name
+            "role": user.role_name,
+            "ver": auth_service.get_token_version(user.id)
         },
         expires_delta=access_token_expires
     )
@@ -85,7 +86,7 @@ async def login(
     return TokenResponse(
         access_token=access_token,
         token_type="bearer",
-        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60  # Convert to seconds
+        expires_in=int(access_token_expires.total_seconds())
     )
 
 @router.get("/me", response_model=UserResponse)
@@ -144,7 +145,7 @@ async def update_current_user_info(
         )
     
     # Update user info
-    updated_user = user_service.update_user(db, current_user.id, user_data)
+    updated_user = await user_service.update_user(db, current_user.id, user_data)
     
     if not updated_user:
         raise HTTPException(
@@ -192,14 +193,14 @@ async def change_password(
         )
 
     # Verify old password
-    if not auth_service.verify_password(form_data.old_password, current_user.password):
+    if not await password_service.verify_password(form_data.old_password, current_user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Mật khẩu cũ không chính xác"
         )
     
     # Update password
-    success = auth_service.change_password(db, current_user.id, form_data.new_password)
+    success = await auth_service.change_password(db, current_user.id, form_data.new_password)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, literal, select
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
 from src.database import get_db
+from src.dependencies import get_page_params
 from src.models.exam import Exam
 from src.models.classroom import Class
+from src.models.enrollment import Enrollment
 from src.models.score import Score
 from pydantic import Field
 from src.schemas.base import BaseSchema
 from src.schemas.classroom import ClassroomBase
+from src.utils.database import UUID, new_uuid
+from src.utils.pagination import PageParams, paginate, set_page_headers
+from src.utils.responses import dump_json_list, json_response
 
 class ExamBase(BaseSchema):
     exam_name: str = Field(..., max_length=255)
@@ -59,10 +64,17 @@ router = APIRouter()
 
 @router.get("/", response_model=List[ExamResponse])
 def get_all_exams(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    class_id: Optional[uuid.UUID] = Query(None, description="Filter by class ID"),
     db: Session = Depends(get_db)
 ):
-    exams = db.query(Exam).all()
-    return exams
+    stmt = select(Exam)
+    if class_id:
+        stmt = stmt.where(Exam.class_id == class_id)
+    exams = paginate(db, stmt, Exam, page)
+    set_page_headers(response, exams)
+    return json_response(dump_json_list(ExamResponse, exams.items), response)
 
 @router.get("/class/{class_id}", response_model=List[ExamResponse])
 def get_exams_by_class_id(
@@ -93,6 +105,12 @@ def create_exam(
     exam: ExamCreate,
     db: Session = Depends(get_db)
 ):
+    if not db.query(Class.id).filter(Class.id == exam.class_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Class not found"
+        )
+
     db_exam = Exam(
         exam_name=exam.exam_name,
         description=exam.description,
@@ -102,15 +120,20 @@ def create_exam(
     )
     try:
         db.add(db_exam)
+        db.flush()
+        # Tạo bảng điểm cho cả lớp bằng một câu INSERT ... SELECT, cùng transaction với bài kiểm tra
+        db.execute(
+            insert(Score).from_select(
+                ["id", "student_id", "exam_id"],
+                select(
+                    new_uuid(),
+                    Enrollment.student_id,
+                    literal(db_exam.id, UUID())
+                ).where(Enrollment.class_id == exam.class_id)
+            )
+        )
         db.commit()
         db.refresh(db_exam)
-        db_class = db.query(Class).filter(Class.id == exam.class_id).first()
-        for enrollment in db_class.enrollments:
-            db.add(Score(
-                student_id=enrollment.student.id,
-                exam_id=db_exam.id
-            ))
-        db.commit()
 
         return db_exam
     except Exception as e:
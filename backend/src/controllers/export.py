@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+import uuid
+
+from ..database import get_async_db
+from ..dependencies import get_current_staff_user
+from ..models.user import User
+from ..services import export as export_service
+from ..utils.streaming import export_response
+
+router = APIRouter()
+
+# Các export stream từng batch từ server-side cursor nên bộ nhớ không tăng theo số dòng
+FORMAT_QUERY = Query("csv", description="csv hoặc ndjson (mỗi dòng một JSON object)")
+
+
+@router.get("/students", response_class=StreamingResponse)
+async def export_students(
+    format: Literal["csv", "ndjson"] = FORMAT_QUERY,
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by user status"),
+    search: Optional[str] = Query(None, description="Search by name, email or phone number"),
+    current_user: User = Depends(get_current_staff_user)
+):
+    """Export students"""
+    return export_response(export_service.export_students(format, status_filter, search), format, "students")
+
+@router.get("/classrooms/{classroom_id}/enrollments", response_class=StreamingResponse)
+async def export_class_enrollments(
+    classroom_id: uuid.UUID,
+    format: Literal["csv", "ndjson"] = FORMAT_QUERY,
+    current_user: User = Depends(get_current_staff_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export enrollments of a class with scores"""
+    if not await export_service.class_exists(db, classroom_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy lớp học")
+    return export_response(
+        export_service.export_class_enrollments(classroom_id, format), format, f"enrollments-{classroom_id}"
+    )
+
+@router.get("/classrooms/{classroom_id}/attendance", response_class=StreamingResponse)
+async def export_class_attendance(
+    classroom_id: uuid.UUID,
+    format: Literal["csv", "ndjson"] = FORMAT_QUERY,
+    current_user: User = Depends(get_current_staff_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export the attendance matrix of a class (student x session)"""
+    if not await export_service.class_exists(db, classroom_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy lớp học")
+    return export_response(
+        export_service.export_class_attendance(classroom_id, format), format, f"attendance-{classroom_id}"
+    )
+
+@router.get("/exams/{exam_id}/results", response_class=StreamingResponse)
+async def export_exam_results(
+    exam_id: uuid.UUID,
+    format: Literal["csv", "ndjson"] = FORMAT_QUERY,
+    current_user: User = Depends(get_current_staff_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export scores of an exam"""
+    if not await export_service.exam_exists(db, exam_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy bài kiểm tra")
+    return export_response(export_service.export_exam_results(exam_id, format), format, f"exam-results-{exam_id}")
@@ -6,12 +6,20 @@ from typing import List
 import uuid
 from src.models import Homework as HomeworkModel
 from src.models import Session as SessionModel
-from src.schemas.homework import SessionOut, HomeworkUpdate, HomeworkResponse
+from src.schemas.homework import (
+    SessionOut, HomeworkUpdate, HomeworkResponse, HomeworkBulkGrade, HomeworkGradeResult
+)
 from ..dependencies import get_current_student_user
 from ..models.user import User
+from ..services import attendance as attendance_service
 
 router = APIRouter()
 
+@router.put("/bulk/", response_model=List[HomeworkGradeResult])
+def grade_homeworks(data: HomeworkBulkGrade, db: Session = Depends(get_db)):
+    """Chấm nhiều bài tập (cả buổi học) trong một request"""
+    return attendance_service.grade_homeworks(db, data.grades)
+
 @router.put("/{homework_id}/")
 def update_homework(homework_id: uuid.UUID, data: HomeworkUpdate, db: Session = Depends(get_db)):
     homework = db.query(Homework).where(Homework.id == homework_id).first()
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 import random
@@ -6,7 +7,9 @@ import uuid
 
 from src.database import get_db
 from src.models import User, Course, Class, Schedule, Enrollment, ClassStatus, CourseLevel, Weekday, Score
-from src.services.auth import get_password_hash
+from src.services import password as password_service
+from src.services import rollup as rollup_service
+from src.cruds import user as user_crud
 
 router = APIRouter()
 def generate_fake_users():
@@ -185,13 +188,16 @@ async def seed_all_data(db: Session = Depends(get_db)):
         db.query(User).delete()
         db.query(Score).delete()
         db.commit()
+        user_crud.clear_user_cache()
         
         # Tạo users
         fake_users = generate_fake_users()
         created_users = []
+        hashed_passwords = await asyncio.gather(*(
+            password_service.hash_password(user_data["password"]) for user_data in fake_users
+        ))
         
-        for user_data in fake_users:
-            hashed_password = get_password_hash(user_data["password"])
+        for user_data, hashed_password in zip(fake_users, hashed_passwords):
             user = User(
                 id=uuid.uuid4(),
                 name=user_data["name"],
@@ -313,6 +319,7 @@ async def seed_all_data(db: Session = Depends(get_db)):
                 db.add(score)
         
         db.commit()
+        rollup_service.backfill(db)
         
         return {
             "message": "Đã tạo thành công dữ liệu fake cho hệ thống",
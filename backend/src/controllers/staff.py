@@ -1,33 +1,47 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..dependencies import get_current_staff_user
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
+from .. import dashboard_cache
+from ..database import get_async_db, get_db
+from ..dependencies import get_current_staff_user, get_page_params, conditional_get, classroom_fieldset
 from ..models.user import User
+from ..utils.fieldsets import Fieldset
+from ..utils.pagination import PageParams, set_page_headers
+from ..utils.responses import dump_json_list, json_response
+from ..utils.streaming import EXPORT_MEDIA_TYPES, IMPORT_OPENAPI, spool_body
 from ..services import user as user_service
 from ..services import course as course_service
 from ..services import classroom as classroom_service
 from ..services import schedule as schedule_service
+from ..services import kpi as kpi_service
 from ..services import enrollment as enrollment_service
 from ..schemas.user import UserResponse, UserCreate, UserUpdate, StudentResponse
 from ..schemas.course import CourseResponse
 from ..schemas.classroom import ClassroomResponse, ClassroomCreate, ClassroomUpdate
 from ..schemas.schedule import ScheduleResponse, ScheduleCreate, ScheduleUpdate
+from ..schemas.enrollment import BulkEnrollmentResponse
 from ..schemas.staff import *
-from ..models import Class, ClassStatus, Enrollment, Session, Attendance, Homework, CourseLevel
+from ..models import Class, ClassStatus, Enrollment, Session, Attendance, Homework
 from ..models.attendance import HomeworkStatus
-from sqlalchemy import func, desc, select
+from sqlalchemy import and_, case, func, desc, select
 
 router = APIRouter()
 
 @router.get("/students", response_model=List[StudentResponse])
 async def get_all_students(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by user status"),
+    search: Optional[str] = Query(None, description="Search by name, email or phone number"),
     current_user: User = Depends(get_current_staff_user),
     db: Session = Depends(get_db)
 ):
-    students = user_service.get_students(db)
-    return students
+    students = user_service.get_students_page(db, page, status_filter, search)
+    set_page_headers(response, students)
+    return json_response(dump_json_list(StudentResponse, students.items), response)
 
 @router.get("/students/{student_id}/", response_model=StudentResponse)
 async def get_student_by_id(
@@ -51,6 +65,19 @@ async def get_student_by_id(
         )
     return student
 
+@router.post("/students/import", response_class=StreamingResponse, openapi_extra=IMPORT_OPENAPI)
+async def import_students(
+    request: Request,
+    format: Literal["csv", "ndjson"] = Query("csv", description="Định dạng body: csv (có dòng tiêu đề) hoặc ndjson"),
+    current_user: User = Depends(get_current_staff_user)
+):
+    """
+    Import học sinh hàng loạt từ file CSV/NDJSON gửi trực tiếp trong body.
+    Trả về báo cáo NDJSON được stream theo từng lô: lỗi của từng dòng, tiến độ và tổng kết
+    """
+    file = await spool_body(request)
+    return StreamingResponse(user_service.import_students(file, format), media_type=EXPORT_MEDIA_TYPES["ndjson"])
+
 @router.post("/students", response_model=StudentResponse)
 async def create_student(
     student_data: UserCreate,
@@ -63,7 +90,7 @@ async def create_student(
             detail="Email đã được sử dụng"
         )
     
-    student = user_service.create_student(db, student_data)
+    student = await user_service.create_student(db, student_data)
     return student
 
 @router.put("/students/{student_id}", response_model=StudentResponse)
@@ -88,7 +115,7 @@ async def update_student(
             detail="Học sinh không tồn tại"
         )
     
-    updated_student = user_service.update_student(db, student_uuid, student_data)
+    updated_student = await user_service.update_student(db, student_uuid, student_data)
     return updated_student
 
 @router.delete("/students/{student_id}")
@@ -121,69 +148,27 @@ async def get_available_students(
     db: Session = Depends(get_db)
 ):
     students = user_service.get_students(db)
-    return students
+    return json_response(dump_json_list(StudentResponse, students))
 
 
 # ==================== TEACHER MANAGEMENT ====================
 @router.get("/teachers", response_model=List[UserResponse])
 async def get_all_teachers(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by user status"),
+    search: Optional[str] = Query(None, description="Search by name, email or phone number"),
     current_user: User = Depends(get_current_staff_user),
     db: Session = Depends(get_db)
 ):
-    teachers = user_service.get_teachers(db)
-    response = []
-
-    for teacher in teachers:
-        total = 0
-        total_attendanced = 0
-        total_passed_homework = 0
-
-        total_passed = 0
-        total_scores = 0
-
-        class_ids = [cls.id for cls in teacher.taught_classes]
-        classrooms = db.execute(select(Class).where(Class.id.in_(class_ids))).scalars().all()
-        classrooms = [ClassroomResponse.model_validate(cls) for cls in classrooms]
-        for classroom in classrooms:
-            total_scores += len(classroom.enrollments)
-            range_score = 0
-            is_sw = True
-            if classroom.course_level == CourseLevel.C1:
-                range_score = 250
-            else:
-                is_sw = False
-                if classroom.course_level == CourseLevel.A1:
-                    range_score = 150
-                elif classroom.course_level == CourseLevel.A2:
-                    range_score = 350
-                elif classroom.course_level == CourseLevel.B1:
-                    range_score = 500
-                elif classroom.course_level == CourseLevel.B2:
-                    range_score = 750
-            for enrollment in classroom.enrollments:
-                if len(enrollment.score) > 0:
-                    if is_sw:
-                        if enrollment.score[0].speaking is not None and enrollment.score[0].writing is not None:
-                            total_passed += 1 if enrollment.score[0].speaking + enrollment.score[0].writing >= range_score else 0
-                    else:
-                        if enrollment.score[0].reading is not None and enrollment.score[0].listening is not None:
-                            total_passed += 1 if enrollment.score[0].reading + enrollment.score[0].listening >= range_score else 0
-
-            for session in classroom.sessions:
-                total += len(session.attendances)
-                present_attendances = [att for att in session.attendances if att.is_present]
-                total_attendanced += len(present_attendances)
-                passeds = [hw for hw in session.homeworks if hw.status == HomeworkStatus.PASSED]
-                total_passed_homework += len(passeds)
-
-        response.append(UserResponse(
-            **teacher.__dict__,
-            rate_passed_homework=round(total_passed_homework / total * 100, 2) if total > 0 else 0,
-            rate_passed=round(total_passed / total_scores * 100, 2) if total > 0 else 0,
-            rate_attendanced=round(total_attendanced / total * 100, 2) if total > 0 else 0,
-        ))
-
-    return response
+    teachers = user_service.get_teachers_with_classes_page(db, page, status_filter, search)
+    set_page_headers(response, teachers)
+    kpis = kpi_service.get_teacher_kpis(db, [teacher.id for teacher in teachers.items])
+
+    return json_response(dump_json_list(UserResponse, [
+        UserResponse(**teacher.__dict__, **kpis[teacher.id])
+        for teacher in teachers.items
+    ]), response)
 
 @router.get("/teachers/{teacher_id}/schedule/")
 async def get_teacher_schedule(
@@ -203,8 +188,13 @@ async def get_teacher_schedule(
     return schedule_service.get_schedules_by_teacher(db=db, teacher_id=teacher_id)
 
 # ==================== COURSE MANAGEMENT ====================
-@router.get("/courses", response_model=List[CourseResponse])
+@router.get(
+    "/courses",
+    response_model=List[CourseResponse],
+    dependencies=[conditional_get(get_current_staff_user, *course_service.RESPONSE_TABLES)]
+)
 async def get_all_courses(
+    response: Response,
     current_user: User = Depends(get_current_staff_user),
     db: Session = Depends(get_db)
 ):
@@ -212,16 +202,23 @@ async def get_all_courses(
     Lấy danh sách tất cả khóa học
     """
     courses = course_service.get_courses(db)
-    return courses
+    return json_response(dump_json_list(CourseResponse, courses), response)
 
 # ==================== CLASSROOM MANAGEMENT ====================
-@router.get("/classrooms", response_model=List[ClassroomResponse])
+@router.get(
+    "/classrooms",
+    response_model=List[ClassroomResponse],
+    dependencies=[conditional_get(get_current_staff_user, *classroom_service.RESPONSE_TABLES)]
+)
 async def get_all_classrooms(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    fieldset: Fieldset = classroom_fieldset,
     course_id: Optional[str] = Query(None, description="Filter by course ID"),
     teacher_id: Optional[str] = Query(None, description="Filter by teacher ID"),
     status: Optional[str] = Query(None, description="Filter by classroom status"),
     current_user: User = Depends(get_current_staff_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     course_uuid = None
     teacher_uuid = None
@@ -244,17 +241,21 @@ async def get_all_classrooms(
                 detail="teacher_id không hợp lệ"
             )
     
-    classrooms = classroom_service.get_classrooms_with_filters(
+    classrooms = await classroom_service.get_classrooms_page(
         db, 
+        page,
         course_id=course_uuid, 
         teacher_id=teacher_uuid, 
         status=status,
+        expand=fieldset.expand,
     )
-    return classrooms
+    set_page_headers(response, classrooms)
+    return json_response(classroom_service.dump_classrooms_json(classrooms.items, fieldset), response)
 
 @router.get("/classrooms/{classroom_id}", response_model=ClassroomResponse)
 async def get_classroom_by_id(
     classroom_id: str,
+    fieldset: Fieldset = classroom_fieldset,
     current_user: User = Depends(get_current_staff_user),
     db: Session = Depends(get_db)
 ):
@@ -266,13 +267,13 @@ async def get_classroom_by_id(
             detail="classroom_id không hợp lệ"
         )
     
-    classroom = classroom_service.get_classroom(db, classroom_uuid)
+    classroom = classroom_service.get_classroom_detail(db, classroom_uuid, fieldset.expand)
     if not classroom:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lớp học không tồn tại"
         )
-    return classroom
+    return json_response(classroom_service.dump_classroom_json(classroom, fieldset))
 
 @router.post("/classrooms", response_model=ClassroomResponse)
 async def create_classroom(
@@ -309,7 +310,7 @@ async def update_classroom(
     return updated_classroom
 
 
-@router.post("/classrooms/{classroom_id}/students/bulk")
+@router.post("/classrooms/{classroom_id}/students/bulk", response_model=BulkEnrollmentResponse)
 async def assign_multiple_students_to_classroom(
     classroom_id: str,
     students_data: dict,
@@ -325,18 +326,31 @@ async def assign_multiple_students_to_classroom(
             detail="ID không hợp lệ"
         )
     
+    classroom = classroom_service.get_classroom(db, classroom_uuid)
+    if not classroom:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lớp học không tồn tại"
+        )
+    
     return enrollment_service.bulk_create_enrollments(db=db, student_ids=student_ids, class_id=classroom_uuid)
 
 # ==================== SCHEDULE MANAGEMENT ====================
 
-@router.get("/schedules", response_model=List[ScheduleResponse])
+@router.get(
+    "/schedules",
+    response_model=List[ScheduleResponse],
+    dependencies=[conditional_get(get_current_staff_user, *schedule_service.RESPONSE_TABLES)]
+)
 async def get_all_schedules(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
     classroom_id: Optional[str] = Query(None, description="Filter by classroom ID"),
     teacher_id: Optional[str] = Query(None, description="Filter by teacher ID"),
     weekday: Optional[str] = Query(None, description="Filter by weekday"),
     date: Optional[str] = Query(None, description="Filter by date (YYYY-MM-DD)"),
     current_user: User = Depends(get_current_staff_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lấy danh sách tất cả lịch học
@@ -379,18 +393,17 @@ async def get_all_schedules(
                     detail="teacher_id không hợp lệ"
                 )
 
-        # Use filters if provided, otherwise return all schedules
-        if classroom_uuid or teacher_uuid or filter_weekday:
-            schedules = schedule_service.get_schedules_with_filters(
-                db,
-                classroom_id=classroom_uuid,
-                teacher_id=teacher_uuid,
-                weekday=filter_weekday,
-            )
-        else:
-            schedules = schedule_service.get_all_schedules(db)
+        # Không có filter => trả về tất cả lịch học
+        schedules = await schedule_service.get_schedules_page(
+            db,
+            page,
+            classroom_id=classroom_uuid,
+            teacher_id=teacher_uuid,
+            weekday=filter_weekday,
+        )
+        set_page_headers(response, schedules)
 
-        return schedules
+        return json_response(dump_json_list(ScheduleResponse, schedules.items), response)
     except Exception as e:
         print(f"Error in get_all_schedules: {e}")
         # Return empty list instead of error for now
@@ -471,53 +484,67 @@ async def get_classroom_schedules(
 
 # ==================== STATS MANAGEMENT ====================
 @router.get("/dashboard/", response_model=StaffDashboardResponse)
-async def get_staff_dashboard(db: Session = Depends(get_db)):
+async def get_staff_dashboard(db: AsyncSession = Depends(get_async_db)):
+    # Code ORM đồng bộ chạy qua run_sync: I/O được await trên event loop
+    return await dashboard_cache.get_or_build(db, "staff", _build_staff_dashboard)
+
+def _build_staff_dashboard(db: Session) -> StaffDashboardResponse:
     try:
-        total_students = db.query(User).filter(User.role_name == "student").count()
-        
-        unassigned_students = db.query(User).filter(
-            User.role_name == "student",
-            ~User.id.in_(
-                db.query(Enrollment.student_id).filter(
-                    Enrollment.status == "active"
-                ).subquery()
-            )
-        ).count()
-        
-        active_classes = db.query(Class).filter(Class.status == ClassStatus.ACTIVE).count()
-        
         from datetime import datetime, timedelta
         today = datetime.now().date()
         start_of_week = today - timedelta(days=today.weekday())
         end_of_week = start_of_week + timedelta(days=6)
         
-        weekly_schedules = db.query(Session).join(Class).filter(
-            Class.status == ClassStatus.ACTIVE,
-            Session.created_at >= start_of_week,
-            Session.created_at <= end_of_week
-        ).count()
+        # 1. Tổng quan: các số đếm gộp vào một truy vấn bằng scalar subquery
+        active_student_ids = select(Enrollment.student_id).where(Enrollment.status == "active")
+        summary = db.query(
+            select(func.count(User.id)).where(
+                User.role_name == "student"
+            ).scalar_subquery().label('total_students'),
+            select(func.count(User.id)).where(
+                User.role_name == "student",
+                ~User.id.in_(active_student_ids)
+            ).scalar_subquery().label('unassigned_students'),
+            select(func.count(Class.id)).where(
+                Class.status == ClassStatus.ACTIVE
+            ).scalar_subquery().label('active_classes'),
+            select(func.count(Session.id)).join(Class).where(
+                Class.status == ClassStatus.ACTIVE,
+                Session.created_at >= start_of_week,
+                Session.created_at <= end_of_week
+            ).scalar_subquery().label('weekly_schedules')
+        ).one()
+        
+        total_students = summary.total_students
+        unassigned_students = summary.unassigned_students
+        active_classes = summary.active_classes
+        weekly_schedules = summary.weekly_schedules
         
         # 2. Attendance Data (last 6 weeks)
-        attendance_data = []
+        # Mỗi tuần là một cặp cột CASE trong cùng một truy vấn
+        weeks = []
         for i in range(6, 0, -1):
             week_start = today - timedelta(weeks=i)
-            week_end = week_start + timedelta(days=6)
-            
-            total_sessions = db.query(Session).filter(
-                Session.created_at >= week_start,
-                Session.created_at <= week_end
-            ).count()
-            
-            if total_sessions > 0:
-                present_attendances = db.query(Attendance).join(Session).filter(
-                    Session.created_at >= week_start,
-                    Session.created_at <= week_end,
-                    Attendance.is_present == True
-                ).count()
-                
-                attendance_rate = (present_attendances / total_sessions * 100) if total_sessions > 0 else 0
-            else:
-                attendance_rate = 0
+            weeks.append((i, week_start, week_start + timedelta(days=6)))
+        
+        week_columns = []
+        for i, week_start, week_end in weeks:
+            in_week = and_(Session.created_at >= week_start, Session.created_at <= week_end)
+            week_columns.extend([
+                func.coalesce(func.sum(case((in_week, 1), else_=0)), 0).label(f'total_{i}'),
+                func.coalesce(func.sum(case((and_(in_week, Attendance.is_present == True), 1), else_=0)), 0).label(f'present_{i}')
+            ])
+        week_counts = db.query(*week_columns).select_from(Attendance).join(
+            Session, Attendance.session_id == Session.id
+        ).filter(
+            Session.created_at >= weeks[0][1],
+            Session.created_at <= weeks[-1][2]
+        ).one()._mapping
+        
+        attendance_data = []
+        for i, week_start, week_end in weeks:
+            total_attendances = week_counts[f'total_{i}']
+            attendance_rate = (week_counts[f'present_{i}'] / total_attendances * 100) if total_attendances > 0 else 0
             
             attendance_data.append(AttendanceWeekData(
                 week=f"Tuần {7-i}",
@@ -525,11 +552,15 @@ async def get_staff_dashboard(db: Session = Depends(get_db)):
             ))
         
         # 3. Homework Status
-        total_homeworks = db.query(Homework).count()
+        homework_counts = dict(db.query(
+            Homework.status,
+            func.count(Homework.id)
+        ).group_by(Homework.status).all())
+        total_homeworks = sum(homework_counts.values())
         if total_homeworks > 0:
-            passed_count = db.query(Homework).filter(Homework.status == HomeworkStatus.PASSED).count()
-            pending_count = db.query(Homework).filter(Homework.status == HomeworkStatus.PENDING).count()
-            failed_count = db.query(Homework).filter(Homework.status == HomeworkStatus.FAILED).count()
+            passed_count = homework_counts.get(HomeworkStatus.PASSED, 0)
+            pending_count = homework_counts.get(HomeworkStatus.PENDING, 0)
+            failed_count = homework_counts.get(HomeworkStatus.FAILED, 0)
             
             homework_status = [
                 HomeworkStatusData(
@@ -558,21 +589,45 @@ async def get_staff_dashboard(db: Session = Depends(get_db)):
                 HomeworkStatusData(name="Trễ hạn", value=0, color="#EF4444", percentage=0)
             ]
         
+        # Số học sinh và số buổi của mỗi lớp được tính sẵn (GROUP BY class_id)
+        # rồi join vào danh sách lớp, thay cho các truy vấn đếm theo từng lớp
+        student_counts = select(
+            Enrollment.class_id,
+            func.count(Enrollment.id).label('students')
+        ).where(
+            Enrollment.status == "active"
+        ).group_by(Enrollment.class_id).subquery()
+        
+        session_counts = select(
+            Session.class_id,
+            func.count(Session.id).label('total_sessions'),
+            func.coalesce(func.sum(case((Session.created_at <= datetime.now(), 1), else_=0)), 0).label('completed_sessions')
+        ).group_by(Session.class_id).subquery()
+        
+        def classes_with_counts():
+            return db.query(
+                Class,
+                func.coalesce(student_counts.c.students, 0),
+                func.coalesce(session_counts.c.total_sessions, 0),
+                func.coalesce(session_counts.c.completed_sessions, 0)
+            ).outerjoin(
+                student_counts, student_counts.c.class_id == Class.id
+            ).outerjoin(
+                session_counts, session_counts.c.class_id == Class.id
+            )
+        
         # 4. Upcoming Classes (starting within next 30 days)
         future_date = today + timedelta(days=30)
-        upcoming_classes_query = db.query(Class).join(User, Class.teacher_id == User.id).filter(
+        upcoming_classes_query = classes_with_counts().join(User, Class.teacher_id == User.id).options(
+            contains_eager(Class.teacher)
+        ).filter(
             Class.status == ClassStatus.ACTIVE,
             Class.start_date >= today,
             Class.start_date <= future_date
         ).order_by(Class.start_date).limit(10)
         
         upcoming_classes = []
-        for cls in upcoming_classes_query:
-            student_count = db.query(Enrollment).filter(
-                Enrollment.class_id == cls.id,
-                Enrollment.status == "active"
-            ).count()
-            
+        for cls, student_count, _, _ in upcoming_classes_query:
             upcoming_classes.append(UpcomingClass(
                 className=cls.class_name,
                 startDate=cls.start_date.strftime("%Y-%m-%d") if cls.start_date else "",
@@ -582,26 +637,17 @@ async def get_staff_dashboard(db: Session = Depends(get_db)):
             ))
         
         # 5. Ending Classes (ending within next 30 days)
-        ending_classes_query = db.query(Class).join(User, Class.teacher_id == User.id).filter(
+        ending_classes_query = classes_with_counts().join(User, Class.teacher_id == User.id).options(
+            contains_eager(Class.teacher)
+        ).filter(
             Class.status == ClassStatus.ACTIVE,
             Class.end_date >= today,
             Class.end_date <= future_date
         ).order_by(Class.end_date).limit(10)
         
         ending_classes = []
-        for cls in ending_classes_query:
-            student_count = db.query(Enrollment).filter(
-                Enrollment.class_id == cls.id,
-                Enrollment.status == "active"
-            ).count()
-            
+        for cls, student_count, total_sessions, completed_sessions in ending_classes_query:
             # Calculate progress based on sessions completed
-            total_sessions = db.query(Session).filter(Session.class_id == cls.id).count()
-            completed_sessions = db.query(Session).filter(
-                Session.class_id == cls.id,
-                Session.created_at <= datetime.now()
-            ).count()
-            
             progress = (completed_sessions / total_sessions * 100) if total_sessions > 0 else 0
             
             ending_classes.append(EndingClass(
@@ -614,21 +660,10 @@ async def get_staff_dashboard(db: Session = Depends(get_db)):
             ))
         
         # 6. Class Progress (all active classes)
-        class_progress_query = db.query(Class).filter(Class.status == ClassStatus.ACTIVE).limit(10)
+        class_progress_query = classes_with_counts().filter(Class.status == ClassStatus.ACTIVE).limit(10)
         
         class_progress = []
-        for cls in class_progress_query:
-            student_count = db.query(Enrollment).filter(
-                Enrollment.class_id == cls.id,
-                Enrollment.status == "active"
-            ).count()
-            
-            total_sessions = db.query(Session).filter(Session.class_id == cls.id).count()
-            completed_sessions = db.query(Session).filter(
-                Session.class_id == cls.id,
-                Session.created_at <= datetime.now()
-            ).count()
-            
+        for cls, student_count, total_sessions, completed_sessions in class_progress_query:
             progress = (completed_sessions / total_sessions * 100) if total_sessions > 0 else 0
             
             class_progress.append(ClassProgress(
@@ -1,11 +1,17 @@
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
-from ..database import get_db
-from ..dependencies import get_current_student_user
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy import and_, case, desc, func
+from .. import dashboard_cache
+from ..database import get_async_db, get_db
+from ..dependencies import get_current_student_user, get_page_params, conditional_get, classroom_fieldset
 from ..models.user import User
+from ..utils.database import month_start
+from ..utils.fieldsets import Fieldset
+from ..utils.pagination import PageParams, set_page_headers
+from ..utils.responses import json_response
 from ..models.enrollment import Enrollment as EnrollmentModel
 from ..models.exam import Exam as ExamModel
 from ..services import user as user_service
@@ -24,8 +30,13 @@ from datetime import datetime, timedelta
 router = APIRouter()
 
 @router.get("/dashboard/", response_model=StudentDashboardResponse)
-async def get_student_dashboard(current_student: User = Depends(get_current_student_user), db: Session = Depends(get_db)):
-    student_id = current_student.id
+async def get_student_dashboard(current_student: User = Depends(get_current_student_user), db: AsyncSession = Depends(get_async_db)):
+    # Code ORM đồng bộ chạy qua run_sync: I/O được await trên event loop
+    return await dashboard_cache.get_or_build(
+        db, "student", _build_student_dashboard, current_student.id, principal=current_student.id
+    )
+
+def _build_student_dashboard(db: Session, student_id: UUID) -> StudentDashboardResponse:
     try:
         # Get student info
         student = db.query(User).filter(
@@ -44,33 +55,54 @@ async def get_student_dashboard(current_student: User = Depends(get_current_stud
         )
         
         # 2. Enrolled Classes Count
-        enrolled_classes = db.query(Enrollment).filter(
+        enrollments = db.query(Enrollment).options(
+            joinedload(Enrollment.classroom)
+        ).filter(
             Enrollment.student_id == student_id,
-        ).count()
+        ).all()
+        enrolled_classes = len(enrollments)
+        active_enrollments = [e for e in enrollments if e.status == "active"]
         
         # 3. Personal Attendance Rate
-        total_sessions_attended = db.query(Attendance).join(SessionModel).join(Class).join(Enrollment).filter(
-            Enrollment.student_id == student_id,
-            Enrollment.status == "active"
-        ).count()
-
-        present_sessions = db.query(Attendance).join(SessionModel).join(Class).join(Enrollment).filter(
-            Enrollment.student_id == student_id,
-            Enrollment.status == "active",
-            Attendance.is_present == True
-        ).count()
+        # Một truy vấn GROUP BY tháng: tổng theo tháng cho monthlyProgress,
+        # cộng các tháng (chỉ enrollment active) cho personalAttendance
+        is_present = case((Attendance.is_present == True, 1), else_=0)
+        is_active = case((Enrollment.status == "active", 1), else_=0)
+        session_month = month_start(SessionModel.created_at)
+        attendance_rows = db.query(
+            session_month.label('month'),
+            func.count(Attendance.id).label('total'),
+            func.coalesce(func.sum(is_present), 0).label('present'),
+            func.coalesce(func.sum(is_active), 0).label('active_total'),
+            func.coalesce(func.sum(is_present * is_active), 0).label('active_present')
+        ).select_from(Attendance).join(
+            SessionModel, Attendance.session_id == SessionModel.id
+        ).join(
+            Enrollment, Enrollment.class_id == SessionModel.class_id
+        ).filter(
+            Enrollment.student_id == student_id
+        ).group_by(session_month).all()
         
+        total_sessions_attended = sum(row.active_total for row in attendance_rows)
+        present_sessions = sum(row.active_present for row in attendance_rows)
         personal_attendance = (present_sessions / total_sessions_attended * 100) if total_sessions_attended > 0 else 0
         
         # 4. Homework Statistics
-        total_homework = db.query(Homework).filter(
+        # Bài tập của học sinh theo (lớp, tháng), dùng cho courseProgress, studyReminders và monthlyProgress
+        homework_rows = db.query(
+            SessionModel.class_id,
+            session_month.label('month'),
+            func.count(Homework.id).label('total'),
+            func.coalesce(func.sum(case((Homework.status == HomeworkStatus.PASSED, 1), else_=0)), 0).label('passed'),
+            func.coalesce(func.sum(case((Homework.status == HomeworkStatus.PENDING, 1), else_=0)), 0).label('pending')
+        ).select_from(Homework).join(
+            SessionModel, Homework.session_id == SessionModel.id
+        ).filter(
             Homework.student_id == student_id
-        ).count()
+        ).group_by(SessionModel.class_id, session_month).all()
         
-        submitted_homework = db.query(Homework).filter(
-            Homework.student_id == student_id,
-            Homework.status == HomeworkStatus.PASSED
-        ).count()
+        total_homework = sum(row.total for row in homework_rows)
+        submitted_homework = sum(row.passed for row in homework_rows)
         
         # 5. Skill Scores (from latest scores)
         latest_scores = db.query(Score).filter(
@@ -81,7 +113,7 @@ async def get_student_dashboard(current_student: User = Depends(get_current_stud
         enrolled_class_ids = db.query(Enrollment.class_id).filter(
             Enrollment.student_id == student_id,
             Enrollment.status == "active"
-        ).subquery()
+        ).scalar_subquery()
         
         class_avg_scores = db.query(
             func.avg(Score.listening).label('avg_listening'),
@@ -133,13 +165,16 @@ async def get_student_dashboard(current_student: User = Depends(get_current_stud
         
         # 6. Upcoming Exams
         upcoming_exams = []
-        exams_query = db.query(Exam).join(Class).join(Enrollment).filter(
+        now = datetime.now()
+        exams = db.query(Exam).join(Class).join(Enrollment).options(
+            contains_eager(Exam.classroom)
+        ).filter(
             Enrollment.student_id == student_id,
             Enrollment.status == "active",
-            Exam.start_time >= datetime.now()
-        ).order_by(Exam.start_time).limit(5)
+            Exam.start_time >= now
+        ).order_by(Exam.start_time).limit(5).all()
         
-        for exam in exams_query:
+        for exam in exams:
             upcoming_exams.append(UpcomingExam(
                 examName=exam.exam_name or "Kiểm tra",
                 date=exam.start_time.strftime("%Y-%m-%d"),
@@ -161,12 +196,14 @@ async def get_student_dashboard(current_student: User = Depends(get_current_stud
         }
         
         weekly_schedule = []
-        schedules_query = db.query(Schedule).join(Class).join(Enrollment).join(User, Class.teacher_id == User.id).filter(
+        schedules = db.query(Schedule).join(Class).join(Enrollment).join(User, Class.teacher_id == User.id).options(
+            contains_eager(Schedule.classroom).contains_eager(Class.teacher)
+        ).filter(
             Enrollment.student_id == student_id,
             Enrollment.status == "active"
-        ).order_by(Schedule.weekday)
+        ).order_by(Schedule.weekday).all()
         
-        for schedule in schedules_query:
+        for schedule in schedules:
             weekly_schedule.append(WeeklySchedule(
                 day=weekdays_map.get(schedule.weekday.value, schedule.weekday.value),
                 time=f"{schedule.start_time.strftime('%H:%M')}-{schedule.end_time.strftime('%H:%M')}",
@@ -176,37 +213,35 @@ async def get_student_dashboard(current_student: User = Depends(get_current_stud
             ))
         
         # 8. Course Progress
-        course_progress = []
-        enrollments_query = db.query(Enrollment).join(Class).filter(
-            Enrollment.student_id == student_id,
-            Enrollment.status == "active"
-        )
-        
-        for enrollment in enrollments_query:
-            total_sessions = db.query(SessionModel).filter(
-                SessionModel.class_id == enrollment.class_id
-            ).count()
-
-            attended_sessions = db.query(Attendance).join(SessionModel).filter(
-                SessionModel.class_id == enrollment.class_id,
+        # Số buổi của lớp và số buổi học sinh có mặt, GROUP BY class_id
+        session_counts = {
+            class_id: (total_sessions, attended_sessions)
+            for class_id, total_sessions, attended_sessions in db.query(
+                SessionModel.class_id,
+                func.count(func.distinct(SessionModel.id)),
+                func.count(Attendance.id)
+            ).outerjoin(Attendance, and_(
+                Attendance.session_id == SessionModel.id,
                 Attendance.student_id == student_id,
                 Attendance.is_present == True
-            ).count()
-            
+            )).filter(
+                SessionModel.class_id.in_([e.class_id for e in active_enrollments])
+            ).group_by(SessionModel.class_id).all()
+        }
+        
+        class_homework = {}
+        for row in homework_rows:
+            counts = class_homework.setdefault(row.class_id, [0, 0])
+            counts[0] += row.total
+            counts[1] += row.passed
+        
+        course_progress = []
+        for enrollment in active_enrollments:
+            total_sessions, attended_sessions = session_counts.get(enrollment.class_id, (0, 0))
             progress = (attended_sessions / total_sessions * 100) if total_sessions > 0 else 0
             
             # Calculate completion rate based on homework
-            class_homework_count = db.query(Homework).join(SessionModel).filter(
-                SessionModel.class_id == enrollment.class_id,
-                Homework.student_id == student_id
-            ).count()
-
-            completed_homework = db.query(Homework).join(SessionModel).filter(
-                SessionModel.class_id == enrollment.class_id,
-                Homework.student_id == student_id,
-                Homework.status == HomeworkStatus.PASSED
-            ).count()
-            
+            class_homework_count, completed_homework = class_homework.get(enrollment.class_id, (0, 0))
             completion_rate = (completed_homework / class_homework_count * 100) if class_homework_count > 0 else 0
             
             course_progress.append(CourseProgress(
@@ -221,29 +256,21 @@ async def get_student_dashboard(current_student: User = Depends(get_current_stud
         study_reminders = []
         
         # Homework reminders
-        pending_homework_count = db.query(Homework).filter(
-            Homework.student_id == student_id,
-            Homework.status == HomeworkStatus.PENDING
-        ).count()
+        pending_homework_count = sum(row.pending for row in homework_rows)
         
         if pending_homework_count > 0:
             study_reminders.append(StudyReminder(
                 type="homework",
                 message=f"Bạn còn {pending_homework_count} bài tập chưa nộp",
                 priority="high" if pending_homework_count > 3 else "medium",
-                dueDate=datetime.now().strftime("%Y-%m-%d")
+                dueDate=now.strftime("%Y-%m-%d")
             ))
         
-        # Exam reminders (exams in next 7 days)
-        upcoming_exam_week = db.query(Exam).join(Class).join(Enrollment).filter(
-            Enrollment.student_id == student_id,
-            Enrollment.status == "active",
-            Exam.start_time >= datetime.now(),
-            Exam.start_time <= datetime.now() + timedelta(days=7)
-        ).first()
+        # Exam reminders (exams in next 7 days): bài kiểm tra sắp tới gần nhất đã có trong upcoming exams
+        upcoming_exam_week = exams[0] if exams and exams[0].start_time <= now + timedelta(days=7) else None
         
         if upcoming_exam_week:
-            days_until_exam = (upcoming_exam_week.start_time.date() - datetime.now().date()).days
+            days_until_exam = (upcoming_exam_week.start_time.date() - now.date()).days
             study_reminders.append(StudyReminder(
                 type="exam",
                 message=f"Kiểm tra sẽ diễn ra trong {days_until_exam} ngày nữa",
@@ -252,63 +279,37 @@ async def get_student_dashboard(current_student: User = Depends(get_current_stud
             ))
         
         # Attendance reminder for today's classes
-        today_weekday = calendar.day_name[datetime.now().weekday()].lower()
-        today_schedules = db.query(Schedule).join(Class).join(Enrollment).filter(
-            Enrollment.student_id == student_id,
-            Enrollment.status == "active",
-            Schedule.weekday == today_weekday
-        ).first()
+        today_weekday = calendar.day_name[now.weekday()].lower()
+        today_schedules = next((s for s in schedules if s.weekday.value == today_weekday), None)
         
         if today_schedules:
             study_reminders.append(StudyReminder(
                 type="attendance",
                 message=f"Hôm nay bạn có lịch học lúc {today_schedules.start_time.strftime('%H:%M')}",
                 priority="low",
-                dueDate=datetime.now().strftime("%Y-%m-%d")
+                dueDate=now.strftime("%Y-%m-%d")
             ))
         
         # 10. Monthly Progress (last 4 months)
+        month_attendance_counts = {row.month: (row.total, row.present) for row in attendance_rows}
+        month_homework_counts = {}
+        for row in homework_rows:
+            counts = month_homework_counts.setdefault(row.month, [0, 0])
+            counts[0] += row.total
+            counts[1] += row.passed
+        
         monthly_progress = []
-        current_date = datetime.now()
         
         for i in range(4, 0, -1):
-            month_date = current_date - timedelta(days=30*i)
-            month_start = month_date.replace(day=1)
-            if month_date.month == 12:
-                month_end = month_date.replace(year=month_date.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                month_end = month_date.replace(month=month_date.month + 1, day=1) - timedelta(days=1)
+            month_date = now - timedelta(days=30*i)
+            month = month_date.date().replace(day=1)
             
             # Monthly attendance
-            month_sessions = db.query(Attendance).join(SessionModel).join(Class).join(Enrollment).filter(
-                Enrollment.student_id == student_id,
-                SessionModel.created_at >= month_start,
-                SessionModel.created_at <= month_end
-            ).count()
-            
-            month_present = db.query(Attendance).join(SessionModel).join(Class).join(Enrollment).filter(
-                Enrollment.student_id == student_id,
-                SessionModel.created_at >= month_start,
-                SessionModel.created_at <= month_end,
-                Attendance.is_present == True
-            ).count()
-            
+            month_sessions, month_present = month_attendance_counts.get(month, (0, 0))
             month_attendance = (month_present / month_sessions * 100) if month_sessions > 0 else 0
             
             # Monthly homework
-            month_homework = db.query(Homework).join(SessionModel).filter(
-                Homework.student_id == student_id,
-                SessionModel.created_at >= month_start,
-                SessionModel.created_at <= month_end
-            ).count()
-            
-            month_completed = db.query(Homework).join(SessionModel).filter(
-                Homework.student_id == student_id,
-                SessionModel.created_at >= month_start,
-                SessionModel.created_at <= month_end,
-                Homework.status == HomeworkStatus.PASSED
-            ).count()
-            
+            month_homework, month_completed = month_homework_counts.get(month, (0, 0))
             month_homework_rate = (month_completed / month_homework * 100) if month_homework > 0 else 0
             
             # Average score for the month (simplified)
@@ -378,46 +379,61 @@ async def update_student_profile(
     current_user: User = Depends(get_current_student_user),
     db: Session = Depends(get_db)
 ):
-    updated_user = user_service.update_user(db, current_user.id, profile_data)
+    updated_user = await user_service.update_user(db, current_user.id, profile_data)
     return updated_user
 
-@router.get("/classes", response_model=List[ClassroomResponse])
+@router.get(
+    "/classes",
+    response_model=List[ClassroomResponse],
+    dependencies=[conditional_get(get_current_student_user, *classroom_service.RESPONSE_TABLES)]
+)
 async def get_student_classes(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    fieldset: Fieldset = classroom_fieldset,
     status: Optional[str] = Query(None, description="Filter by classroom status"),
     current_user: User = Depends(get_current_student_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    classrooms = classroom_service.get_classrooms_by_student(
+    classrooms = await classroom_service.get_classrooms_by_student_page(
         db, 
+        page,
         current_user.id, 
         status=status,
+        expand=fieldset.expand,
     )
-    return classrooms
+    set_page_headers(response, classrooms)
+    return json_response(classroom_service.dump_classrooms_json(classrooms.items, fieldset), response)
 
 @router.get("/classes/{classroom_id}", response_model=ClassroomResponse)
 async def get_student_classroom(
     classroom_id: UUID,
+    fieldset: Fieldset = classroom_fieldset,
     current_user: User = Depends(get_current_student_user),
     db: Session = Depends(get_db)
 ):
-    classroom = classroom_service.get_classroom(db, classroom_id)
+    classroom = classroom_service.get_classroom_detail(db, classroom_id, fieldset.expand)
     if not classroom:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lớp học không tồn tại hoặc không thuộc quyền truy cập"
         )
-    return classroom
+    return json_response(classroom_service.dump_classroom_json(classroom, fieldset))
 
 @router.get("/schedule")
 async def get_student_schedule(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
     current_user: User = Depends(get_current_student_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    schedules = schedule_service.get_schedules_by_student(
+    schedules = await schedule_service.get_schedules_by_student_page(
         db, 
+        page,
         current_user.id, 
     )
-    return schedules
+    set_page_headers(response, schedules)
+    return schedules.items
 
 @router.get("/classes/{classroom_id}/schedules", response_model=List[ScheduleResponse])
 async def get_classroom_schedules(
@@ -1,15 +1,21 @@
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import update, func, desc
+from sqlalchemy import case, update, func, desc
 from datetime import datetime, timedelta
-from ..database import get_db
-from ..dependencies import get_current_teacher_user
+from .. import dashboard_cache
+from ..database import get_async_db, get_db
+from ..dependencies import get_current_teacher_user, get_page_params, classroom_fieldset
 from ..models.user import User
+from ..utils.fieldsets import Fieldset
+from ..utils.pagination import PageParams, set_page_headers
+from ..utils.responses import json_response
 from ..services import classroom as classroom_service
 from ..services import schedule as schedule_service
-from ..schemas.enrollment import ScoreBase
+from ..services import score as score_service
+from ..schemas.enrollment import ScoreBase, ScoreBulkUpdate, ScoreEntryResult
 from ..schemas.classroom import ClassroomResponse
 from ..models.score import Score as ScoreModel
 from ..schemas.teacher import *
@@ -19,8 +25,11 @@ from ..models.attendance import HomeworkStatus
 router = APIRouter()
 
 @router.get("/dashboard/", response_model=TeacherDashboardResponse)
-async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user), db: Session = Depends(get_db)):
-    teacher_id = teacher.id
+async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user), db: AsyncSession = Depends(get_async_db)):
+    # Code ORM đồng bộ chạy qua run_sync: I/O được await trên event loop
+    return await dashboard_cache.get_or_build(db, "teacher", _build_teacher_dashboard, teacher.id, principal=teacher.id)
+
+def _build_teacher_dashboard(db: Session, teacher_id: UUID) -> TeacherDashboardResponse:
     try:
         # Get teacher info
         teacher = db.query(User).filter(
@@ -45,15 +54,20 @@ async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user
             Class.teacher_id == teacher_id,
             Class.status == ClassStatus.ACTIVE
         ).all()
+        class_ids = [cls.id for cls in teacher_classes]
         
         active_classes = len(teacher_classes)
         
         # 3. Total Students
-        total_students = db.query(Enrollment).join(Class).filter(
-            Class.teacher_id == teacher_id,
-            Class.status == ClassStatus.ACTIVE,
+        # Số học sinh active theo từng lớp, dùng lại cho classData
+        student_counts = dict(db.query(
+            Enrollment.class_id,
+            func.count(Enrollment.id)
+        ).filter(
+            Enrollment.class_id.in_(class_ids),
             Enrollment.status == "active"
-        ).count()
+        ).group_by(Enrollment.class_id).all())
+        total_students = sum(student_counts.values())
         
         # 4. Weekly Schedules
         today = datetime.now().date()
@@ -68,6 +82,51 @@ async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user
         ).count()
         
         # 5. Class Data
+        # Mỗi chỉ số được tính cho tất cả các lớp bằng một truy vấn GROUP BY class_id
+        attendance_counts = {
+            class_id: (total, present)
+            for class_id, total, present in db.query(
+                SessionModel.class_id,
+                func.count(Attendance.id),
+                func.coalesce(func.sum(case((Attendance.is_present == True, 1), else_=0)), 0)
+            ).select_from(Attendance).join(
+                SessionModel, Attendance.session_id == SessionModel.id
+            ).filter(
+                SessionModel.class_id.in_(class_ids)
+            ).group_by(SessionModel.class_id).all()
+        }
+        
+        avg_scores = dict(db.query(
+            Enrollment.class_id,
+            func.avg(
+                (func.coalesce(Score.listening, 0) + 
+                 func.coalesce(Score.reading, 0) + 
+                 func.coalesce(Score.writing, 0) + 
+                 func.coalesce(Score.speaking, 0)) / 4
+            )
+        ).select_from(Score).join(
+            Enrollment, Score.enrollment_id == Enrollment.id
+        ).filter(
+            Enrollment.class_id.in_(class_ids)
+        ).group_by(Enrollment.class_id).all())
+        
+        # Số bài tập theo (lớp, trạng thái), dùng cho cả classData và homeworkStats
+        homework_counts = {}
+        for class_id, homework_status, count in db.query(
+            SessionModel.class_id,
+            Homework.status,
+            func.count(Homework.id)
+        ).select_from(Homework).join(
+            SessionModel, Homework.session_id == SessionModel.id
+        ).filter(
+            SessionModel.class_id.in_(class_ids)
+        ).group_by(SessionModel.class_id, Homework.status).all():
+            homework_counts.setdefault(class_id, {})[homework_status] = count
+        
+        class_schedules = {}
+        for s in db.query(Schedule).filter(Schedule.class_id.in_(class_ids)).all():
+            class_schedules.setdefault(s.class_id, []).append(s)
+        
         class_data = []
         weekday_names = {
             "monday": "T2", "tuesday": "T3", "wednesday": "T4",
@@ -75,48 +134,25 @@ async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user
         }
         
         for cls in teacher_classes:
-            # Student count
-            student_count = db.query(Enrollment).filter(
-                Enrollment.class_id == cls.id,
-                Enrollment.status == "active"
-            ).count()
+            student_count = student_counts.get(cls.id, 0)
             
             # Attendance rate
-            total_attendances = db.query(Attendance).join(SessionModel).filter(
-                SessionModel.class_id == cls.id
-            ).count()
-            present_attendances = db.query(Attendance).join(SessionModel).filter(
-                SessionModel.class_id == cls.id,
-                Attendance.is_present == True
-            ).count()
+            total_attendances, present_attendances = attendance_counts.get(cls.id, (0, 0))
             attendance_rate = (present_attendances / total_attendances * 100) if total_attendances > 0 else 0
             
             # Average score
-            avg_score_query = db.query(func.avg(
-                (func.coalesce(Score.listening, 0) + 
-                 func.coalesce(Score.reading, 0) + 
-                 func.coalesce(Score.writing, 0) + 
-                 func.coalesce(Score.speaking, 0)) / 4
-            )).join(Enrollment, Score.enrollment_id == Enrollment.id).filter(
-                Enrollment.class_id == cls.id
-            ).scalar()
-            avg_score = avg_score_query or 0
+            avg_score = avg_scores.get(cls.id) or 0
             
             # Homework submission rate
-            total_homework = db.query(Homework).join(SessionModel).filter(
-                SessionModel.class_id == cls.id
-            ).count()
-            submitted_homework = db.query(Homework).join(SessionModel).filter(
-                SessionModel.class_id == cls.id,
-                Homework.status.in_([HomeworkStatus.PASSED, HomeworkStatus.FAILED])
-            ).count()
+            class_homework = homework_counts.get(cls.id, {})
+            total_homework = sum(class_homework.values())
+            submitted_homework = class_homework.get(HomeworkStatus.PASSED, 0) + class_homework.get(HomeworkStatus.FAILED, 0)
             homework_rate = (submitted_homework / total_homework * 100) if total_homework > 0 else 0
             
             # Schedule
-            schedules = db.query(Schedule).filter(Schedule.class_id == cls.id).all()
             schedule_text = ", ".join([
                 f"{weekday_names.get(s.weekday.value, s.weekday.value)}: {s.start_time.strftime('%H:%M')}-{s.end_time.strftime('%H:%M')}"
-                for s in schedules
+                for s in class_schedules.get(cls.id, [])
             ])
             
             class_data.append(ClassData(
@@ -195,20 +231,10 @@ async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user
         # 8. Homework Statistics
         homework_stats = []
         for cls in teacher_classes:
-            pending_count = db.query(Homework).join(SessionModel).filter(
-                SessionModel.class_id == cls.id,
-                Homework.status == HomeworkStatus.PENDING
-            ).count()
-            
-            passed_count = db.query(Homework).join(SessionModel).filter(
-                SessionModel.class_id == cls.id,
-                Homework.status == HomeworkStatus.PASSED
-            ).count()
-            
-            failed_count = db.query(Homework).join(SessionModel).filter(
-                SessionModel.class_id == cls.id,
-                Homework.status == HomeworkStatus.FAILED
-            ).count()
+            class_homework = homework_counts.get(cls.id, {})
+            pending_count = class_homework.get(HomeworkStatus.PENDING, 0)
+            passed_count = class_homework.get(HomeworkStatus.PASSED, 0)
+            failed_count = class_homework.get(HomeworkStatus.FAILED, 0)
             
             total_count = pending_count + passed_count + failed_count
             
@@ -239,77 +265,106 @@ async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user
             ))
         
         # 10. Absent Students (>30% absence rate)
-        absent_students = []
-        for cls in teacher_classes:
-            students_query = db.query(User, func.count(SessionModel.id).label('total_sessions')).join(
-                Enrollment, User.id == Enrollment.student_id
-            ).join(
-                Class, Enrollment.class_id == Class.id
-            ).join(
-                SessionModel, Class.id == SessionModel.class_id
+        # Tổng số buổi của lớp cho mỗi học sinh đang học (GROUP BY class_id, student_id)
+        enrolled_students = db.query(
+            Enrollment.class_id,
+            User.id,
+            User.name,
+            User.phone_number,
+            func.count(SessionModel.id).label('total_sessions')
+        ).select_from(Enrollment).join(
+            User, Enrollment.student_id == User.id
+        ).join(
+            SessionModel, Enrollment.class_id == SessionModel.class_id
+        ).filter(
+            Enrollment.class_id.in_(class_ids),
+            Enrollment.status == "active"
+        ).group_by(Enrollment.class_id, User.id, User.name, User.phone_number).all()
+        
+        absent_counts = {
+            (class_id, student_id): count
+            for class_id, student_id, count in db.query(
+                SessionModel.class_id,
+                Attendance.student_id,
+                func.count(Attendance.id)
+            ).select_from(Attendance).join(
+                SessionModel, Attendance.session_id == SessionModel.id
             ).filter(
-                Class.id == cls.id,
-                Enrollment.status == "active"
-            ).group_by(User.id).all()
+                SessionModel.class_id.in_(class_ids),
+                Attendance.is_present == False
+            ).group_by(SessionModel.class_id, Attendance.student_id).all()
+        }
+        
+        absent_candidates = []
+        for class_id, student_id, student_name, phone_number, total_sessions in enrolled_students:
+            absent_count = absent_counts.get((class_id, student_id), 0)
+            absent_rate = (absent_count / total_sessions * 100)
+            if absent_rate > 30:  # Filter students with >30% absence
+                absent_candidates.append((class_id, student_id, student_name, phone_number, total_sessions, absent_count, absent_rate))
+        
+        # Buổi có mặt gần nhất (ở bất kỳ lớp nào) của các học sinh vắng nhiều
+        absent_student_ids = {candidate[1] for candidate in absent_candidates}
+        last_attended_dates = dict(db.query(
+            Attendance.student_id,
+            func.max(SessionModel.created_at)
+        ).select_from(Attendance).join(
+            SessionModel, Attendance.session_id == SessionModel.id
+        ).filter(
+            Attendance.student_id.in_(absent_student_ids),
+            Attendance.is_present == True
+        ).group_by(Attendance.student_id).all())
+        
+        class_names = {cls.id: cls.class_name for cls in teacher_classes}
+        class_order = {cls.id: index for index, cls in enumerate(teacher_classes)}
+        absent_candidates.sort(key=lambda candidate: class_order[candidate[0]])
+        
+        absent_students = []
+        for class_id, student_id, student_name, phone_number, total_sessions, absent_count, absent_rate in absent_candidates:
+            last_attended = last_attended_dates.get(student_id)
+            last_attended_date = last_attended.strftime("%Y-%m-%d") if last_attended else "Chưa từng học"
             
-            for student, total_sessions in students_query:
-                if total_sessions == 0:
-                    continue
-                    
-                absent_count = db.query(Attendance).join(SessionModel).filter(
-                    SessionModel.class_id == cls.id,
-                    Attendance.student_id == student.id,
-                    Attendance.is_present == False
-                ).count()
-                
-                absent_rate = (absent_count / total_sessions * 100)
-                
-                if absent_rate > 30:  # Filter students with >30% absence
-                    # Get last attended date
-                    last_attended = db.query(SessionModel.created_at).join(Attendance).filter(
-                        Attendance.student_id == student.id,
-                        Attendance.is_present == True
-                    ).order_by(desc(SessionModel.created_at)).first()
-                    
-                    last_attended_date = last_attended[0].strftime("%Y-%m-%d") if last_attended else "Chưa từng học"
-                    
-                    absent_students.append(AbsentStudent(
-                        name=student.name,
-                        className=cls.class_name,
-                        absentCount=absent_count,
-                        totalSessions=total_sessions,
-                        absentRate=round(absent_rate, 1),
-                        phone=student.phone_number or "Chưa cập nhật",
-                        lastAttended=last_attended_date
-                    ))
+            absent_students.append(AbsentStudent(
+                name=student_name,
+                className=class_names[class_id],
+                absentCount=absent_count,
+                totalSessions=total_sessions,
+                absentRate=round(absent_rate, 1),
+                phone=phone_number or "Chưa cập nhật",
+                lastAttended=last_attended_date
+            ))
         
         # Sort by absence rate (highest first)
         absent_students.sort(key=lambda x: x.absentRate, reverse=True)
         absent_students = absent_students[:10]  # Limit to top 10
         
         # 11. Weekly Stats
-        homework_graded = db.query(Homework).join(SessionModel).join(Class).filter(
-            Class.teacher_id == teacher_id,
-            Homework.status.in_([HomeworkStatus.PASSED, HomeworkStatus.FAILED]),
-            SessionModel.created_at >= start_of_week
-        ).count()
-        
-        new_assignments = db.query(Homework).join(SessionModel).join(Class).filter(
+        homework_graded, new_assignments = db.query(
+            func.coalesce(func.sum(case((Homework.status.in_([HomeworkStatus.PASSED, HomeworkStatus.FAILED]), 1), else_=0)), 0),
+            func.count(Homework.id)
+        ).select_from(Homework).join(
+            SessionModel, Homework.session_id == SessionModel.id
+        ).join(
+            Class, SessionModel.class_id == Class.id
+        ).filter(
             Class.teacher_id == teacher_id,
             SessionModel.created_at >= start_of_week
-        ).count()
+        ).one()
         
         # Calculate average attendance for this week
-        week_attendances = db.query(Attendance).join(SessionModel).join(Class).filter(
+        week_total, week_present = db.query(
+            func.count(Attendance.id),
+            func.coalesce(func.sum(case((Attendance.is_present == True, 1), else_=0)), 0)
+        ).select_from(Attendance).join(
+            SessionModel, Attendance.session_id == SessionModel.id
+        ).join(
+            Class, SessionModel.class_id == Class.id
+        ).filter(
             Class.teacher_id == teacher_id,
             SessionModel.created_at >= start_of_week,
             SessionModel.created_at <= end_of_week
-        ).all()
+        ).one()
         
-        week_attendance_rate = 0
-        if week_attendances:
-            present_count = sum(1 for a in week_attendances if a.is_present)
-            week_attendance_rate = (present_count / len(week_attendances) * 100)
+        week_attendance_rate = (week_present / week_total * 100) if week_total else 0
         
         weekly_stats = WeeklyStats(
             totalSessions=weekly_schedules,
@@ -341,20 +396,27 @@ async def get_teacher_dashboard(teacher: User = Depends(get_current_teacher_user
 
 @router.get("/classes", response_model=List[ClassroomResponse])
 async def get_teacher_classes(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    fieldset: Fieldset = classroom_fieldset,
     status: Optional[str] = Query(None, description="Filter by classroom status"),
     current_user: User = Depends(get_current_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    classrooms = classroom_service.get_classrooms_with_filters(
+    classrooms = await classroom_service.get_classrooms_page(
         db,
+        page,
         teacher_id=current_user.id,
         status=status,
+        expand=fieldset.expand,
     )
-    return classrooms
+    set_page_headers(response, classrooms)
+    return json_response(classroom_service.dump_classrooms_json(classrooms.items, fieldset), response)
 
 @router.get("/classes/{classroom_id}", response_model=ClassroomResponse)
 async def get_teacher_classroom(
     classroom_id: str,
+    fieldset: Fieldset = classroom_fieldset,
     db: Session = Depends(get_db)
 ):
     try:
@@ -365,24 +427,40 @@ async def get_teacher_classroom(
             detail="classroom_id không hợp lệ"
         )
     
-    classroom = classroom_service.get_classroom_by_id(db, classroom_uuid)
+    classroom = classroom_service.get_classroom_detail(db, classroom_uuid, fieldset.expand)
     if not classroom:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lớp học không tồn tại hoặc không thuộc quyền quản lý"
         )
-    return classroom
+    return json_response(classroom_service.dump_classroom_json(classroom, fieldset))
 
 @router.get("/schedule")
 async def get_teaching_schedule(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
     current_user: User = Depends(get_current_teacher_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    schedules = schedule_service.get_schedules_with_filters(
+    schedules = await schedule_service.get_schedules_page(
         db,
+        page,
         teacher_id=current_user.id,
     )
-    return schedules
+    set_page_headers(response, schedules)
+    return schedules.items
+
+
+@router.put("/scores/", response_model=List[ScoreEntryResult])
+def update_scores(
+    score_data: ScoreBulkUpdate,
+    current_user: User = Depends(get_current_teacher_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Nhập điểm cho nhiều học sinh trong một request (theo score id hoặc exam_id + student_id)
+    """
+    return score_service.upsert_scores(db, score_data.scores)
 
 
 @router.put("/score/{score_id}/")
@@ -3,6 +3,11 @@ from . import course
 from . import classroom
 from . import enrollment
 from . import schedule
+from . import rollup
+from . import attendance
+from . import score
+from . import revision
+from . import export
 
 __all__ = [
     "user",
@@ -10,4 +15,9 @@ __all__ = [
     "classroom",
     "enrollment",
     "schedule",
+    "rollup",
+    "attendance",
+    "score",
+    "revision",
+    "export",
 ] 
\ No newline at end of file
@@ -0,0 +1,79 @@
+from typing import Dict, List, Tuple
+from uuid import uuid4
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from ..models.attendance import Attendance, Homework, HomeworkStatus, Session as SessionModel
+from ..schemas.attendance import SessionCreate
+from ..schemas.homework import HomeworkGrade
+
+# Giới hạn số dòng mỗi câu INSERT nhiều giá trị (SQLite giới hạn số tham số mỗi câu lệnh)
+INSERT_CHUNK_SIZE = 1000
+
+
+def _insert_rows(db: Session, model, rows: List[dict]) -> None:
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.execute(insert(model).values(rows[start:start + INSERT_CHUNK_SIZE]))
+
+def create_sessions(db: Session, sessions_data: List[SessionCreate]) -> List[Dict]:
+    """
+    Create sessions with one attendance and one pending homework row per student,
+    using multi-row INSERT statements in a single transaction.
+    Returns the created rows (with their ids) grouped by session, in request order.
+    """
+    sessions, attendances, homeworks = [], [], []
+    created = []
+    for data in sessions_data:
+        session_id = uuid4()
+        sessions.append({
+            "id": session_id,
+            "topic": data.topic,
+            "class_id": data.class_id,
+            "schedule_id": data.schedule_id,
+        })
+        session_attendances = [
+            {"id": uuid4(), "session_id": session_id, "student_id": a.student_id, "is_present": a.is_present}
+            for a in data.attendances
+        ]
+        session_homeworks = [
+            {"id": uuid4(), "session_id": session_id, "student_id": a.student_id, "status": HomeworkStatus.PENDING}
+            for a in data.attendances
+        ]
+        attendances.extend(session_attendances)
+        homeworks.extend(session_homeworks)
+        created.append({**sessions[-1], "attendances": session_attendances, "homeworks": session_homeworks})
+
+    try:
+        _insert_rows(db, SessionModel, sessions)
+        _insert_rows(db, Attendance, attendances)
+        _insert_rows(db, Homework, homeworks)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return created
+
+def grade_homeworks(db: Session, grades: List[HomeworkGrade]) -> List[Tuple[HomeworkGrade, bool]]:
+    """
+    Apply many (id, status, feedback) grades with one executemany UPDATE in a single transaction.
+    Returns (grade, updated) per distinct homework id; the last grade wins for repeated ids.
+    """
+    by_id = {grade.id: grade for grade in grades}
+    if not by_id:
+        return []
+
+    existing = set(db.execute(
+        select(Homework.id).where(Homework.id.in_(list(by_id)))
+    ).scalars())
+    rows = [
+        {"id": grade.id, "status": grade.status, "feedback": grade.feedback}
+        for homework_id, grade in by_id.items() if homework_id in existing
+    ]
+
+    try:
+        if rows:
+            db.execute(update(Homework), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return [(grade, homework_id in existing) for homework_id, grade in by_id.items()]
@@ -1,11 +1,15 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import delete
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, noload, selectinload
+from sqlalchemy import Select, delete, select
+from typing import Iterable, Optional, List
 from uuid import UUID
+from ..models.attendance import Session as SessionModel
 from ..models.classroom import Class
 from ..models.enrollment import Enrollment
 from ..models.user import User
 from ..schemas.classroom import ClassroomCreate, ClassroomUpdate
+from ..utils.pagination import Page, PageParams, paginate_async
+from . import rollup as rollup_crud
 
 def get_classroom(db: Session, classroom_id: UUID) -> Optional[Class]:
     """Get classroom by UUID"""
@@ -13,12 +17,83 @@ def get_classroom(db: Session, classroom_id: UUID) -> Optional[Class]:
         .options(joinedload(Class.course), joinedload(Class.teacher), joinedload(Class.schedules))\
         .filter(Class.id == classroom_id).first()
 
+def get_classroom_detail(db: Session, classroom_id: UUID, expand: Optional[Iterable[str]] = None) -> Optional[Class]:
+    """Get classroom by UUID with the given expansions loaded"""
+    stmt = select(Class).options(*classroom_load_options(expand)).where(Class.id == classroom_id)
+    return db.execute(stmt).scalars().first()
+
 def get_classrooms(db: Session) -> List[Class]:
     """Get classrooms"""
     return db.query(Class)\
         .options(joinedload(Class.course), joinedload(Class.teacher), joinedload(Class.schedules))\
         .order_by(Class.created_at.desc()).all()
 
+# Kế hoạch nạp cho từng quan hệ ClassroomResponse có thể expand: (nạp bằng selectin, bỏ qua).
+# Quan hệ không expand được noload để serialize không lazy-load (bắt buộc với AsyncSession)
+CLASSROOM_EXPANSIONS = {
+    "course": (selectinload(Class.course), noload(Class.course)),
+    "teacher": (selectinload(Class.teacher), noload(Class.teacher)),
+    "schedules": (selectinload(Class.schedules), noload(Class.schedules)),
+    "enrollments": (selectinload(Class.enrollments), noload(Class.enrollments)),
+    "enrollments.student": (
+        selectinload(Class.enrollments).selectinload(Enrollment.student),
+        selectinload(Class.enrollments).noload(Enrollment.student),
+    ),
+    "enrollments.score": (
+        selectinload(Class.enrollments).selectinload(Enrollment.score),
+        selectinload(Class.enrollments).noload(Enrollment.score),
+    ),
+    "sessions": (selectinload(Class.sessions), noload(Class.sessions)),
+    "sessions.attendances": (
+        selectinload(Class.sessions).selectinload(SessionModel.attendances),
+        selectinload(Class.sessions).noload(SessionModel.attendances),
+    ),
+    "sessions.homeworks": (
+        selectinload(Class.sessions).selectinload(SessionModel.homeworks),
+        selectinload(Class.sessions).noload(SessionModel.homeworks),
+    ),
+}
+
+def classroom_load_options(expand: Optional[Iterable[str]] = None) -> List:
+    """Loader options for the given expansions (None: every relationship ClassroomResponse serializes)"""
+    expand = CLASSROOM_EXPANSIONS.keys() if expand is None else set(expand)
+    options = []
+    for path, (load, skip) in CLASSROOM_EXPANSIONS.items():
+        parent = path.rpartition(".")[0]
+        if parent and parent not in expand:
+            continue
+        options.append(load if path in expand else skip)
+    return options
+
+def _classrooms_with_filters_statement(
+    course_id: Optional[UUID] = None,
+    teacher_id: Optional[UUID] = None,
+    status: Optional[str] = None,
+    expand: Optional[Iterable[str]] = None
+) -> Select:
+    stmt = select(Class).options(*classroom_load_options(expand))
+    if course_id:
+        stmt = stmt.where(Class.course_id == course_id)
+    if teacher_id:
+        stmt = stmt.where(Class.teacher_id == teacher_id)
+    if status:
+        stmt = stmt.where(Class.status == status)
+    return stmt.order_by(Class.created_at.desc())
+
+def _classrooms_by_student_statement(
+    student_id: UUID,
+    status: Optional[str] = None,
+    expand: Optional[Iterable[str]] = None
+) -> Select:
+    stmt = select(Class)\
+        .join(Enrollment, Class.id == Enrollment.class_id)\
+        .where(Enrollment.student_id == student_id)\
+        .options(*classroom_load_options(expand))
+    # Chỉ filter theo status khi status không phải None
+    if status is not None:
+        stmt = stmt.where(Class.status == status)
+    return stmt.order_by(Class.created_at.desc())
+
 def get_classrooms_with_filters(
     db: Session, 
     course_id: Optional[UUID] = None,
@@ -26,20 +101,20 @@ def get_classrooms_with_filters(
     status: Optional[str] = None
 ) -> List[Class]:
     """Get classrooms with optional filters"""
-    query = db.query(Class).options(
-        joinedload(Class.course), 
-        joinedload(Class.teacher),
-        joinedload(Class.schedules)
-    )
-    
-    if course_id:
-        query = query.filter(Class.course_id == course_id)
-    if teacher_id:
-        query = query.filter(Class.teacher_id == teacher_id)
-    if status:
-        query = query.filter(Class.status == status)
-    
-    return query.order_by(Class.created_at.desc()).all()
+    stmt = _classrooms_with_filters_statement(course_id, teacher_id, status)
+    return db.execute(stmt).scalars().unique().all()
+
+async def get_classrooms_page(
+    db: AsyncSession,
+    page: PageParams,
+    course_id: Optional[UUID] = None,
+    teacher_id: Optional[UUID] = None,
+    status: Optional[str] = None,
+    expand: Optional[Iterable[str]] = None
+) -> Page:
+    """Get a keyset page of classrooms with optional filters (async session)"""
+    stmt = _classrooms_with_filters_statement(course_id, teacher_id, status, expand)
+    return await paginate_async(db, stmt, Class, page)
 
 def get_all_classrooms(db: Session) -> List[Class]:
     """Get all classrooms without pagination"""
@@ -84,22 +159,19 @@ def get_classrooms_by_course(db: Session, course_id: UUID) -> List[Class]:
 
 def get_classrooms_by_student(db: Session, student_id: UUID, status: Optional[str] = None) -> List[Class]:
     """Get classrooms where student is enrolled"""
-    from sqlalchemy.orm import joinedload
-    
-    query = db.query(Class)\
-        .join(Enrollment, Class.id == Enrollment.class_id)\
-        .filter(Enrollment.student_id == student_id)\
-        .options(
-            joinedload(Class.course),
-            joinedload(Class.teacher),
-            joinedload(Class.schedules)
-        )
-    
-    # Chỉ filter theo status khi status không phải None
-    if status is not None:
-        query = query.filter(Class.status == status)
-    
-    return query.order_by(Class.created_at.desc()).all()
+    stmt = _classrooms_by_student_statement(student_id, status)
+    return db.execute(stmt).scalars().unique().all()
+
+async def get_classrooms_by_student_page(
+    db: AsyncSession,
+    page: PageParams,
+    student_id: UUID,
+    status: Optional[str] = None,
+    expand: Optional[Iterable[str]] = None
+) -> Page:
+    """Get a keyset page of classrooms where student is enrolled (async session)"""
+    stmt = _classrooms_by_student_statement(student_id, status, expand)
+    return await paginate_async(db, stmt, Class, page)
 
 def create_classroom(db: Session, classroom_data: ClassroomCreate) -> Class:
     """Create new classroom"""
@@ -125,6 +197,10 @@ def update_classroom(db: Session, classroom_id: UUID, classroom_update: Classroo
         return None
     
     update_data = classroom_update.model_dump(exclude_unset=True)
+    new_course_id = update_data.get("course_id")
+    if new_course_id and new_course_id != db_classroom.course_id:
+        rollup_crud.move_class_enrollments(db, classroom_id, new_course_id)
+
     for field, value in update_data.items():
         setattr(db_classroom, field, value)
     
@@ -134,6 +210,7 @@ def update_classroom(db: Session, classroom_id: UUID, classroom_update: Classroo
 
 def delete_classroom(db: Session, classroom_id: UUID) -> bool:
     """Delete classroom"""
+    rollup_crud.forget_enrollments(db, Enrollment.class_id == classroom_id)
     stmt = delete(Class).where(Class.id == classroom_id)
     db.execute(stmt)
     db.commit()
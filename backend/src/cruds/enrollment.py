@@ -1,10 +1,13 @@
+from collections import Counter
+from datetime import date
 from sqlalchemy.orm import Session
-from sqlalchemy import delete
-from typing import Optional, List
-from uuid import UUID
+from sqlalchemy import delete, insert, select
+from typing import Optional, List, Tuple
+from uuid import UUID, uuid4
 from ..models.enrollment import Enrollment
 from ..models.score import Score
 from ..schemas.enrollment import EnrollmentCreate, EnrollmentUpdate
+from . import rollup as rollup_crud
 
 def get_enrollment(db: Session, enrollment_id: UUID) -> Optional[Enrollment]:
     """Get enrollment by UUID"""
@@ -35,7 +38,6 @@ def get_enrollment_by_student_classroom(db: Session, student_id: UUID, class_id:
 
 def create_enrollment(db: Session, enrollment_data: EnrollmentCreate) -> Enrollment:
     """Create new enrollment"""
-    from datetime import date
     db_enrollment = Enrollment(
         student_id=enrollment_data.student_id,
         class_id=enrollment_data.class_id,
@@ -43,8 +45,9 @@ def create_enrollment(db: Session, enrollment_data: EnrollmentCreate) -> Enrollm
         status=enrollment_data.status
     )
     db.add(db_enrollment)
-    db.commit()
-    db.refresh(db_enrollment)
+    # Ghi danh, rollup và điểm trong cùng một transaction để rollup không lệch khi commit lỗi
+    db.flush()
+    rollup_crud.record_enrollment(db, db_enrollment.created_at, db_enrollment.class_id, db_enrollment.status)
 
     db_score = Score(
         enrollment_id=db_enrollment.id,
@@ -56,18 +59,93 @@ def create_enrollment(db: Session, enrollment_data: EnrollmentCreate) -> Enrollm
     )
     db.add(db_score)
     db.commit()
+    db.refresh(db_enrollment)
 
     return db_enrollment
 
+def bulk_create_enrollments(
+    db: Session,
+    class_id: UUID,
+    student_ids: List[UUID],
+    status: str = "active"
+) -> List[Tuple[UUID, str, Optional[UUID]]]:
+    """
+    Enroll many students into a class in one transaction.
+    Returns (student_id, result, enrollment_id) per distinct student id, in request order.
+    """
+    from ..models.user import User
+
+    student_ids = list(dict.fromkeys(student_ids))
+    if not student_ids:
+        return []
+
+    # Kiểm tra học sinh và các lượt đăng ký đã có bằng 2 câu truy vấn
+    roles = dict(db.execute(
+        select(User.id, User.role_name).where(User.id.in_(student_ids))
+    ).all())
+    enrolled = set(db.execute(
+        select(Enrollment.student_id).where(
+            Enrollment.class_id == class_id,
+            Enrollment.student_id.in_(student_ids)
+        )
+    ).scalars())
+
+    results = {}
+    rows = []
+    for student_id in student_ids:
+        if student_id not in roles:
+            results[student_id] = ("not_found", None)
+        elif roles[student_id] != "student":
+            results[student_id] = ("not_student", None)
+        elif student_id in enrolled:
+            results[student_id] = ("already_enrolled", None)
+        else:
+            rows.append({
+                "id": uuid4(),
+                "class_id": class_id,
+                "student_id": student_id,
+                "enrollment_at": date.today(),
+                "status": status,
+            })
+
+    try:
+        if rows:
+            created = db.execute(
+                insert(Enrollment).values(rows).returning(
+                    Enrollment.id, Enrollment.student_id, Enrollment.created_at
+                )
+            ).all()
+            db.execute(insert(Score).values([
+                {"id": uuid4(), "enrollment_id": enrollment_id} for enrollment_id, _, _ in created
+            ]))
+
+            months = Counter(rollup_crud.month_of(created_at) for _, _, created_at in created)
+            for month, count in months.items():
+                rollup_crud.record_enrollment(db, month, class_id, status, delta=count)
+
+            for enrollment_id, student_id, _ in created:
+                results[student_id] = ("created", enrollment_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return [(student_id, *results[student_id]) for student_id in student_ids]
+
 def update_enrollment(db: Session, enrollment_id: UUID, enrollment_update: EnrollmentUpdate) -> Optional[Enrollment]:
     """Update enrollment"""
     db_enrollment = get_enrollment(db, enrollment_id)
     if not db_enrollment:
         return None
     
+    old_class_id, old_status = db_enrollment.class_id, db_enrollment.status
     update_data = enrollment_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_enrollment, field, value)
+
+    if (old_class_id, old_status) != (db_enrollment.class_id, db_enrollment.status):
+        rollup_crud.record_enrollment(db, db_enrollment.created_at, old_class_id, old_status, delta=-1)
+        rollup_crud.record_enrollment(db, db_enrollment.created_at, db_enrollment.class_id, db_enrollment.status)
     
     db.commit()
     db.refresh(db_enrollment)
@@ -75,6 +153,7 @@ def update_enrollment(db: Session, enrollment_id: UUID, enrollment_update: Enrol
 
 def delete_enrollment(db: Session, enrollment_id: UUID) -> bool:
     """Delete enrollment"""
+    rollup_crud.forget_enrollments(db, Enrollment.id == enrollment_id)
     stmt = delete(Enrollment).where(Enrollment.id == enrollment_id)
     db.execute(stmt)
     db.commit()
@@ -104,6 +183,7 @@ def get_students_by_teacher(db: Session, teacher_id: UUID):
 
 def delete_enrollment_by_classroom_student(db: Session, student_id: UUID, classroom_id: UUID) -> bool:
     """Delete enrollment"""
+    rollup_crud.forget_enrollments(db, Enrollment.student_id == student_id, Enrollment.class_id == classroom_id)
     stmt = delete(Enrollment).where(Enrollment.student_id == student_id, Enrollment.class_id == classroom_id)
     db.execute(stmt)
     db.commit()
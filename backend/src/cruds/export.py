@@ -0,0 +1,111 @@
+from typing import AsyncIterator, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import Row, Select, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Attendance, Class, Enrollment, Exam, Score, User
+from ..models import Session as SessionModel
+from .user import _users_statement
+
+# Chỉ select cột (không dựng ORM object) để mỗi partition nhẹ và giải phóng được ngay sau khi ghi ra
+STUDENT_COLUMNS = (
+    User.id,
+    User.name,
+    User.email,
+    User.phone_number,
+    User.date_of_birth,
+    User.input_level,
+    User.parent_name,
+    User.parent_phone,
+    User.address,
+    User.status,
+    User.created_at,
+)
+
+
+def students_statement(status: Optional[str] = None, search: Optional[str] = None) -> Select:
+    return _users_statement("student", status, search).with_only_columns(*STUDENT_COLUMNS)
+
+def class_enrollments_statement(class_id: UUID) -> Select:
+    return (
+        select(
+            Enrollment.id.label("enrollment_id"),
+            User.id.label("student_id"),
+            User.name.label("student_name"),
+            User.email,
+            User.phone_number,
+            Enrollment.enrollment_at,
+            Enrollment.status,
+            Score.listening,
+            Score.reading,
+            Score.speaking,
+            Score.writing,
+            Score.feedback,
+        )
+        .join(User, User.id == Enrollment.student_id)
+        .outerjoin(Score, Score.enrollment_id == Enrollment.id)
+        .where(Enrollment.class_id == class_id)
+        .order_by(User.name, User.id)
+    )
+
+def class_sessions_statement(class_id: UUID) -> Select:
+    return (
+        select(SessionModel.id, SessionModel.topic, SessionModel.created_at)
+        .where(SessionModel.class_id == class_id)
+        .order_by(SessionModel.created_at, SessionModel.id)
+    )
+
+def class_attendance_statement(class_id: UUID) -> Select:
+    """(student_id, student_name, session_id, is_present) sorted by student, session NULL khi chưa điểm danh buổi nào"""
+    class_sessions = select(SessionModel.id).where(SessionModel.class_id == class_id)
+    return (
+        select(
+            User.id.label("student_id"),
+            User.name.label("student_name"),
+            Attendance.session_id,
+            Attendance.is_present,
+        )
+        .select_from(Enrollment)
+        .join(User, User.id == Enrollment.student_id)
+        .outerjoin(Attendance, and_(
+            Attendance.student_id == Enrollment.student_id,
+            Attendance.session_id.in_(class_sessions)
+        ))
+        .where(Enrollment.class_id == class_id)
+        .order_by(User.name, User.id)
+    )
+
+def exam_results_statement(exam_id: UUID) -> Select:
+    return (
+        select(
+            User.id.label("student_id"),
+            User.name.label("student_name"),
+            User.email,
+            Score.listening,
+            Score.reading,
+            Score.speaking,
+            Score.writing,
+            Score.feedback,
+        )
+        .join(User, User.id == Score.student_id)
+        .where(Score.exam_id == exam_id)
+        .order_by(User.name, User.id)
+    )
+
+
+async def stream_partitions(db: AsyncSession, stmt: Select, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+    """
+    Run stmt on a server-side cursor and yield its rows batch_size at a time
+    (yield_per: asyncpg dùng cursor, không nạp hết kết quả vào bộ nhớ)
+    """
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    try:
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        await result.close()
+
+async def class_exists(db: AsyncSession, class_id: UUID) -> bool:
+    return (await db.execute(select(Class.id).where(Class.id == class_id))).first() is not None
+
+async def exam_exists(db: AsyncSession, exam_id: UUID) -> bool:
+    return (await db.execute(select(Exam.id).where(Exam.id == exam_id))).first() is not None
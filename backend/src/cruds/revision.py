@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models.revision import TableRevision
+
+
+def bump_revisions(db: Session, tables: Iterable[str]) -> None:
+    """Increment the revision of each table in the current transaction, creating rows as needed"""
+    # Thứ tự cố định để các transaction đồng thời khoá các dòng theo cùng một thứ tự
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        table = TableRevision.__table__
+        stmt = dialect_insert(table).values([
+            {"table_name": name, "revision": 1, "updated_at": now} for name in tables
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"revision": table.c.revision + 1, "updated_at": stmt.excluded.updated_at}
+        )
+        db.execute(stmt)
+        return
+
+    rows = {
+        row.table_name: row
+        for row in db.query(TableRevision).filter(TableRevision.table_name.in_(tables)).with_for_update()
+    }
+    for name in tables:
+        row = rows.get(name)
+        if row:
+            row.revision += 1
+            row.updated_at = now
+        else:
+            db.add(TableRevision(table_name=name, revision=1, updated_at=now))
+    db.flush()
+
+async def get_revisions(db: AsyncSession, tables: Iterable[str]) -> Tuple[Dict[str, int], Optional[datetime]]:
+    """Get the revision of each table (0 if never written) and the latest write time (UTC)"""
+    tables = sorted(set(tables))
+    result = await db.execute(
+        select(TableRevision.table_name, TableRevision.revision, TableRevision.updated_at)
+        .where(TableRevision.table_name.in_(tables))
+    )
+    revisions = {name: 0 for name in tables}
+    last_modified = None
+    for name, revision, updated_at in result:
+        revisions[name] = revision
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return revisions, last_modified
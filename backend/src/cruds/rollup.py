@@ -0,0 +1,196 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+from ..models.classroom import Class
+from ..models.course import Course
+from ..models.enrollment import Enrollment
+from ..models.rollup import EnrollmentMonthlyStat, StudentMonthlyStat
+from ..models.user import User
+
+
+def month_of(value) -> date:
+    """Return the first day of the month containing value"""
+    if value is None:
+        value = date.today()
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+def _increment(db: Session, model, key: dict, column: str, delta: int) -> None:
+    """Add delta to a counter row, creating the row if it does not exist yet"""
+    if delta == 0:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        table = model.__table__
+        stmt = dialect_insert(table).values(id=uuid4(), **key, **{column: delta})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key.keys()),
+            set_={column: table.c[column] + delta}
+        )
+        db.execute(stmt)
+        return
+
+    row = db.query(model).filter_by(**key).with_for_update().first()
+    if row:
+        setattr(row, column, getattr(row, column) + delta)
+    else:
+        db.add(model(**key, **{column: delta}))
+    db.flush()
+
+def _apply_enrollment_counts(db: Session, counts: Counter, sign: int) -> None:
+    for (month, course_id, status), count in counts.items():
+        _increment(
+            db,
+            EnrollmentMonthlyStat,
+            {"month": month, "course_id": course_id, "status": status},
+            "enrollment_count",
+            sign * count
+        )
+
+def _count_enrollments(rows: Iterable[Tuple[datetime, UUID, Optional[str]]]) -> Counter:
+    counts = Counter()
+    for created_at, course_id, status in rows:
+        if course_id is None or status is None:
+            continue
+        counts[(month_of(created_at), course_id, status)] += 1
+    return counts
+
+def _enrollment_rows(db: Session, *criteria):
+    return db.query(Enrollment.created_at, Class.course_id, Enrollment.status)\
+        .join(Class, Enrollment.class_id == Class.id)\
+        .filter(*criteria)
+
+# ==================== WRITE PATH ====================
+def record_enrollment(
+    db: Session,
+    created_at: Optional[datetime],
+    class_id: UUID,
+    status: Optional[str],
+    delta: int = 1
+) -> None:
+    """Apply +/- delta to the monthly rollup for a single enrollment"""
+    if status is None:
+        return
+    course_id = db.query(Class.course_id).filter(Class.id == class_id).scalar()
+    if course_id is None:
+        return
+    _increment(
+        db,
+        EnrollmentMonthlyStat,
+        {"month": month_of(created_at), "course_id": course_id, "status": status},
+        "enrollment_count",
+        delta
+    )
+
+def forget_enrollments(db: Session, *criteria) -> None:
+    """Subtract enrollments matching criteria from the rollup (call before deleting them)"""
+    _apply_enrollment_counts(db, _count_enrollments(_enrollment_rows(db, *criteria)), -1)
+
+def forget_cascaded_enrollments(db: Session, *criteria) -> None:
+    """
+    Subtract enrollments that the database will delete through ON DELETE CASCADE.
+    SQLite (không bật foreign_keys) không cascade nên các bản ghi vẫn còn và rollup giữ nguyên.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return
+    forget_enrollments(db, *criteria)
+
+def move_class_enrollments(db: Session, class_id: UUID, new_course_id: UUID) -> None:
+    """Move a class's enrollment counts to another course (call before changing Class.course_id)"""
+    rows = _enrollment_rows(db, Enrollment.class_id == class_id).all()
+    _apply_enrollment_counts(db, _count_enrollments(rows), -1)
+    moved = [(created_at, new_course_id, status) for created_at, _, status in rows]
+    _apply_enrollment_counts(db, _count_enrollments(moved), 1)
+
+def record_student(db: Session, created_at: Optional[datetime], delta: int = 1) -> None:
+    """Apply +/- delta to the new-student rollup"""
+    _increment(db, StudentMonthlyStat, {"month": month_of(created_at)}, "new_students", delta)
+
+def rebuild(db: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """Recompute every rollup row from the source tables"""
+    db.execute(delete(EnrollmentMonthlyStat))
+    db.execute(delete(StudentMonthlyStat))
+
+    enrollment_counts = _count_enrollments(_enrollment_rows(db).yield_per(batch_size))
+    student_counts = Counter(
+        month_of(created_at)
+        for (created_at,) in db.query(User.created_at)
+            .filter(User.role_name == "student")
+            .yield_per(batch_size)
+    )
+
+    if enrollment_counts:
+        db.execute(insert(EnrollmentMonthlyStat), [
+            {"id": uuid4(), "month": month, "course_id": course_id, "status": status, "enrollment_count": count}
+            for (month, course_id, status), count in enrollment_counts.items()
+        ])
+    if student_counts:
+        db.execute(insert(StudentMonthlyStat), [
+            {"id": uuid4(), "month": month, "new_students": count}
+            for month, count in student_counts.items()
+        ])
+    db.commit()
+    return {
+        "enrollment_rows": len(enrollment_counts),
+        "student_rows": len(student_counts),
+    }
+
+# ==================== READ PATH ====================
+def get_revenue_by_months(db: Session, months: List[date], status: str = "active") -> Dict[date, dict]:
+    """Get revenue, distinct courses and enrollments for each month in one query"""
+    rows = db.query(
+        EnrollmentMonthlyStat.month,
+        func.sum(EnrollmentMonthlyStat.enrollment_count * Course.price).label("revenue"),
+        func.count(func.distinct(EnrollmentMonthlyStat.course_id)).label("courses"),
+        func.sum(EnrollmentMonthlyStat.enrollment_count).label("enrollments")
+    ).join(
+        Course, EnrollmentMonthlyStat.course_id == Course.id
+    ).filter(
+        EnrollmentMonthlyStat.month.in_(months),
+        EnrollmentMonthlyStat.status == status,
+        EnrollmentMonthlyStat.enrollment_count > 0
+    ).group_by(EnrollmentMonthlyStat.month).all()
+
+    return {
+        row.month: {
+            "revenue": float(row.revenue or 0),
+            "courses": row.courses or 0,
+            "enrollments": int(row.enrollments or 0),
+        }
+        for row in rows
+    }
+
+def get_revenue_since(db: Session, since_month: date, status: str = "active") -> Tuple[float, int]:
+    """Get total revenue and enrollments from since_month onwards"""
+    row = db.query(
+        func.sum(EnrollmentMonthlyStat.enrollment_count * Course.price).label("revenue"),
+        func.sum(EnrollmentMonthlyStat.enrollment_count).label("enrollments")
+    ).join(
+        Course, EnrollmentMonthlyStat.course_id == Course.id
+    ).filter(
+        EnrollmentMonthlyStat.month >= since_month,
+        EnrollmentMonthlyStat.status == status
+    ).first()
+    return float(row.revenue or 0), int(row.enrollments or 0)
+
+def get_enrollment_totals_by_status(db: Session) -> Dict[str, int]:
+    """Get all-time enrollment counts grouped by status"""
+    rows = db.query(
+        EnrollmentMonthlyStat.status,
+        func.sum(EnrollmentMonthlyStat.enrollment_count).label("count")
+    ).group_by(EnrollmentMonthlyStat.status).all()
+    return {row.status: int(row.count or 0) for row in rows}
+
+def get_new_students_by_months(db: Session, months: List[date]) -> Dict[date, int]:
+    """Get new student counts for each month in one query"""
+    rows = db.query(StudentMonthlyStat.month, StudentMonthlyStat.new_students)\
+        .filter(StudentMonthlyStat.month.in_(months)).all()
+    return {row.month: row.new_students for row in rows}
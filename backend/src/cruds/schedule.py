@@ -1,5 +1,6 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import delete
+from sqlalchemy import Select, delete, select
 from typing import Optional, List
 from uuid import UUID
 from datetime import time
@@ -7,6 +8,7 @@ from ..models.schedule import Schedule, Weekday
 from ..models.enrollment import Enrollment
 from ..models.classroom import Class
 from ..schemas.schedule import ScheduleCreate, ScheduleUpdate
+from ..utils.pagination import Page, PageParams, paginate_async
 
 def get_schedule(db: Session, schedule_id: UUID) -> Optional[Schedule]:
     """Get schedule by UUID"""
@@ -33,14 +35,20 @@ def get_schedules_by_classroom(db: Session, class_id: UUID) -> List[Schedule]:
         .filter(Schedule.class_id == class_id)\
         .all()
 
-def get_schedules_by_student(db: Session, student_id: UUID,) -> List[Schedule]:
-    """Get schedules for specific student (through enrollments)"""
-    query = db.query(Schedule)\
+def _schedules_by_student_statement(student_id: UUID) -> Select:
+    return select(Schedule)\
         .options(joinedload(Schedule.classroom))\
         .join(Class, Schedule.class_id == Class.id)\
-        .join(Enrollment, Class.id == Enrollment.class_id)
-    
-    return query.filter(Enrollment.student_id == student_id).all()
+        .join(Enrollment, Class.id == Enrollment.class_id)\
+        .where(Enrollment.student_id == student_id)
+
+def get_schedules_by_student(db: Session, student_id: UUID,) -> List[Schedule]:
+    """Get schedules for specific student (through enrollments)"""
+    return db.execute(_schedules_by_student_statement(student_id)).scalars().all()
+
+async def get_schedules_by_student_page(db: AsyncSession, page: PageParams, student_id: UUID) -> Page:
+    """Get a keyset page of schedules for specific student (async session)"""
+    return await paginate_async(db, _schedules_by_student_statement(student_id), Schedule, page)
 
 def get_schedules_by_room(db: Session, room: str) -> List[Schedule]:
     """Get schedules for specific room"""
@@ -142,28 +150,51 @@ def get_schedules_by_teacher_weekday(db: Session, teacher_id: UUID, weekday: str
         .filter(Schedule.weekday == weekday_enum)\
         .all()
 
-def get_schedules_with_filters(
-    db: Session,
+def _schedules_with_filters_statement(
     classroom_id: Optional[UUID] = None,
     teacher_id: Optional[UUID] = None,
     weekday: Optional[str] = None,
-) -> List[Schedule]:
-    """Get schedules with optional filters"""
-    query = db.query(Schedule).options(joinedload(Schedule.classroom))
+) -> Optional[Select]:
+    stmt = select(Schedule).options(joinedload(Schedule.classroom))
 
     if classroom_id:
-        query = query.filter(Schedule.class_id == classroom_id)
+        stmt = stmt.where(Schedule.class_id == classroom_id)
 
     if teacher_id:
-        query = query.join(Class, Schedule.class_id == Class.id)\
-                    .filter(Class.teacher_id == teacher_id)
+        stmt = stmt.join(Class, Schedule.class_id == Class.id)\
+                    .where(Class.teacher_id == teacher_id)
 
     if weekday:
         try:
             weekday_enum = Weekday(weekday.lower())
-            query = query.filter(Schedule.weekday == weekday_enum)
+            stmt = stmt.where(Schedule.weekday == weekday_enum)
         except ValueError:
             # Invalid weekday, return empty result
-            return []
+            return None
+
+    return stmt
 
-    return query.all()
\ No newline at end of file
+def get_schedules_with_filters(
+    db: Session,
+    classroom_id: Optional[UUID] = None,
+    teacher_id: Optional[UUID] = None,
+    weekday: Optional[str] = None,
+) -> List[Schedule]:
+    """Get schedules with optional filters"""
+    stmt = _schedules_with_filters_statement(classroom_id, teacher_id, weekday)
+    if stmt is None:
+        return []
+    return db.execute(stmt).scalars().all()
+
+async def get_schedules_page(
+    db: AsyncSession,
+    page: PageParams,
+    classroom_id: Optional[UUID] = None,
+    teacher_id: Optional[UUID] = None,
+    weekday: Optional[str] = None,
+) -> Page:
+    """Get a keyset page of schedules with optional filters (async session)"""
+    stmt = _schedules_with_filters_statement(classroom_id, teacher_id, weekday)
+    if stmt is None:
+        return Page(items=[], total=0 if page.count else None)
+    return await paginate_async(db, stmt, Schedule, page)
\ No newline at end of file
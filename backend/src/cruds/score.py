@@ -0,0 +1,91 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Union
+from uuid import UUID, uuid4
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from ..models.enrollment import Enrollment
+from ..models.exam import Exam
+from ..models.score import Score
+from ..schemas.enrollment import ScoreEntry
+
+SCORE_FIELDS = ("listening", "reading", "speaking", "writing", "feedback")
+
+ScoreKey = Union[UUID, Tuple[UUID, UUID]]
+
+
+def _entry_key(entry: ScoreEntry) -> ScoreKey:
+    return entry.id if entry.id is not None else (entry.exam_id, entry.student_id)
+
+def _score_ids_by_pair(db: Session, pairs: List[Tuple[UUID, UUID]]) -> Dict[Tuple[UUID, UUID], UUID]:
+    rows = db.execute(
+        select(Score.id, Score.exam_id, Score.student_id).where(
+            Score.exam_id.in_({exam_id for exam_id, _ in pairs}),
+            Score.student_id.in_({student_id for _, student_id in pairs})
+        )
+    )
+    score_ids = {}
+    for score_id, exam_id, student_id in rows:
+        score_ids.setdefault((exam_id, student_id), score_id)
+    return score_ids
+
+def _enrolled_pairs(db: Session, pairs: List[Tuple[UUID, UUID]]) -> set:
+    """(exam_id, student_id) pairs where the student is enrolled in the exam's class"""
+    return set(db.execute(
+        select(Exam.id, Enrollment.student_id)
+        .join(Enrollment, Enrollment.class_id == Exam.class_id)
+        .where(
+            Exam.id.in_({exam_id for exam_id, _ in pairs}),
+            Enrollment.student_id.in_({student_id for _, student_id in pairs})
+        )
+    ).all())
+
+def upsert_scores(db: Session, entries: List[ScoreEntry]) -> List[Tuple[ScoreEntry, str, Optional[UUID]]]:
+    """
+    Update scores by id or (exam_id, student_id), creating exam scores that do not exist yet
+    for students enrolled in the exam's class. Only non-null fields are written.
+    Returns (entry, result, score_id) per distinct key; the last entry wins for repeated keys.
+    """
+    by_key = {_entry_key(entry): entry for entry in entries}
+    if not by_key:
+        return []
+
+    ids = [key for key in by_key if not isinstance(key, tuple)]
+    pairs = [key for key in by_key if isinstance(key, tuple)]
+    existing_ids = set(db.execute(select(Score.id).where(Score.id.in_(ids))).scalars()) if ids else set()
+    pair_ids = _score_ids_by_pair(db, pairs) if pairs else {}
+    missing = [pair for pair in pairs if pair not in pair_ids]
+    enrolled = _enrolled_pairs(db, missing) if missing else set()
+
+    results = []
+    # executemany cần cùng tập cột, nên gom các dòng cập nhật theo các trường được gửi lên
+    updates = defaultdict(list)
+    inserts = []
+    for key, entry in by_key.items():
+        values = entry.model_dump(include=set(SCORE_FIELDS), exclude_none=True)
+        score_id = pair_ids.get(key) if isinstance(key, tuple) else (key if key in existing_ids else None)
+        if score_id is not None:
+            if values:
+                updates[tuple(sorted(values))].append({"id": score_id, **values})
+            results.append((entry, "updated", score_id))
+        elif isinstance(key, tuple) and key in enrolled:
+            score_id = uuid4()
+            inserts.append({
+                "id": score_id,
+                "exam_id": entry.exam_id,
+                "student_id": entry.student_id,
+                **{field: getattr(entry, field) for field in SCORE_FIELDS},
+            })
+            results.append((entry, "created", score_id))
+        else:
+            results.append((entry, "not_found", None))
+
+    try:
+        for rows in updates.values():
+            db.execute(update(Score), rows)
+        if inserts:
+            db.execute(insert(Score).values(inserts))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return results
@@ -1,11 +1,28 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import delete
-from typing import Optional, List
-from uuid import UUID
+from sqlalchemy.orm import Session, selectinload, make_transient_to_detached
+from sqlalchemy import Select, delete, insert, inspect, or_, select
+from collections import Counter
+from typing import Dict, Iterable, Optional, List, Set
+from uuid import UUID, uuid4
 
-from ..services import auth
+from ..config import settings
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
+from ..models.classroom import Class
+from ..models.enrollment import Enrollment
+from . import rollup as rollup_crud
+from ..utils.cache import TTLCache
+from ..utils.pagination import Page, PageParams, paginate
+
+# Cache principal cho get_current_user: ("id", uuid) / ("email", email) -> bản sao User đã tách khỏi session.
+# Mỗi worker có cache riêng, TTL giới hạn thời gian dữ liệu cũ giữa các worker.
+principal_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+# Phiên bản token theo user (trong bộ nhớ): token mang "ver" nhỏ hơn phiên bản hiện tại bị từ chối
+# ở chế độ AUTH_STATELESS_PRINCIPAL. Tăng khi role/email đổi hoặc user bị xoá.
+_token_versions: Dict[UUID, int] = {}
+
+# Giới hạn số dòng mỗi câu INSERT nhiều giá trị (SQLite giới hạn số tham số mỗi câu lệnh)
+INSERT_CHUNK_SIZE = 1000
 
 def get_user(db: Session, user_id: UUID):
     """Get user by UUID"""
@@ -19,6 +36,63 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Get user by email"""
     return db.query(User).filter(User.email == email).first()
 
+def _cache_user(user: User) -> None:
+    """Store a detached copy of user's column values under its id and email"""
+    snapshot = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(snapshot)
+    principal_cache.set(("id", user.id), snapshot)
+    principal_cache.set(("email", user.email), snapshot)
+
+def _from_cache(db: Session, key: tuple) -> Optional[User]:
+    snapshot = principal_cache.get(key)
+    if snapshot is None:
+        return None
+    # Gắn bản sao vào session hiện tại mà không truy vấn lại
+    return db.merge(snapshot, load=False)
+
+def get_cached_user(db: Session, user_id: UUID) -> Optional[User]:
+    """Get user by UUID, served from the principal cache when possible"""
+    user = _from_cache(db, ("id", user_id))
+    if user is None:
+        user = get_user(db, user_id)
+        if user:
+            _cache_user(user)
+    return user
+
+def get_cached_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Get user by email, served from the principal cache when possible"""
+    user = _from_cache(db, ("email", email))
+    if user is None:
+        user = get_user_by_email(db, email)
+        if user:
+            _cache_user(user)
+    return user
+
+def invalidate_cached_user(user_id: UUID = None, email: str = None) -> None:
+    """Drop a user from the principal cache"""
+    keys = []
+    if user_id is not None:
+        snapshot = principal_cache.get(("id", user_id))
+        if snapshot is not None:
+            keys.append(("email", snapshot.email))
+        keys.append(("id", user_id))
+    if email is not None:
+        keys.append(("email", email))
+    principal_cache.delete(*keys)
+
+def clear_user_cache() -> None:
+    """Drop every cached principal (after bulk deletes)"""
+    principal_cache.clear()
+    _token_versions.clear()
+
+def get_token_version(user_id: UUID) -> int:
+    """Get the current token version of a user"""
+    return _token_versions.get(user_id, 0)
+
+def revoke_tokens(user_id: UUID) -> None:
+    """Invalidate every token issued to a user so far"""
+    _token_versions[user_id] = _token_versions.get(user_id, 0) + 1
+
 def get_users(db: Session) -> List[User]:
     """Get users with pagination"""
     return db.query(User).order_by(User.created_at.desc()).all()
@@ -31,6 +105,46 @@ def get_users_by_role(db: Session, role_name: str) -> List[User]:
     """Get users by role name"""
     return db.query(User).filter(User.role_name == role_name).order_by(User.created_at.desc()).all()
 
+def get_users_by_role_with_classes(db: Session, role_name: str) -> List[User]:
+    """Get users by role name with taught classes eagerly loaded"""
+    return db.query(User)\
+        .options(selectinload(User.taught_classes))\
+        .filter(User.role_name == role_name)\
+        .order_by(User.created_at.desc()).all()
+
+def _users_statement(
+    role_name: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None
+) -> Select:
+    stmt = select(User)
+    if role_name:
+        stmt = stmt.where(User.role_name == role_name)
+    if status:
+        stmt = stmt.where(User.status == status)
+    if search:
+        pattern = f"%{search}%"
+        stmt = stmt.where(or_(
+            User.name.ilike(pattern),
+            User.email.ilike(pattern),
+            User.phone_number.ilike(pattern)
+        ))
+    return stmt.order_by(User.created_at.desc())
+
+def get_users_page(
+    db: Session,
+    page: PageParams,
+    role_name: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    with_classes: bool = False
+) -> Page:
+    """Get a keyset page of users filtered by role, status and name/email/phone search"""
+    stmt = _users_statement(role_name, status, search)
+    if with_classes:
+        stmt = stmt.options(selectinload(User.taught_classes))
+    return paginate(db, stmt, User, page)
+
 def create_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
     """Create new user with hashed password"""
     db_user = User(
@@ -51,44 +165,136 @@ def create_user(db: Session, user_data: UserCreate, hashed_password: str) -> Use
         status=user_data.status
     )
     db.add(db_user)
+    if db_user.role_name == "student":
+        db.flush()
+        rollup_crud.record_student(db, db_user.created_at)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+def get_existing_emails(db: Session, emails: Iterable[str]) -> Set[str]:
+    """Return the emails among emails that already belong to a user"""
+    emails = list(set(emails))
+    if not emails:
+        return set()
+    return set(db.execute(select(User.email).where(User.email.in_(emails))).scalars())
+
+def bulk_create_users(db: Session, users_data: List[UserCreate], hashed_passwords: List[str]) -> List[UUID]:
+    """
+    Create many users with multi-row INSERT statements in one transaction.
+    Returns the new ids in input order
+    """
+    rows = [
+        {
+            "id": uuid4(),
+            "name": user_data.name,
+            "email": user_data.email,
+            "password": hashed_password,
+            "role_name": user_data.role_name,
+            "bio": user_data.bio,
+            "date_of_birth": user_data.date_of_birth,
+            "phone_number": user_data.phone_number,
+            "input_level": user_data.input_level,
+            "specialization": user_data.specialization,
+            "address": user_data.address,
+            "education": user_data.education,
+            "experience_years": user_data.experience_years,
+            "parent_name": user_data.parent_name,
+            "parent_phone": user_data.parent_phone,
+            "status": user_data.status,
+        }
+        for user_data, hashed_password in zip(users_data, hashed_passwords)
+    ]
+    try:
+        months = Counter()
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            created = db.execute(
+                insert(User).values(rows[start:start + INSERT_CHUNK_SIZE]).returning(
+                    User.role_name, User.created_at
+                )
+            ).all()
+            months.update(rollup_crud.month_of(created_at) for role_name, created_at in created
+                          if role_name == "student")
+        for month, count in months.items():
+            rollup_crud.record_student(db, month, delta=count)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return [row["id"] for row in rows]
+
 def update_user(db: Session, user_id: UUID, user_update: UserUpdate) -> Optional[User]:
-    """Update user"""
+    """Update user (password, nếu có, phải được băm sẵn ở tầng service)"""
     db_user = get_user(db, user_id)
     if not db_user:
         return None
 
-    if user_update.password:
-        # Hash the new password
-        user_update.password = auth.get_password_hash(user_update.password)
-
+    old_role = db_user.role_name
+    old_email = db_user.email
     update_data = user_update.model_dump(exclude_unset=True,exclude_none=True)
     for field, value in update_data.items():
         setattr(db_user, field, value)
-    
+
+    _record_role_change(db, db_user, old_role)
     db.commit()
+    invalidate_cached_user(user_id, old_email)
+    if db_user.role_name != old_role or db_user.email != old_email:
+        revoke_tokens(user_id)
     db.refresh(db_user)
     return db_user
 
+def update_user_password(db: Session, user_id: UUID, hashed_password: str) -> bool:
+    """Replace a user's password hash"""
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return False
+
+    db_user.password = hashed_password
+    db.commit()
+    invalidate_cached_user(user_id, db_user.email)
+    return True
+
 def update_user_role(db: Session, user_id: UUID, new_role: str) -> Optional[User]:
     """Update user role"""
     db_user = get_user(db, user_id)
     if not db_user:
         return None
     
+    old_role = db_user.role_name
     db_user.role_name = new_role
+    _record_role_change(db, db_user, old_role)
     db.commit()
+    invalidate_cached_user(user_id, db_user.email)
+    if new_role != old_role:
+        revoke_tokens(user_id)
     db.refresh(db_user)
     return db_user
 
+def _record_role_change(db: Session, db_user: User, old_role: str) -> None:
+    """Keep the new-student rollup in sync when a user moves in or out of the student role"""
+    was_student = old_role == "student"
+    is_student = db_user.role_name == "student"
+    if was_student != is_student:
+        rollup_crud.record_student(db, db_user.created_at, delta=1 if is_student else -1)
+
 def delete_user(db: Session, user_id: UUID) -> bool:
     """Delete user"""
+    db_user = get_user(db, user_id)
+    email = db_user.email if db_user else None
+    if db_user:
+        rollup_crud.forget_cascaded_enrollments(
+            db,
+            (Enrollment.student_id == user_id) | Enrollment.class_id.in_(
+                select(Class.id).where(Class.teacher_id == user_id)
+            )
+        )
+        if db_user.role_name == "student":
+            rollup_crud.record_student(db, db_user.created_at, delta=-1)
     stmt = delete(User).where(User.id == user_id)
     db.execute(stmt)
     db.commit()
+    invalidate_cached_user(user_id, email)
+    revoke_tokens(user_id)
     return True
 
 def count_total_users(db: Session) -> int:
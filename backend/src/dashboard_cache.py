@@ -0,0 +1,88 @@
+import importlib
+import logging
+from typing import Any, Callable, FrozenSet, Hashable, Iterable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import table_changes
+from .config import settings
+from .utils.cache import SQLiteCache, TTLCache
+
+logger = logging.getLogger("src.dashboard_cache")
+
+# Các bảng mà mỗi dashboard đọc: commit ghi vào một trong số đó sẽ xoá cache của dashboard
+DASHBOARD_TABLES = {
+    "admin": {
+        "users", "classes", "courses", "enrollments",
+        "enrollment_monthly_stats", "student_monthly_stats",
+    },
+    "staff": {"users", "classes", "enrollments", "sessions", "attendances", "homeworks"},
+    "teacher": {
+        "users", "classes", "enrollments", "sessions", "attendances", "homeworks", "scores", "schedules",
+    },
+    "student": {
+        "users", "classes", "enrollments", "sessions", "attendances", "homeworks", "scores",
+        "exams", "schedules",
+    },
+}
+
+
+def _create_backend():
+    backend = settings.DASHBOARD_CACHE_BACKEND
+    max_size, ttl = settings.DASHBOARD_CACHE_MAX_SIZE, settings.DASHBOARD_CACHE_TTL_SECONDS
+    if backend == "memory":
+        return TTLCache(max_size, ttl)
+    if backend == "sqlite":
+        return SQLiteCache(settings.DASHBOARD_CACHE_PATH, max_size, ttl)
+    module_name, _, class_name = backend.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown DASHBOARD_CACHE_BACKEND: {backend}")
+    return getattr(importlib.import_module(module_name), class_name)(max_size=max_size, ttl=ttl)
+
+
+dashboard_cache = _create_backend()
+
+
+def cache_key(dashboard: str, principal: Optional[Hashable] = None, period: Optional[str] = None) -> tuple:
+    return (dashboard, str(principal) if principal is not None else None, period)
+
+
+async def get_or_build(
+    db: AsyncSession,
+    dashboard: str,
+    build: Callable[..., Any],
+    *args,
+    principal: Optional[Hashable] = None,
+    period: Optional[str] = None
+) -> Any:
+    """Return the cached dashboard for (dashboard, principal, period), building it with db.run_sync on a miss"""
+    key = cache_key(dashboard, principal, period)
+    cached = dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+    response = await db.run_sync(build, *args)
+    dashboard_cache.set(key, response)
+    return response
+
+
+def invalidate_tables(tables: Iterable[str]) -> None:
+    """Drop the cached dashboards that read any of the given tables"""
+    tables = set(tables)
+    for dashboard, dependencies in DASHBOARD_TABLES.items():
+        if dependencies & tables:
+            dashboard_cache.delete_namespace(dashboard)
+
+
+def clear_dashboard_cache() -> None:
+    dashboard_cache.clear()
+
+
+def _invalidate_after_commit(tables: FrozenSet[str]) -> None:
+    try:
+        invalidate_tables(tables)
+    except Exception:
+        # Lỗi backend cache không được làm hỏng request đã commit, TTL giới hạn dữ liệu cũ
+        logger.exception("Dashboard cache invalidation failed for tables %s", sorted(tables))
+
+
+def register_invalidation_listeners() -> None:
+    """Invalidate affected dashboards after every commit that writes to the tables they read"""
+    table_changes.on_after_commit(_invalidate_after_commit)
@@ -1,17 +1,23 @@
-from fastapi import Depends, HTTPException, status
+from typing import Any, Callable, Iterable, Literal, Optional, Type
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .database import Base, engine, get_db
+from .config import settings
+from .database import get_async_db, get_db
 from .services import auth as auth_service
+from .services import revision as revision_service
+from .services import classroom as classroom_service
 from .models.user import User
+from .schemas.classroom import ClassroomResponse
+from .utils.fieldsets import Fieldset, parse_fieldset
+from .utils.http_cache import ETAG_HEADER, LAST_MODIFIED_HEADER, http_date, is_not_modified, make_etag
+from .utils.pagination import PageParams, decode_cursor
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 security = HTTPBearer()
 
-def init_dependencies():
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-
 # Authentication dependency
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -20,9 +26,13 @@ async def get_current_user(
     """
     Dependency để lấy current user từ JWT token
     Sử dụng trong các endpoints cần authentication
+    Với AUTH_STATELESS_PRINCIPAL trả về Principal dựng từ claims, không truy vấn bảng users
     """
     token = credentials.credentials
-    user = auth_service.get_current_user(db, token)
+    if settings.AUTH_STATELESS_PRINCIPAL:
+        user = auth_service.get_current_principal(db, token)
+    else:
+        user = auth_service.get_current_user(db, token)
     
     if not user:
         raise HTTPException(
@@ -84,4 +94,75 @@ async def get_current_student_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Không có quyền truy cập"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+# Pagination dependency
+async def get_page_params(
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGINATION_MAX_LIMIT, description="Số bản ghi mỗi trang"),
+    cursor: Optional[str] = Query(None, description="Giá trị X-Next-Cursor của trang trước"),
+    count: Optional[Literal["exact", "estimate"]] = Query(None, description="Trả về tổng số bản ghi qua X-Total-Count")
+) -> PageParams:
+    """
+    Dependency phân trang keyset theo (created_at, id).
+    Không truyền limit/cursor => trả về toàn bộ danh sách như trước
+    """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="cursor không hợp lệ"
+            )
+    return PageParams(limit=limit, cursor=cursor, count=count)
+
+# Conditional GET dependency
+def conditional_get(role_dependency: Callable[..., Any], *tables: str):
+    """
+    Dependency factory cho GET đọc từ các bảng tables: trả về 304 (không chạy handler)
+    khi If-None-Match / If-Modified-Since khớp phiên bản hiện tại của các bảng,
+    ngược lại gắn ETag / Last-Modified vào response.
+    role_dependency là dependency phân quyền của route (get_current_admin_user, ...): dependencies=[...]
+    chạy trước tham số của handler nên phải kiểm tra quyền ở đây, trước khi quyết định 304
+    """
+    async def check_not_modified(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(role_dependency),
+        db: AsyncSession = Depends(get_async_db)
+    ) -> None:
+        revisions, last_modified = await revision_service.get_revisions(db, tables)
+        headers = {ETAG_HEADER: make_etag(request, revisions), "Vary": "Authorization"}
+        if last_modified is not None:
+            headers[LAST_MODIFIED_HEADER] = http_date(last_modified)
+        if is_not_modified(request, headers[ETAG_HEADER], last_modified):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(check_not_modified)
+
+# Sparse fieldset dependency
+def sparse_fieldset(schema: Type[BaseModel], expansions: Iterable[str]):
+    """
+    Dependency factory cho fields= / expand=: chọn field của schema và các quan hệ được nạp, serialize.
+    Không truyền cả hai => trả về đầy đủ như trước
+    """
+    expansions = tuple(expansions)
+
+    async def get_fieldset(
+        fields: Optional[str] = Query(None, description="Các field cần trả về, phân tách bằng dấu phẩy"),
+        expand: Optional[str] = Query(
+            None, description="Các quan hệ cần nạp, phân tách bằng dấu phẩy: " + ", ".join(expansions)
+        )
+    ) -> Fieldset:
+        try:
+            return parse_fieldset(fields, expand, schema, expansions)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+    return Depends(get_fieldset)
+
+classroom_fieldset = sparse_fieldset(ClassroomResponse, classroom_service.EXPANSIONS)
@@ -6,6 +6,8 @@ from .score import Score
 from .enrollment import Enrollment
 from .attendance import Session, Attendance, Homework
 from .exam import Exam
+from .rollup import EnrollmentMonthlyStat, StudentMonthlyStat
+from .revision import TableRevision
 
 __all__ = [
     "User",
@@ -20,5 +22,8 @@ __all__ = [
     "Session",
     "Attendance",
     "Homework",
-    "Exam"
+    "Exam",
+    "EnrollmentMonthlyStat",
+    "StudentMonthlyStat",
+    "TableRevision"
 ]
\ No newline at end of file
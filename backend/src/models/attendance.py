@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
@@ -9,6 +9,9 @@ import enum
 
 class Session(Base):
   __tablename__ = "sessions"
+  __table_args__ = (
+    Index("ix_sessions_class_id_created_at", "class_id", "created_at"),
+  )
 
   id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
   topic = Column(String(255))
@@ -26,6 +29,10 @@ class Session(Base):
 
 class Attendance(Base):
   __tablename__ = "attendances"
+  __table_args__ = (
+    Index("ix_attendances_session_id_is_present", "session_id", "is_present"),
+    Index("ix_attendances_student_id", "student_id"),
+  )
 
   id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
 
@@ -46,6 +53,10 @@ class HomeworkStatus(str, enum.Enum):
 
 class Homework(Base):
   __tablename__ = "homeworks"
+  __table_args__ = (
+    Index("ix_homeworks_student_id_status", "student_id", "status"),
+    Index("ix_homeworks_session_id_status", "session_id", "status"),
+  )
 
   id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
 
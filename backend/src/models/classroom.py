@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
@@ -21,6 +21,9 @@ class CourseLevel(str, enum.Enum):
 
 class Class(Base):
     __tablename__ = "classes"
+    __table_args__ = (
+        Index("ix_classes_teacher_id_status", "teacher_id", "status"),
+    )
 
     id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
     class_name = Column(String(255), nullable=False)
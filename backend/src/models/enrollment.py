@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, ForeignKey, String, DateTime, Float
+from sqlalchemy import Column, Date, ForeignKey, String, DateTime, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
@@ -8,6 +8,10 @@ import uuid
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        Index("ix_enrollments_class_id_status", "class_id", "status"),
+        Index("ix_enrollments_student_id_status", "student_id", "status"),
+    )
 
     id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
     class_id = Column(UUID(), ForeignKey("classes.id", ondelete="CASCADE"), nullable=False)
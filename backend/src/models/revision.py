@@ -0,0 +1,12 @@
+from sqlalchemy import BigInteger, Column, DateTime, String
+from src.database import Base
+
+
+class TableRevision(Base):
+    """Số phiên bản của mỗi bảng, tăng trong cùng transaction với mỗi commit ghi vào bảng (dùng cho ETag)"""
+    __tablename__ = "table_revisions"
+
+    table_name = Column(String(64), primary_key=True)
+    revision = Column(BigInteger, nullable=False, default=0)
+    # Thời điểm commit ghi gần nhất (UTC), dùng cho Last-Modified
+    updated_at = Column(DateTime, nullable=False)
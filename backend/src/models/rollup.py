@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, String, UniqueConstraint
+from src.database import Base
+from src.utils.database import UUID
+import uuid
+
+
+class EnrollmentMonthlyStat(Base):
+    """Số lượt đăng ký theo (tháng, khóa học, trạng thái) - cập nhật khi ghi enrollments"""
+    __tablename__ = "enrollment_monthly_stats"
+    __table_args__ = (
+        UniqueConstraint("month", "course_id", "status", name="uq_enrollment_monthly_stats_key"),
+    )
+
+    id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
+    month = Column(Date, nullable=False)
+    course_id = Column(UUID(), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(50), nullable=False)
+    enrollment_count = Column(Integer, nullable=False, default=0)
+
+
+class StudentMonthlyStat(Base):
+    """Số học viên mới theo tháng - cập nhật khi ghi users"""
+    __tablename__ = "student_monthly_stats"
+
+    id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
+    month = Column(Date, nullable=False, unique=True)
+    new_students = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, String, Float
+from sqlalchemy import Column, ForeignKey, String, Float, Index
 from sqlalchemy.orm import relationship
 from src.database import Base
 from src.utils.database import UUID
@@ -7,6 +7,9 @@ import uuid
 
 class Score(Base):
     __tablename__ = "scores"
+    __table_args__ = (
+        Index("ix_scores_exam_id_student_id", "exam_id", "student_id"),
+    )
 
     id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
     
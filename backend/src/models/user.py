@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Date, DateTime, Integer
+from sqlalchemy import Column, String, Text, Date, DateTime, Integer, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
@@ -8,6 +8,9 @@ import uuid
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role_name_status_created_at", "role_name", "status", "created_at"),
+    )
 
     id = Column(UUID(), primary_key=True, default=uuid.uuid4, index=True)
     name = Column(String(255), nullable=False)
@@ -0,0 +1,85 @@
+import threading
+import time
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolWaitStats:
+    """Thời gian chờ lấy connection từ pool (cộng dồn từ lúc khởi động)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "avg_checkout_wait_ms": round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0,
+                "max_checkout_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+
+class _TimedPoolMixin:
+    """Đo thời gian request phải chờ connection (khi pool và overflow đã dùng hết)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+
+# Logger của pool đặt theo module của class: giữ dưới "sqlalchemy.pool" để dùng mức WARN mặc định
+# của SQLAlchemy thay vì kế thừa INFO của root logger (log "Pool disposed / recreating" mỗi lần dispose)
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.TimedQueuePool"
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.TimedAsyncQueuePool"
+
+
+def pool_status(engine: Engine) -> dict:
+    """Current size / checked-out / overflow of an engine's pool plus checkout wait stats"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.as_dict())
+    return status
@@ -0,0 +1,127 @@
+import json
+import logging
+import re
+import time
+import weakref
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+logger = logging.getLogger("src.query_stats")
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\b\d+\b")
+_PARAM_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,?)+\)")
+
+
+class QueryStats:
+    """Số câu lệnh SQL và thời gian DB của một request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int):
+        """Statement shapes executed at least threshold times (likely N+1 loops)"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so that calls differing only by parameters share one shape"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PARAM_LIST.sub("(?)", shape)
+    return _NUMBER.sub("N", shape)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+_registered_engines = weakref.WeakSet()
+
+
+def register_query_listeners(engine: Engine) -> None:
+    """Hook cursor execution on engine to feed the per-request QueryStats (once per engine)"""
+    if engine in _registered_engines:
+        return
+    _registered_engines.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware đếm số câu lệnh SQL và thời gian DB cho mỗi request,
+    trả về qua response headers và ghi một dòng log JSON
+    """
+
+    def __init__(self, app, threshold: int = None):
+        self.app = app
+        self.threshold = threshold or settings.QUERY_STATS_REPEAT_THRESHOLD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_stats(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.extend([
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-query-time-ms", f"{stats.duration * 1000:.1f}".encode()),
+                    (b"x-db-repeated-queries", str(len(stats.repeated(self.threshold))).encode()),
+                ])
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            self._log(scope, status_code, stats, time.perf_counter() - started)
+
+    def _log(self, scope, status_code: int, stats: QueryStats, duration: float) -> None:
+        repeated = stats.repeated(self.threshold)
+        line = json.dumps({
+            "event": "request_query_stats",
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "status": status_code,
+            "queries": stats.count,
+            "db_time_ms": round(stats.duration * 1000, 1),
+            "duration_ms": round(duration * 1000, 1),
+            "repeated": [{"statement": shape[:200], "count": count} for shape, count in repeated],
+        }, ensure_ascii=False)
+        if repeated:
+            logger.warning(line)
+        else:
+            logger.info(line)
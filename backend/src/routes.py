@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .controllers import auth, admin, teacher, staff, student, seed, attendance, homework, exam
+from .controllers import auth, admin, teacher, staff, student, seed, attendance, homework, exam, export
 
 api_router = APIRouter()
 
@@ -15,6 +15,7 @@ api_router.include_router(student.router, prefix="/student", tags=["Student"])
 api_router.include_router(attendance.router, prefix="/attendance", tags=["Attendance"])
 api_router.include_router(homework.router, prefix="/homework", tags=["Homework"])
 api_router.include_router(exam.router, prefix="/exams", tags=["Exams"])
+api_router.include_router(export.router, prefix="/export", tags=["Export"])
 
 # Seed data routes
 api_router.include_router(seed.router, prefix="/seed", tags=["Seed Data"])
\ No newline at end of file
@@ -0,0 +1,53 @@
+import logging
+from pathlib import Path
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Connection
+from .config import settings
+
+logger = logging.getLogger("src.schema")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class SchemaVersionError(RuntimeError):
+    """Database schema does not match the migrations shipped with the code"""
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.set_main_option("sqlalchemy.url", (url or settings.DATABASE_URL).replace("%", "%%"))
+    # Giữ cấu hình logging của ứng dụng khi chạy migration từ trong process
+    config.attributes["configure_logger"] = False
+    return config
+
+def head_revision() -> str:
+    """Latest revision in migrations/versions (read from files, no database access)"""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+def current_revision(connection: Connection) -> Optional[str]:
+    """Revision stamped in the alembic_version table, None for an unmigrated database"""
+    return MigrationContext.configure(connection).get_current_revision()
+
+def check_schema_version(connection: Connection) -> str:
+    """
+    Compare the database revision with the code's head revision.
+    Chỉ đọc bảng alembic_version, không reflect schema.
+    """
+    expected = head_revision()
+    current = current_revision(connection)
+    if current != expected:
+        raise SchemaVersionError(
+            f"Schema database đang ở revision {current or '(chưa migrate)'}, code cần {expected}: "
+            "chạy `alembic upgrade head` (database cũ tạo bằng create_all: `alembic stamp 0001` trước, "
+            "sau khi upgrade chạy `python manage.py backfill-rollups`)"
+        )
+    return current
+
+def upgrade_to_head(url: Optional[str] = None) -> None:
+    """Run all pending migrations (alembic upgrade head)"""
+    command.upgrade(alembic_config(url), "head")
@@ -16,6 +16,8 @@ from .schedule import (
 
 from .enrollment import (
     EnrollmentBase, EnrollmentCreate, EnrollmentUpdate, EnrollmentResponse,
+    BulkEnrollmentResult, BulkEnrollmentResponse,
+    ScoreEntry, ScoreBulkUpdate, ScoreEntryResult,
 )
 from .auth import LoginRequest, RegisterRequest, TokenResponse, TokenData
 
@@ -46,6 +48,8 @@ __all__ = [
     
     # Enrollment schemas
     "EnrollmentBase", "EnrollmentCreate", "EnrollmentUpdate", "EnrollmentResponse",
+    "BulkEnrollmentResult", "BulkEnrollmentResponse",
+    "ScoreEntry", "ScoreBulkUpdate", "ScoreEntryResult",
     
     # Feedback schemas
     "FeedbackBase", "FeedbackCreate", "FeedbackUpdate", "FeedbackResponse",
@@ -2,6 +2,7 @@ from typing import Optional, List
 from uuid import UUID
 from .base import BaseSchema
 from datetime import datetime
+from src.models.attendance import HomeworkStatus
 
 class AttendanceCreate(BaseSchema):
     student_id: UUID
@@ -14,12 +15,31 @@ class SessionCreate(BaseSchema):
     attendances: List[AttendanceCreate]
 
 
+class SessionBulkCreate(BaseSchema):
+    sessions: List[SessionCreate]
+
+
 class AttendanceOut(BaseSchema):
     id: UUID
     student_id: UUID
     is_present: bool
 
 
+class HomeworkCreatedOut(BaseSchema):
+    id: UUID
+    student_id: UUID
+    status: HomeworkStatus
+
+
+class SessionCreatedOut(BaseSchema):
+    id: UUID
+    topic: str
+    class_id: UUID
+    schedule_id: UUID
+    attendances: List[AttendanceOut] = []
+    homeworks: List[HomeworkCreatedOut] = []
+
+
 class SessionOut(BaseSchema):
     id: UUID
     topic: str
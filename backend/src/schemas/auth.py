@@ -1,6 +1,6 @@
 from pydantic import EmailStr
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
 from src.schemas.base import BaseSchema
 from .user import UserRole
@@ -37,7 +37,10 @@ class TokenResponse(BaseSchema):
 class TokenData(BaseSchema):
     email: Optional[str] = None
     user_id: Optional[UUID] = None
-    role: Optional[str] = None 
+    role: Optional[str] = None
+    version: int = 0 
+    # Thời điểm hết hạn (UTC, naive) lấy từ claim exp
+    expires_at: Optional[datetime] = None
 
 class ChangePasswordForm(BaseSchema):
     old_password: str
@@ -1,5 +1,6 @@
 from datetime import date, datetime
 from typing import Optional, List
+from pydantic import Field, model_validator
 from src.schemas.base import BaseSchema
 from uuid import UUID
 
@@ -52,4 +53,46 @@ class EnrollmentResponse(EnrollmentBase):
 
     classroom: Optional[ClassroomNested] = None
     student: Optional[StudentNested] = None
-    score: List[ScoreNested] = []
\ No newline at end of file
+    score: List[ScoreNested] = []
+
+class BulkEnrollmentResult(BaseSchema):
+    student_id: UUID
+    status: str  # created, already_enrolled, not_found, not_student
+    enrollment_id: Optional[UUID] = None
+
+
+class BulkEnrollmentResponse(BaseSchema):
+    message: str
+    class_id: UUID
+    created: int
+    skipped: int
+    results: List[BulkEnrollmentResult] = []
+
+
+# Thang điểm theo kỹ năng: Listening/Reading tối đa 495, Speaking/Writing tối đa 200
+class ScoreEntry(BaseSchema):
+    id: Optional[UUID] = None
+    exam_id: Optional[UUID] = None
+    student_id: Optional[UUID] = None
+    listening: Optional[float] = Field(None, ge=0, le=495)
+    reading: Optional[float] = Field(None, ge=0, le=495)
+    speaking: Optional[float] = Field(None, ge=0, le=200)
+    writing: Optional[float] = Field(None, ge=0, le=200)
+    feedback: Optional[str] = Field(None, max_length=255)
+
+    @model_validator(mode="after")
+    def check_key(self):
+        if self.id is None and (self.exam_id is None or self.student_id is None):
+            raise ValueError("Cần id hoặc cặp exam_id, student_id")
+        return self
+
+
+class ScoreBulkUpdate(BaseSchema):
+    scores: List[ScoreEntry]
+
+
+class ScoreEntryResult(BaseSchema):
+    id: Optional[UUID] = None
+    exam_id: Optional[UUID] = None
+    student_id: Optional[UUID] = None
+    result: str  # updated, created, not_found
@@ -37,4 +37,20 @@ class HomeworkResponse(BaseSchema):
     status: HomeworkStatus = HomeworkStatus.PENDING
     feedback: Optional[str] = None
 
-    
\ No newline at end of file
+    
+
+class HomeworkGrade(BaseSchema):
+    id: UUID
+    status: HomeworkStatus
+    feedback: Optional[str] = None
+
+
+class HomeworkBulkGrade(BaseSchema):
+    grades: List[HomeworkGrade]
+
+
+class HomeworkGradeResult(BaseSchema):
+    id: UUID
+    result: str  # updated, not_found
+    status: Optional[HomeworkStatus] = None
+    feedback: Optional[str] = None
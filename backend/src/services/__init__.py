@@ -4,6 +4,13 @@ from . import course
 from . import classroom
 from . import enrollment
 from . import schedule
+from . import kpi
+from . import rollup
+from . import password
+from . import attendance
+from . import score
+from . import revision
+from . import export
 
 __all__ = [
     "auth",
@@ -12,4 +19,11 @@ __all__ = [
     "classroom",
     "enrollment",
     "schedule",
+    "kpi",
+    "rollup",
+    "password",
+    "attendance",
+    "score",
+    "revision",
+    "export",
 ] 
\ No newline at end of file
@@ -0,0 +1,22 @@
+from typing import List
+from sqlalchemy.orm import Session
+from ..cruds import attendance as attendance_crud
+from ..schemas.attendance import SessionCreate, SessionCreatedOut
+from ..schemas.homework import HomeworkGrade, HomeworkGradeResult
+
+
+def create_session(db: Session, session_data: SessionCreate) -> SessionCreatedOut:
+    return create_sessions(db, [session_data])[0]
+
+def create_sessions(db: Session, sessions_data: List[SessionCreate]) -> List[SessionCreatedOut]:
+    """Create several sessions with their roll-call and homework rows in one transaction"""
+    created = attendance_crud.create_sessions(db, sessions_data)
+    return [SessionCreatedOut.model_validate(session) for session in created]
+
+def grade_homeworks(db: Session, grades: List[HomeworkGrade]) -> List[HomeworkGradeResult]:
+    """Grade many homeworks in one transaction and report the outcome per homework"""
+    return [
+        HomeworkGradeResult(id=grade.id, result="updated", status=grade.status, feedback=grade.feedback)
+        if updated else HomeworkGradeResult(id=grade.id, result="not_found")
+        for grade, updated in attendance_crud.grade_homeworks(db, grades)
+    ]
@@ -1,26 +1,24 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Union
+from uuid import UUID
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from ..config import settings
 from ..cruds import user as user_crud
 from ..models.user import User
 from ..schemas.auth import TokenData
 from ..schemas.user import UserCreate
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from . import password as password_service
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a plain password against its hash (blocking, for scripts only)"""
+    return password_service.verify_password_sync(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+    """Hash a password (blocking, for scripts only)"""
+    return password_service.hash_password_sync(password)
 
-def register_user(db: Session, user_data) -> Optional[User]:
+async def register_user(db: Session, user_data) -> Optional[User]:
     """Register a new user"""
     # Check if user already exists
     existing_user = user_crud.get_user_by_email(db, user_data.email)
@@ -28,7 +26,7 @@ def register_user(db: Session, user_data) -> Optional[User]:
         return None
     
     # Hash the password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_service.hash_password(user_data.password)
     
     # Create user data for CRUD
     user_create_data = UserCreate(
@@ -51,24 +49,29 @@ def register_user(db: Session, user_data) -> Optional[User]:
     # Create the user
     return user_crud.create_user(db, user_create_data, hashed_password)
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """Authenticate user with email and password"""
-    print(user_crud.get_all_users(db))
     user = user_crud.get_user_by_email(db, email)
-    print(user)
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await password_service.verify_password(password, user.password):
         return None
     return user
 
+def access_token_lifetime() -> timedelta:
+    """Lifetime of newly issued access tokens, giới hạn ngắn hơn ở chế độ AUTH_STATELESS_PRINCIPAL"""
+    minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    if settings.AUTH_STATELESS_PRINCIPAL:
+        minutes = min(minutes, settings.AUTH_STATELESS_TOKEN_EXPIRE_MINUTES)
+    return timedelta(minutes=minutes)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + access_token_lifetime()
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
@@ -81,11 +84,19 @@ def verify_token(token: str) -> Optional[TokenData]:
         email: str = payload.get("sub")
         user_id: str = payload.get("user_id")
         role: str = payload.get("role")
+        version: int = payload.get("ver", 0)
+        exp = payload.get("exp")
         
         if email is None:
             return None
         
-        token_data = TokenData(email=email, user_id=user_id, role=role)
+        token_data = TokenData(
+            email=email,
+            user_id=user_id,
+            role=role,
+            version=version,
+            expires_at=datetime.utcfromtimestamp(exp) if exp is not None else None
+        )
         return token_data
     except JWTError:
         return None
@@ -96,26 +107,65 @@ def get_current_user(db: Session, token: str) -> Optional[User]:
     if token_data is None:
         return None
     
-    user = user_crud.get_user_by_email(db, email=token_data.email)
+    user = user_crud.get_cached_user_by_email(db, email=token_data.email)
     if user is None:
         return None
     
     return user
 
+class Principal:
+    """
+    User đã xác thực dựng từ claims của JWT (id, email, role_name).
+    Các thuộc tính khác nạp User ORM một lần khi handler truy cập tới.
+    """
+
+    def __init__(self, db: Session, user_id: UUID, email: str, role_name: str):
+        self.id = user_id
+        self.email = email
+        self.role_name = role_name
+        self._db = db
+        self._user: Optional[User] = None
+
+    @property
+    def user(self) -> Optional[User]:
+        if self._user is None:
+            self._user = user_crud.get_cached_user(self._db, self.id)
+        return self._user
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        user = self.user
+        if user is None:
+            raise AttributeError(f"User {self.id} no longer exists")
+        return getattr(user, name)
+
+def get_current_principal(db: Session, token: str) -> Optional[Union[Principal, User]]:
+    """Authorize from the verified token claims without querying users"""
+    token_data = verify_token(token)
+    if token_data is None or token_data.user_id is None or token_data.role is None:
+        return None
+    # Token sống lâu hơn giới hạn của chế độ stateless (cấp trước khi bật chế độ này): claims có thể đã cũ
+    # mà phiên bản trong bộ nhớ không thu hồi được, nên xác thực lại với DB
+    if token_data.expires_at is None or token_data.expires_at > datetime.utcnow() + access_token_lifetime():
+        return get_current_user(db, token)
+    if token_data.version < user_crud.get_token_version(token_data.user_id):
+        return None
+    return Principal(db, token_data.user_id, token_data.email, token_data.role)
+
+def get_token_version(user_id: UUID) -> int:
+    """Get the version embedded in newly issued tokens"""
+    return user_crud.get_token_version(user_id)
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """Get user by email"""
     return user_crud.get_user_by_email(db, email) 
 
 
-def change_password(db: Session, user_id: int, new_password: str) -> bool:
+async def change_password(db: Session, user_id: int, new_password: str) -> bool:
     try:
-        user = user_crud.get_user_by_id(db, user_id)
-        if not user:
-            return False
-            
-        user.password = get_password_hash(new_password)
-        db.commit()
-        return True
+        hashed_password = await password_service.hash_password(new_password)
+        return user_crud.update_user_password(db, user_id, hashed_password)
         
     except Exception as e:
         db.rollback()
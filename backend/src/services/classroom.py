@@ -1,14 +1,46 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..cruds import classroom as classroom_crud
-from ..schemas.classroom import ClassroomCreate, ClassroomUpdate
+from ..schemas.classroom import ClassroomCreate, ClassroomResponse, ClassroomUpdate
 from ..models.classroom import Class
+from ..utils.fieldsets import Fieldset, serialization_filter
+from ..utils.pagination import Page, PageParams
+from ..utils.responses import dump_json, dump_json_list
+
+# Các bảng mà ClassroomResponse đọc (course, teacher, schedules, enrollments -> student/score,
+# sessions -> attendances/homeworks), dùng cho ETag của các endpoint danh sách lớp
+RESPONSE_TABLES = (
+    "classes", "courses", "users", "schedules", "enrollments", "scores",
+    "sessions", "attendances", "homeworks",
+)
+
+# Các quan hệ có thể chọn qua expand=
+EXPANSIONS = tuple(classroom_crud.CLASSROOM_EXPANSIONS)
 
 def get_classroom(db: Session, classroom_id: UUID) -> Optional[Class]:
     """Get classroom by ID"""
     return classroom_crud.get_classroom(db, classroom_id)
 
+def get_classroom_detail(db: Session, classroom_id: UUID, expand: Optional[Iterable[str]] = None) -> Optional[Class]:
+    """Get classroom by ID with the given expansions loaded"""
+    return classroom_crud.get_classroom_detail(db, classroom_id, expand)
+
+def dump_classroom_json(classroom: Class, fieldset: Fieldset) -> bytes:
+    """Serialize a classroom as ClassroomResponse JSON restricted to the requested fields and expansions"""
+    include, exclude = serialization_filter(ClassroomResponse, fieldset, EXPANSIONS)
+    return dump_json(ClassroomResponse, classroom, include=include, exclude=exclude or None)
+
+def dump_classrooms_json(classrooms: List[Class], fieldset: Fieldset) -> bytes:
+    """List version of dump_classroom_json"""
+    include, exclude = serialization_filter(ClassroomResponse, fieldset, EXPANSIONS)
+    return dump_json_list(
+        ClassroomResponse, classrooms,
+        include={"__all__": include} if include is not None else None,
+        exclude={"__all__": exclude} if exclude else None
+    )
+
 
 def get_classrooms_with_filters(
     db: Session, 
@@ -19,6 +51,17 @@ def get_classrooms_with_filters(
     """Get classrooms with optional filters"""
     return classroom_crud.get_classrooms_with_filters(db, course_id, teacher_id, status)
 
+async def get_classrooms_page(
+    db: AsyncSession,
+    page: PageParams,
+    course_id: Optional[UUID] = None,
+    teacher_id: Optional[UUID] = None,
+    status: Optional[str] = None,
+    expand: Optional[Iterable[str]] = None
+) -> Page:
+    """Get a page of classrooms with optional filters (async session)"""
+    return await classroom_crud.get_classrooms_page(db, page, course_id, teacher_id, status, expand)
+
 def get_classrooms_by_teacher(db: Session, teacher_id: UUID) -> List[Class]:
     """Get classrooms taught by specific teacher"""
     return classroom_crud.get_classrooms_by_teacher(db, teacher_id)
@@ -31,6 +74,16 @@ def get_classrooms_by_student(db: Session, student_id: UUID, status: Optional[st
     """Get classrooms where student is enrolled"""
     return classroom_crud.get_classrooms_by_student(db, student_id, status)
 
+async def get_classrooms_by_student_page(
+    db: AsyncSession,
+    page: PageParams,
+    student_id: UUID,
+    status: Optional[str] = None,
+    expand: Optional[Iterable[str]] = None
+) -> Page:
+    """Get a page of classrooms where student is enrolled (async session)"""
+    return await classroom_crud.get_classrooms_by_student_page(db, page, student_id, status, expand)
+
 def get_upcoming_classes_by_student(db: Session, student_id: UUID) -> List[Class]:
     """Get upcoming classes for student"""
     return classroom_crud.get_upcoming_classes_by_student(db, student_id)
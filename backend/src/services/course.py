@@ -5,6 +5,9 @@ from ..cruds import course as course_crud
 from ..schemas.course import CourseCreate, CourseUpdate
 from ..models.course import Course
 
+# Các bảng mà CourseResponse đọc, dùng cho ETag
+RESPONSE_TABLES = ("courses", "classes")
+
 def get_course(db: Session, course_id: UUID) -> Optional[Course]:
     """Get course by ID"""
     return course_crud.get_course(db, course_id)
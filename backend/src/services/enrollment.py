@@ -1,21 +1,25 @@
-from typing import List, Optional
+from typing import List
 from uuid import UUID
 from sqlalchemy.orm import Session
 from ..cruds import enrollment as enrollment_crud
-from ..schemas.enrollment import EnrollmentCreate, EnrollmentUpdate
-from ..models.enrollment import Enrollment
+from ..schemas.enrollment import BulkEnrollmentResult, BulkEnrollmentResponse
 
 
-def bulk_create_enrollments(db: Session, student_ids: List[UUID], class_id: UUID) -> Optional[Enrollment]:
-    for student_id in student_ids:
-        enrollment_crud.create_enrollment(
-            db=db,
-            enrollment_data=EnrollmentCreate(
-                student_id=student_id,
-                class_id=class_id,
-            )
-        )
-    return True
+def bulk_create_enrollments(db: Session, student_ids: List[UUID], class_id: UUID) -> BulkEnrollmentResponse:
+    """Enroll students into a class in one transaction and report the outcome per student"""
+    rows = enrollment_crud.bulk_create_enrollments(db, class_id, student_ids)
+    results = [
+        BulkEnrollmentResult(student_id=student_id, status=result, enrollment_id=enrollment_id)
+        for student_id, result, enrollment_id in rows
+    ]
+    created = sum(1 for item in results if item.status == "created")
+    return BulkEnrollmentResponse(
+        message=f"Đã thêm {created}/{len(results)} học sinh vào lớp",
+        class_id=class_id,
+        created=created,
+        skipped=len(results) - created,
+        results=results
+    )
 
 def get_students_by_teacher(db: Session, teacher_id: UUID):
     return enrollment_crud.get_students_by_teacher(db, teacher_id) 
\ No newline at end of file
@@ -0,0 +1,89 @@
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..cruds import export as export_crud
+from ..database import AsyncSessionLocal
+from ..utils.streaming import encode_rows
+
+# Body được stream sau khi handler trả về nên mỗi export mở session riêng, đóng khi stream xong
+# (hoặc khi client ngắt kết nối), không dựa vào session của request
+
+
+async def _stream(stmt: Select) -> AsyncIterator[Sequence]:
+    async with AsyncSessionLocal() as db:
+        async for partition in export_crud.stream_partitions(db, stmt, settings.EXPORT_BATCH_SIZE):
+            yield partition
+
+def _export(stmt: Select, format: str) -> AsyncIterator[bytes]:
+    return encode_rows(list(stmt.selected_columns.keys()), _stream(stmt), format)
+
+
+async def class_exists(db: AsyncSession, class_id: UUID) -> bool:
+    return await export_crud.class_exists(db, class_id)
+
+async def exam_exists(db: AsyncSession, exam_id: UUID) -> bool:
+    return await export_crud.exam_exists(db, exam_id)
+
+
+def export_students(format: str, status: Optional[str] = None, search: Optional[str] = None) -> AsyncIterator[bytes]:
+    return _export(export_crud.students_statement(status, search), format)
+
+def export_class_enrollments(class_id: UUID, format: str) -> AsyncIterator[bytes]:
+    """One row per enrollment with the student and their score"""
+    return _export(export_crud.class_enrollments_statement(class_id), format)
+
+def export_exam_results(exam_id: UUID, format: str) -> AsyncIterator[bytes]:
+    return _export(export_crud.exam_results_statement(exam_id), format)
+
+
+def _session_labels(sessions: Sequence) -> List[str]:
+    """Column name per session ("2024-01-15 Topic"), thêm hậu tố khi trùng để NDJSON không mất cột"""
+    labels: List[str] = []
+    seen: Dict[str, int] = {}
+    for session in sessions:
+        label = " ".join(part for part in (
+            session.created_at.strftime("%Y-%m-%d") if session.created_at else None,
+            session.topic
+        ) if part) or str(session.id)
+        seen[label] = seen.get(label, 0) + 1
+        labels.append(label if seen[label] == 1 else f"{label} ({seen[label]})")
+    return labels
+
+def _matrix_row(student_id, student_name, cells: List[Optional[bool]]) -> tuple:
+    present = sum(1 for cell in cells if cell is True)
+    absent = sum(1 for cell in cells if cell is False)
+    return (student_id, student_name, *cells, present, absent)
+
+async def _attendance_matrix(db: AsyncSession, class_id: UUID, session_ids: List[UUID]) -> AsyncIterator[List[tuple]]:
+    """
+    Yield matrix rows (student, one cell per session, present, absent) per partition.
+    Dòng điểm danh đã sắp theo học viên nên chỉ cần giữ dòng của học viên hiện tại,
+    kể cả khi các dòng của một học viên nằm ở hai partition
+    """
+    index = {session_id: i for i, session_id in enumerate(session_ids)}
+    current = name = cells = None
+    stmt = export_crud.class_attendance_statement(class_id)
+    async for partition in export_crud.stream_partitions(db, stmt, settings.EXPORT_BATCH_SIZE):
+        rows = []
+        for student_id, student_name, session_id, is_present in partition:
+            if student_id != current:
+                if current is not None:
+                    rows.append(_matrix_row(current, name, cells))
+                current, name, cells = student_id, student_name, [None] * len(index)
+            # Buổi tạo sau khi đã lấy danh sách cột thì bỏ qua
+            if session_id in index:
+                cells[index[session_id]] = is_present
+        yield rows
+    if current is not None:
+        yield [_matrix_row(current, name, cells)]
+
+async def export_class_attendance(class_id: UUID, format: str) -> AsyncIterator[bytes]:
+    """Attendance matrix of a class: 1/0 (true/false) per session, trống (null) khi chưa điểm danh"""
+    async with AsyncSessionLocal() as db:
+        sessions = (await db.execute(export_crud.class_sessions_statement(class_id))).all()
+        keys = ["student_id", "student_name", *_session_labels(sessions), "present", "absent"]
+        rows = _attendance_matrix(db, class_id, [session.id for session in sessions])
+        async for chunk in encode_rows(keys, rows, format):
+            yield chunk
@@ -0,0 +1,102 @@
+from typing import Dict, List
+from uuid import UUID
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from ..models import Attendance, Class, CourseLevel, Enrollment, Homework, Score
+from ..models import Session as SessionModel
+from ..models.attendance import HomeworkStatus
+
+# Điểm đạt theo trình độ lớp: C1 tính Speaking + Writing, các trình độ khác tính Reading + Listening
+SPEAKING_WRITING_LEVELS = {CourseLevel.C1: 250}
+READING_LISTENING_LEVELS = {
+    CourseLevel.A1: 150,
+    CourseLevel.A2: 350,
+    CourseLevel.B1: 500,
+    CourseLevel.B2: 750,
+}
+
+
+def _passed_score_expression():
+    """Build a CASE expression that yields 1 when an enrollment score reaches its level threshold"""
+    whens = []
+    for level, threshold in SPEAKING_WRITING_LEVELS.items():
+        whens.append((
+            and_(Class.course_level == level, Score.speaking + Score.writing >= threshold),
+            1
+        ))
+    for level, threshold in READING_LISTENING_LEVELS.items():
+        whens.append((
+            and_(Class.course_level == level, Score.reading + Score.listening >= threshold),
+            1
+        ))
+    return case(*whens, else_=0)
+
+
+def _rate(numerator: int, denominator: int) -> float:
+    return round(numerator / denominator * 100, 2) if denominator > 0 else 0
+
+
+def get_teacher_kpis(db: Session, teacher_ids: List[UUID]) -> Dict[UUID, Dict[str, float]]:
+    """
+    Tính rate_attendanced, rate_passed_homework, rate_passed cho nhiều giáo viên
+    bằng một số lượng truy vấn cố định (GROUP BY teacher_id)
+    """
+    if not teacher_ids:
+        return {}
+
+    attendance_rows = db.query(
+        Class.teacher_id,
+        func.count(Attendance.id).label('total'),
+        func.coalesce(func.sum(case((Attendance.is_present == True, 1), else_=0)), 0).label('present')
+    ).select_from(Attendance).join(
+        SessionModel, Attendance.session_id == SessionModel.id
+    ).join(
+        Class, SessionModel.class_id == Class.id
+    ).filter(
+        Class.teacher_id.in_(teacher_ids)
+    ).group_by(Class.teacher_id).all()
+
+    homework_rows = db.query(
+        Class.teacher_id,
+        func.count(Homework.id).label('passed')
+    ).select_from(Homework).join(
+        SessionModel, Homework.session_id == SessionModel.id
+    ).join(
+        Class, SessionModel.class_id == Class.id
+    ).filter(
+        Class.teacher_id.in_(teacher_ids),
+        Homework.status == HomeworkStatus.PASSED
+    ).group_by(Class.teacher_id).all()
+
+    score_rows = db.query(
+        Class.teacher_id,
+        func.count(Enrollment.id).label('total_scores'),
+        func.coalesce(func.sum(_passed_score_expression()), 0).label('passed')
+    ).select_from(Enrollment).join(
+        Class, Enrollment.class_id == Class.id
+    ).outerjoin(
+        Score, Score.enrollment_id == Enrollment.id
+    ).filter(
+        Class.teacher_id.in_(teacher_ids)
+    ).group_by(Class.teacher_id).all()
+
+    attendance_by_teacher = {row.teacher_id: row for row in attendance_rows}
+    homework_by_teacher = {row.teacher_id: row.passed for row in homework_rows}
+    score_by_teacher = {row.teacher_id: row for row in score_rows}
+
+    kpis = {}
+    for teacher_id in teacher_ids:
+        attendance = attendance_by_teacher.get(teacher_id)
+        total = attendance.total if attendance else 0
+        present = attendance.present if attendance else 0
+        passed_homework = homework_by_teacher.get(teacher_id, 0)
+        score = score_by_teacher.get(teacher_id)
+        total_scores = score.total_scores if score else 0
+        passed = score.passed if score else 0
+
+        kpis[teacher_id] = {
+            "rate_passed_homework": _rate(passed_homework, total),
+            "rate_attendanced": _rate(present, total),
+            "rate_passed": _rate(passed, total_scores) if total > 0 else 0,
+        }
+    return kpis
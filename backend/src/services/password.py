@@ -0,0 +1,142 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+from passlib.context import CryptContext
+from ..config import settings
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password_sync(password: str) -> str:
+    """Hash a password in the current thread (runs inside the worker pool)"""
+    return pwd_context.hash(password)
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the current thread (runs inside the worker pool)"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Chạy bcrypt trong process pool giới hạn để không chặn event loop.
+    Số thao tác đồng thời bị chặn bởi max_concurrency, phần còn lại xếp hàng chờ.
+    """
+
+    def __init__(self, workers: int, max_concurrency: int):
+        self.workers = workers
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                # bcrypt nhả GIL nên thread pool vẫn không chặn event loop
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, func, *args):
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        acquired = False
+        try:
+            async with self._get_semaphore():
+                acquired = True
+                self.waiting -= 1
+                started = time.perf_counter()
+                self.total_wait += started - queued_at
+                self.in_flight += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(self._get_executor(), func, *args)
+                except Exception:
+                    self.failed += 1
+                    raise
+                finally:
+                    self.in_flight -= 1
+                    self.total_run += time.perf_counter() - started
+        finally:
+            if not acquired:
+                # Bị huỷ khi đang xếp hàng
+                self.waiting -= 1
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password_sync, plain_password, hashed_password)
+
+    def metrics(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 1) if finished else 0,
+            "avg_run_ms": round(self.total_run / finished * 1000, 1) if finished else 0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY
+)
+
+async def hash_password(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await hasher.hash(password)
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords on the worker pool, in input order. Mỗi đợt chỉ gửi max_concurrency mật khẩu
+    để đăng nhập / tạo tài khoản đồng thời được xếp hàng xen giữa thay vì chờ cả lô
+    """
+    hashed: List[str] = []
+    step = hasher.max_concurrency
+    for start in range(0, len(passwords), step):
+        hashed.extend(await asyncio.gather(*(hasher.hash(password) for password in passwords[start:start + step])))
+    return hashed
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop"""
+    return await hasher.verify(plain_password, hashed_password)
+
+def get_metrics() -> dict:
+    """Get queue depth and timing of the password hashing pool"""
+    return hasher.metrics()
+
+def shutdown() -> None:
+    """Stop the worker pool (called on application shutdown)"""
+    hasher.shutdown()
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import table_changes
+from ..cruds import revision as revision_crud
+
+
+async def get_revisions(db: AsyncSession, tables: Iterable[str]) -> Tuple[Dict[str, int], Optional[datetime]]:
+    """Get table revisions and the latest write time for building ETag / Last-Modified"""
+    return await revision_crud.get_revisions(db, tables)
+
+def _bump_before_commit(db: Session, tables: FrozenSet[str]) -> None:
+    revision_crud.bump_revisions(db, tables - {"table_revisions"})
+
+def register_revision_tracking() -> None:
+    """Bump table revisions inside every transaction that writes to them, just before COMMIT"""
+    table_changes.on_before_commit(_bump_before_commit)
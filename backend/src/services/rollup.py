@@ -0,0 +1,30 @@
+from datetime import date
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from ..cruds import rollup as rollup_crud
+
+
+def backfill(db: Session) -> Dict[str, int]:
+    """Rebuild the monthly rollup tables from enrollments and users"""
+    return rollup_crud.rebuild(db)
+
+def month_of(value) -> date:
+    """First day of the month containing value"""
+    return rollup_crud.month_of(value)
+
+def get_revenue_by_months(db: Session, months: List[date]) -> Dict[date, dict]:
+    """Get revenue/courses/enrollments of active enrollments per month"""
+    return rollup_crud.get_revenue_by_months(db, months)
+
+def get_revenue_since(db: Session, since_month: date) -> Tuple[float, int]:
+    """Get revenue and active enrollments from since_month onwards"""
+    return rollup_crud.get_revenue_since(db, since_month)
+
+def get_enrollment_totals_by_status(db: Session) -> Dict[str, int]:
+    """Get all-time enrollment counts by status"""
+    return rollup_crud.get_enrollment_totals_by_status(db)
+
+def get_new_students_by_months(db: Session, months: List[date]) -> Dict[date, int]:
+    """Get new student counts per month"""
+    return rollup_crud.get_new_students_by_months(db, months)
+
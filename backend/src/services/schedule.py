@@ -1,10 +1,15 @@
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import time, date
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..cruds import schedule as schedule_crud
 from ..schemas.schedule import ScheduleCreate, ScheduleUpdate
 from ..models.schedule import Schedule, Weekday
+from ..utils.pagination import Page, PageParams
+
+# Các bảng mà ScheduleResponse và bộ lọc theo giáo viên đọc, dùng cho ETag
+RESPONSE_TABLES = ("schedules", "classes")
 
 def _schedule_to_dict(schedule: Schedule) -> Dict[str, Any]:
     """Convert schedule model to dictionary with nested objects"""
@@ -59,6 +64,12 @@ def get_schedules_by_student(db: Session, student_id: UUID) -> List[Dict[str, An
     schedules = schedule_crud.get_schedules_by_student(db, student_id)
     return [_schedule_to_dict(schedule) for schedule in schedules]
 
+async def get_schedules_by_student_page(db: AsyncSession, page: PageParams, student_id: UUID) -> Page:
+    """Get a page of schedules for specific student (async session)"""
+    result = await schedule_crud.get_schedules_by_student_page(db, page, student_id)
+    result.items = [_schedule_to_dict(schedule) for schedule in result.items]
+    return result
+
 def get_schedules_by_teacher(db: Session, teacher_id: UUID) -> List[Dict[str, Any]]:
     """Get schedules for specific teacher"""
     schedules = schedule_crud.get_schedules_by_teacher(db)
@@ -99,6 +110,18 @@ def get_schedules_with_filters(
     schedules = schedule_crud.get_schedules_with_filters(db, classroom_id, teacher_id, weekday)
     return [_schedule_to_dict(schedule) for schedule in schedules]
 
+async def get_schedules_page(
+    db: AsyncSession,
+    page: PageParams,
+    classroom_id: Optional[UUID] = None,
+    teacher_id: Optional[UUID] = None,
+    weekday: Optional[str] = None,
+) -> Page:
+    """Get a page of schedules with optional filters (async session)"""
+    result = await schedule_crud.get_schedules_page(db, page, classroom_id, teacher_id, weekday)
+    result.items = [_schedule_to_dict(schedule) for schedule in result.items]
+    return result
+
 def get_upcoming_schedules_by_teacher(db: Session, teacher_id: UUID):
     """Get upcoming schedules for a specific teacher (next 5)"""
     schedules = get_schedules_by_teacher(db, teacher_id)
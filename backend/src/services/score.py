@@ -0,0 +1,12 @@
+from typing import List
+from sqlalchemy.orm import Session
+from ..cruds import score as score_crud
+from ..schemas.enrollment import ScoreEntry, ScoreEntryResult
+
+
+def upsert_scores(db: Session, entries: List[ScoreEntry]) -> List[ScoreEntryResult]:
+    """Apply a batch of score entries in one transaction and report the outcome per entry"""
+    return [
+        ScoreEntryResult(id=score_id, exam_id=entry.exam_id, student_id=entry.student_id, result=result)
+        for entry, result, score_id in score_crud.upsert_scores(db, entries)
+    ]
@@ -1,11 +1,31 @@
-from typing import List, Optional
+import logging
+from itertools import islice
+from typing import IO, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..config import settings
 from ..cruds import user as user_crud
 from ..cruds import enrollment as enrollment_crud
-from ..schemas.user import UserCreate, UserUpdate
+from ..database import AsyncSessionLocal
+from ..schemas.user import UserCreate, UserUpdate, UserRole
 from ..models.user import User
-from .auth import get_password_hash
+from ..utils.pagination import Page, PageParams
+from ..utils.streaming import Record, iter_csv_records, iter_ndjson_records
+from . import password as password_service
+
+logger = logging.getLogger("src.services.user")
+
+async def _hash_update_password(user_data: UserUpdate) -> UserUpdate:
+    """Replace a plain password in an update payload with its bcrypt hash"""
+    if not user_data.password:
+        return user_data
+    hashed_password = await password_service.hash_password(user_data.password)
+    return user_data.model_copy(update={"password": hashed_password})
 
 def get_user(db: Session, user_id: UUID) -> Optional[User]:
     """Get user by ID"""
@@ -23,15 +43,25 @@ def get_users_by_role(db: Session, role_name: str) -> List[User]:
     """Get users by role name"""
     return user_crud.get_users_by_role(db, role_name)
 
-def create_user(db: Session, user_data: UserCreate) -> User:
+def get_users_page(
+    db: Session,
+    page: PageParams,
+    role_name: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None
+) -> Page:
+    """Get a page of users with optional role/status/search filters"""
+    return user_crud.get_users_page(db, page, role_name, status, search)
+
+async def create_user(db: Session, user_data: UserCreate) -> User:
     """Create new user"""
     # Hash password before saving
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_service.hash_password(user_data.password)
     return user_crud.create_user(db, user_data, hashed_password)
 
-def update_user(db: Session, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
+async def update_user(db: Session, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
     """Update user"""
-    return user_crud.update_user(db, user_id, user_data)
+    return user_crud.update_user(db, user_id, await _hash_update_password(user_data))
 
 def delete_user(db: Session, user_id: UUID) -> bool:
     """Delete user"""
@@ -50,15 +80,28 @@ def get_teachers(db: Session) -> List[User]:
     """Get list of teachers"""
     return user_crud.get_users_by_role(db, "teacher")
 
-def create_teacher(db: Session, teacher_data: UserCreate) -> User:
+def get_teachers_with_classes(db: Session) -> List[User]:
+    """Get list of teachers with taught classes preloaded"""
+    return user_crud.get_users_by_role_with_classes(db, "teacher")
+
+def get_teachers_with_classes_page(
+    db: Session,
+    page: PageParams,
+    status: Optional[str] = None,
+    search: Optional[str] = None
+) -> Page:
+    """Get a page of teachers with taught classes preloaded"""
+    return user_crud.get_users_page(db, page, "teacher", status, search, with_classes=True)
+
+async def create_teacher(db: Session, teacher_data: UserCreate) -> User:
     """Create new teacher"""
     # Hash password before saving
-    hashed_password = get_password_hash(teacher_data.password)
+    hashed_password = await password_service.hash_password(teacher_data.password)
     return user_crud.create_user(db, teacher_data, hashed_password)
 
-def update_teacher(db: Session, teacher_id: UUID, teacher_data: UserUpdate) -> Optional[User]: 
+async def update_teacher(db: Session, teacher_id: UUID, teacher_data: UserUpdate) -> Optional[User]: 
     """Update teacher"""
-    return user_crud.update_user(db, teacher_id, teacher_data)
+    return user_crud.update_user(db, teacher_id, await _hash_update_password(teacher_data))
 
 def delete_teacher(db: Session, teacher_id: UUID) -> bool:
     """Delete teacher"""
@@ -73,15 +116,24 @@ def get_students(db: Session) -> List[User]:
     """Get list of students"""
     return user_crud.get_users_by_role(db, "student")
 
-def create_student(db: Session, student_data: UserCreate) -> User:
+def get_students_page(
+    db: Session,
+    page: PageParams,
+    status: Optional[str] = None,
+    search: Optional[str] = None
+) -> Page:
+    """Get a page of students"""
+    return user_crud.get_users_page(db, page, "student", status, search)
+
+async def create_student(db: Session, student_data: UserCreate) -> User:
     """Create new student"""
     # Hash password before saving
-    hashed_password = get_password_hash(student_data.password)
+    hashed_password = await password_service.hash_password(student_data.password)
     return user_crud.create_user(db, student_data, hashed_password)
 
-def update_student(db: Session, student_id: UUID, student_data: UserUpdate) -> Optional[User]:
+async def update_student(db: Session, student_id: UUID, student_data: UserUpdate) -> Optional[User]:
     """Update student"""
-    return user_crud.update_user(db, student_id, student_data)
+    return user_crud.update_user(db, student_id, await _hash_update_password(student_data))
 
 def delete_student(db: Session, student_id: UUID) -> bool:
     """Delete student"""
@@ -91,20 +143,113 @@ def get_student(db: Session, student_id: UUID):
     """Get student by ID"""
     return user_crud.get_user(db, student_id)
 
+def _report_line(item: dict) -> bytes:
+    return orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE)
+
+def _import_error(line: Optional[int], email: Optional[str], errors: List[str]) -> dict:
+    return {"type": "error", "line": line, "email": email, "errors": errors}
+
+def _validation_errors(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+async def _import_student_batch(db: AsyncSession, batch: List[Record]) -> Tuple[int, List[dict]]:
+    """Validate, check emails, hash and insert one batch of records. Returns (created, errors)"""
+    errors = []
+    # email -> (dòng, dữ liệu) theo thứ tự trong file
+    students: Dict[str, Tuple[int, UserCreate]] = {}
+    for line, record, error in batch:
+        if error:
+            errors.append(_import_error(line, None, [error]))
+            continue
+        try:
+            data = UserCreate.model_validate(record)
+        except ValidationError as exc:
+            errors.append(_import_error(line, record.get("email"), _validation_errors(exc)))
+            continue
+        if not data.password:
+            errors.append(_import_error(line, data.email, ["Thiếu mật khẩu"]))
+        elif data.email in students:
+            errors.append(_import_error(line, data.email, [f"Email trùng với dòng {students[data.email][0]}"]))
+        else:
+            students[data.email] = (line, data.model_copy(update={"role_name": UserRole.STUDENT}))
+
+    # Một câu truy vấn cho cả lô, bắt được cả email đã import ở các lô trước của cùng file
+    for email in await db.run_sync(user_crud.get_existing_emails, students):
+        errors.append(_import_error(students.pop(email)[0], email, ["Email đã được sử dụng"]))
+
+    pending = list(students.values())
+    hashed_passwords = await password_service.hash_passwords([data.password for _, data in pending])
+    pending = [(line, data, hashed) for (line, data), hashed in zip(pending, hashed_passwords)]
+    try:
+        await db.run_sync(
+            user_crud.bulk_create_users, [data for _, data, _ in pending], [hashed for _, _, hashed in pending]
+        )
+    except IntegrityError:
+        # Email được request khác tạo trong lúc băm mật khẩu: bỏ các dòng đó và thử lại một lần
+        taken = await db.run_sync(user_crud.get_existing_emails, [data.email for _, data, _ in pending])
+        errors.extend(
+            _import_error(line, data.email, ["Email đã được sử dụng"]) for line, data, _ in pending if data.email in taken
+        )
+        pending = [item for item in pending if item[1].email not in taken]
+        await db.run_sync(
+            user_crud.bulk_create_users, [data for _, data, _ in pending], [hashed for _, _, hashed in pending]
+        )
+    errors.sort(key=lambda item: item["line"])
+    return len(pending), errors
+
+async def import_students(file: IO[bytes], format: str) -> AsyncIterator[bytes]:
+    """
+    Import students from a CSV/NDJSON file (header/keys theo UserCreate, bắt buộc password), yielding
+    an NDJSON report: dòng "error" cho mỗi dòng không import được, "progress" sau mỗi lô và "summary" cuối.
+    Mỗi lô IMPORT_BATCH_SIZE dòng được commit riêng nên các lô trước vẫn được giữ khi một lô lỗi
+    """
+    records = iter_csv_records(file) if format == "csv" else iter_ndjson_records(file)
+    totals = {"processed": 0, "created": 0, "failed": 0}
+    try:
+        async with AsyncSessionLocal() as db:
+            while True:
+                # Đọc / parse file (có thể đã ghi ra đĩa) trong threadpool, không chặn event loop
+                batch = await run_in_threadpool(list, islice(records, settings.IMPORT_BATCH_SIZE))
+                if not batch:
+                    break
+                try:
+                    created, errors = await _import_student_batch(db, batch)
+                except SQLAlchemyError:
+                    logger.exception("Student import failed for lines %s-%s", batch[0][0], batch[-1][0])
+                    await db.rollback()
+                    created = 0
+                    errors = [_import_error(line, None, ["Không lưu được lô chứa dòng này"]) for line, _, _ in batch]
+                totals["processed"] += len(batch)
+                totals["created"] += created
+                totals["failed"] += len(batch) - created
+                yield b"".join(_report_line(error) for error in errors) + _report_line({"type": "progress", **totals})
+    finally:
+        file.close()
+    yield _report_line({"type": "summary", **totals})
+
 # Staff
 
 def get_staff(db: Session) -> List[User]:
     """Get list of staff"""
     return user_crud.get_users_by_role(db, "staff")
 
-def create_staff(db: Session, staff_data: UserCreate) -> User:
+def get_staff_page(
+    db: Session,
+    page: PageParams,
+    status: Optional[str] = None,
+    search: Optional[str] = None
+) -> Page:
+    """Get a page of staff"""
+    return user_crud.get_users_page(db, page, "staff", status, search)
+
+async def create_staff(db: Session, staff_data: UserCreate) -> User:
     """Create new staff"""
-    hashed_password = get_password_hash(staff_data.password)
+    hashed_password = await password_service.hash_password(staff_data.password)
     return user_crud.create_user(db, staff_data, hashed_password)
 
-def update_staff(db: Session, staff_id: UUID, staff_data: UserUpdate) -> Optional[User]:
+async def update_staff(db: Session, staff_id: UUID, staff_data: UserUpdate) -> Optional[User]:
     """Update staff"""
-    return user_crud.update_user(db, staff_id, staff_data)
+    return user_crud.update_user(db, staff_id, await _hash_update_password(staff_data))
 
 def delete_staff(db: Session, staff_id: UUID) -> bool:
     """Delete staff"""
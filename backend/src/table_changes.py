@@ -0,0 +1,81 @@
+from typing import Callable, FrozenSet, List
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Tên các bảng đã ghi trong transaction hiện tại của session
+_CHANGED_TABLES = "changed_tables"
+
+_before_commit_hooks: List[Callable[[Session, FrozenSet[str]], None]] = []
+_after_commit_hooks: List[Callable[[FrozenSet[str]], None]] = []
+
+
+def on_before_commit(hook: Callable[[Session, FrozenSet[str]], None]) -> None:
+    """Call hook(session, tables) inside the transaction, just before COMMIT, when tables were written"""
+    if hook not in _before_commit_hooks:
+        _before_commit_hooks.append(hook)
+    _register_listeners()
+
+
+def on_after_commit(hook: Callable[[FrozenSet[str]], None]) -> None:
+    """Call hook(tables) after a commit that wrote to tables"""
+    if hook not in _after_commit_hooks:
+        _after_commit_hooks.append(hook)
+    _register_listeners()
+
+
+def _record_tables(session: Session, tables) -> None:
+    session.info.setdefault(_CHANGED_TABLES, set()).update(tables)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    # Thay đổi qua ORM unit of work (db.add / sửa thuộc tính / db.delete)
+    _record_tables(session, {
+        table.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        for table in inspect(obj).mapper.tables
+    })
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    # insert()/update()/delete() và Query.delete()/update() chạy qua Session.execute
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and getattr(table, "name", None):
+            _record_tables(orm_execute_state.session, {table.name})
+
+
+def _before_commit(session: Session) -> None:
+    if not _before_commit_hooks:
+        return
+    # commit() gọi before_commit trước lần flush cuối, flush trước để biết đủ các bảng sẽ ghi
+    session.flush()
+    tables = session.info.get(_CHANGED_TABLES)
+    if tables:
+        for hook in _before_commit_hooks:
+            hook(session, frozenset(tables))
+
+
+def _after_commit(session: Session) -> None:
+    tables = session.info.pop(_CHANGED_TABLES, None)
+    if tables:
+        for hook in _after_commit_hooks:
+            hook(frozenset(tables))
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_TABLES, None)
+
+
+_registered = False
+
+
+def _register_listeners() -> None:
+    global _registered
+    if _registered:
+        return
+    _registered = True
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
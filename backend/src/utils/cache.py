@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from pydantic_core import to_json
+
+
+class TTLCache:
+    """
+    Cache trong bộ nhớ tiến trình: mỗi key hết hạn sau ttl giây,
+    khi đầy thì loại bỏ key ít được dùng nhất (LRU)
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_namespace(self, namespace: Hashable) -> None:
+        """Drop every tuple key whose first element is namespace"""
+        with self._lock:
+            for key in [k for k in self._data if isinstance(k, tuple) and k and k[0] == namespace]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    Cache dùng chung giữa các worker trên cùng một máy, lưu trong một file SQLite.
+    Cùng giao diện với TTLCache; key là tuple, phần tử đầu là namespace.
+    Giá trị được lưu dạng JSON nên get trả về dict/list thay vì object ban đầu
+    """
+
+    def __init__(self, path: str, max_size: int, ttl: float):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection().execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_namespace ON cache_entries (namespace)"
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connection không dùng chung giữa các thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    @staticmethod
+    def _namespace(key: Hashable) -> str:
+        return str(key[0]) if isinstance(key, tuple) and key else ""
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        connection = self._connection()
+        encoded = self._encode_key(key)
+        now = time.time()
+        row = connection.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (encoded,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            if row is not None:
+                connection.execute("DELETE FROM cache_entries WHERE key = ?", (encoded,))
+            self.misses += 1
+            return None
+        connection.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, encoded))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        connection = self._connection()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, namespace, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self._encode_key(key), self._namespace(key), to_json(value), now + self.ttl, now)
+        )
+        # Vượt max_size thì xoá các key lâu không được đọc nhất (LRU)
+        connection.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,)
+        )
+
+    def delete(self, *keys: Hashable) -> None:
+        self._connection().executemany(
+            "DELETE FROM cache_entries WHERE key = ?", [(self._encode_key(key),) for key in keys]
+        )
+
+    def delete_namespace(self, namespace: Hashable) -> None:
+        """Drop every key whose first element is namespace"""
+        self._connection().execute("DELETE FROM cache_entries WHERE namespace = ?", (str(namespace),))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
@@ -1,4 +1,6 @@
-from sqlalchemy import String, TypeDecorator
+from sqlalchemy import Date, String, TypeDecorator
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 import uuid
 
@@ -35,3 +37,41 @@ class UUID(TypeDecorator):
             if isinstance(value, str):
                 return uuid.UUID(value)
             return value
+
+
+class new_uuid(FunctionElement):
+    """Random UUID generated by the database, for set-based INSERT ... SELECT"""
+    type = UUID()
+    inherit_cache = True
+
+
+@compiles(new_uuid, "postgresql")
+def _pg_new_uuid(element, compiler, **kw):
+    return "gen_random_uuid()"
+
+
+@compiles(new_uuid, "sqlite")
+def _sqlite_new_uuid(element, compiler, **kw):
+    # Chuỗi UUID v4 dạng 8-4-4-4-12 giống str(uuid.uuid4())
+    return (
+        "lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+        "substr(lower(hex(randomblob(2))), 2) || '-' || "
+        "substr('89ab', 1 + (abs(random()) % 4), 1) || substr(lower(hex(randomblob(2))), 2) || '-' || "
+        "lower(hex(randomblob(6)))"
+    )
+
+
+class month_start(FunctionElement):
+    """First day of the month of a timestamp, for GROUP BY month"""
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(month_start, "postgresql")
+def _pg_month_start(element, compiler, **kw):
+    return "CAST(date_trunc('month', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_start, "sqlite")
+def _sqlite_month_start(element, compiler, **kw):
+    return "date(%s, 'start of month')" % compiler.process(element.clauses, **kw)
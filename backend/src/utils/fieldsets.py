@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Type, Union, get_args, get_origin
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    # None: mọi field của schema
+    fields: Optional[FrozenSet[str]]
+    # Các quan hệ (dạng "enrollments.student") được nạp và serialize
+    expand: FrozenSet[str]
+
+
+def _split(value: Optional[str]) -> Optional[FrozenSet[str]]:
+    if value is None:
+        return None
+    return frozenset(part.strip() for part in value.split(",") if part.strip())
+
+def _with_parents(paths: Iterable[str]) -> FrozenSet[str]:
+    result = set()
+    for path in paths:
+        parts = path.split(".")
+        result.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+    return frozenset(result)
+
+
+def parse_fieldset(
+    fields: Optional[str],
+    expand: Optional[str],
+    schema: Type[BaseModel],
+    expansions: Iterable[str]
+) -> Fieldset:
+    """
+    Parse the comma separated fields= / expand= query values, raising ValueError on unknown names.
+
+    Không truyền expand: nạp mọi quan hệ có gốc nằm trong fields (hoặc tất cả nếu không truyền fields),
+    expand rỗng: không nạp quan hệ nào. "a.b" kéo theo "a"
+    """
+    expansions = frozenset(expansions)
+    selected_fields = _split(fields)
+    if selected_fields is not None:
+        unknown = selected_fields - set(schema.model_fields)
+        if unknown:
+            raise ValueError(f"fields không hợp lệ: {', '.join(sorted(unknown))}")
+
+    selected_expand = _split(expand)
+    if selected_expand is None:
+        selected_expand = expansions
+    else:
+        unknown = selected_expand - expansions
+        if unknown:
+            raise ValueError(f"expand không hợp lệ: {', '.join(sorted(unknown))}")
+        selected_expand = _with_parents(selected_expand)
+
+    if selected_fields is not None:
+        selected_expand = frozenset(path for path in selected_expand if path.split(".")[0] in selected_fields)
+    return Fieldset(fields=selected_fields, expand=selected_expand)
+
+
+def _unwrap(annotation: Any) -> Tuple[Any, bool]:
+    """(kiểu phần tử, có phải list) của Optional[List[X]] / List[X] / Optional[X] / X"""
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    if get_origin(annotation) is Union and len(args) == 1:
+        annotation = args[0]
+    if get_origin(annotation) in (list, List):
+        return get_args(annotation)[0], True
+    return annotation, False
+
+def serialization_filter(
+    schema: Type[BaseModel],
+    fieldset: Fieldset,
+    expansions: Iterable[str]
+) -> Tuple[Optional[Set[str]], Dict[str, Any]]:
+    """
+    (include, exclude) for model_dump / dump_json of one schema instance: chỉ giữ field được chọn
+    và bỏ các quan hệ không expand (đã được nạp rỗng bằng noload nên không phát sinh lazy load)
+    """
+    include = set(fieldset.fields) if fieldset.fields is not None else None
+    exclude: Dict[str, Any] = {}
+    for path in sorted(set(expansions) - fieldset.expand):
+        *parents, leaf = path.split(".")
+        # Chỉ cần bỏ quan hệ cao nhất chưa được expand, các quan hệ con nằm bên trong nó
+        if parents and ".".join(parents) not in fieldset.expand:
+            continue
+        node, model = exclude, schema
+        for name in parents:
+            model, is_list = _unwrap(model.model_fields[name].annotation)
+            node = node.setdefault(name, {})
+            if is_list:
+                node = node.setdefault("__all__", {})
+        node[leaf] = True
+    return include, exclude
@@ -0,0 +1,57 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Request
+
+ETAG_HEADER = "ETag"
+LAST_MODIFIED_HEADER = "Last-Modified"
+
+
+def make_etag(request: Request, revisions: Dict[str, int]) -> str:
+    """
+    Weak ETag for a GET response: đổi khi một trong các bảng được ghi, hoặc khi
+    đường dẫn, query string hay token (người gọi) khác đi
+    """
+    payload = json.dumps([
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        request.headers.get("authorization", ""),
+        sorted(revisions.items()),
+    ], separators=(",", ":"))
+    return 'W/"%s"' % hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # So sánh yếu: bỏ tiền tố W/ ở cả hai phía
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no If-None-Match is sent"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
@@ -0,0 +1,152 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+from fastapi import Response
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# SQLite lưu DateTime dạng chuỗi (server_default không có phần micro giây),
+# chuẩn hoá về cùng định dạng để so sánh và sắp xếp nhất quán
+_SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+
+@dataclass
+class PageParams:
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    count: Optional[str] = None
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def encode_cursor(created_at: Optional[datetime], last_id: UUID) -> str:
+    """Build an opaque cursor pointing after the given (created_at, id)"""
+    payload = {"c": created_at.isoformat() if created_at else None, "i": str(last_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], UUID]:
+    """Parse a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        created_at = datetime.fromisoformat(payload["c"]) if payload["c"] else None
+        return created_at, UUID(payload["i"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _sort_key(model, dialect: str):
+    created_at = getattr(model, "created_at", None)
+    if created_at is None:
+        return None
+    if dialect == "sqlite":
+        return func.strftime(_SQLITE_TIMESTAMP_FORMAT, created_at)
+    return created_at
+
+def _bound_sort_value(value: datetime, dialect: str):
+    if dialect == "sqlite":
+        return func.strftime(_SQLITE_TIMESTAMP_FORMAT, value)
+    return value
+
+def _keyset_statement(stmt: Select, model, params: PageParams, dialect: str) -> Select:
+    """Order by (created_at, id) newest first and seek past the cursor"""
+    sort_key = _sort_key(model, dialect)
+    if params.cursor:
+        created_at, last_id = decode_cursor(params.cursor)
+        if sort_key is None or created_at is None:
+            stmt = stmt.where(model.id < last_id)
+        else:
+            bound = _bound_sort_value(created_at, dialect)
+            stmt = stmt.where(or_(
+                sort_key < bound,
+                and_(sort_key == bound, model.id < last_id)
+            ))
+
+    order_by = [model.id.desc()] if sort_key is None else [sort_key.desc(), model.id.desc()]
+    stmt = stmt.order_by(None).order_by(*order_by)
+    if params.limit is not None:
+        # Lấy thêm 1 bản ghi để biết còn trang sau hay không
+        stmt = stmt.limit(params.limit + 1)
+    return stmt
+
+def _build_page(items: List[Any], params: PageParams) -> Page:
+    next_cursor = None
+    if params.limit is not None and len(items) > params.limit:
+        items = items[:params.limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, "created_at", None), last.id)
+    return Page(items=items, next_cursor=next_cursor)
+
+def _count_statement(stmt: Select) -> Select:
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <statement>, giữ nguyên bind params của statement"""
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def _plan_rows(plan) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate(db: Session, stmt: Select, model, params: PageParams) -> Page:
+    """Run stmt with keyset pagination on (created_at, id) when limit/cursor are given"""
+    dialect = db.get_bind().dialect
+    query = _keyset_statement(stmt, model, params, dialect.name) if params.paginated else stmt
+    page = _build_page(db.execute(query).scalars().unique().all(), params)
+
+    # Ước lượng dùng số dòng dự kiến trong query plan của Postgres, các DB khác đếm chính xác
+    if params.count == COUNT_ESTIMATE and dialect.name == "postgresql":
+        page.total = _plan_rows(db.execute(Explain(stmt.order_by(None))).scalar())
+    elif params.count:
+        page.total = db.execute(_count_statement(stmt)).scalar()
+    return page
+
+async def paginate_async(db: AsyncSession, stmt: Select, model, params: PageParams) -> Page:
+    """Async version of paginate"""
+    dialect = db.get_bind().dialect
+    query = _keyset_statement(stmt, model, params, dialect.name) if params.paginated else stmt
+    page = _build_page((await db.execute(query)).scalars().unique().all(), params)
+
+    if params.count == COUNT_ESTIMATE and dialect.name == "postgresql":
+        page.total = _plan_rows((await db.execute(Explain(stmt.order_by(None)))).scalar())
+    elif params.count:
+        page.total = (await db.execute(_count_statement(stmt))).scalar()
+    return page
+
+def set_page_headers(response: Response, page: Page) -> None:
+    """Expose the next cursor and total count as response headers"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Type
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def dump_json_list(schema: Type[BaseModel], items: Iterable[Any], include: Any = None, exclude: Any = None) -> bytes:
+    """
+    Validate items (ORM objects or dicts) as List[schema] and serialize them straight to JSON bytes,
+    không qua dict trung gian / jsonable_encoder
+    """
+    adapter = _adapter(List[schema])
+    value = adapter.validate_python(list(items), from_attributes=True)
+    return adapter.dump_json(value, include=include, exclude=exclude, by_alias=True)
+
+def dump_json(schema: Type[BaseModel], obj: Any, include: Any = None, exclude: Any = None) -> bytes:
+    """Validate obj as schema and serialize it straight to JSON bytes"""
+    adapter = _adapter(schema)
+    value = adapter.validate_python(obj, from_attributes=True)
+    return adapter.dump_json(value, include=include, exclude=exclude, by_alias=True)
+
+
+def json_response(content: bytes, response: Optional[Response] = None) -> Response:
+    """
+    Response for already serialized JSON. FastAPI không gộp header của Response được inject
+    khi handler tự trả về Response, nên chép lại các header đã đặt (X-Next-Cursor, ETag, ...)
+    """
+    result = Response(content=content, media_type=JSON_MEDIA_TYPE)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
@@ -0,0 +1,127 @@
+import codecs
+import csv
+import io
+import tempfile
+from typing import IO, Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional, Sequence, Tuple
+import orjson
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+# Starlette tự thêm charset=utf-8 cho media type text/*
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Body import lớn hơn ngưỡng này được ghi ra file tạm thay vì giữ trong bộ nhớ
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# Tài liệu OpenAPI cho endpoint nhận file CSV/NDJSON trực tiếp trong body
+IMPORT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            media_type: {"schema": {"type": "string", "format": "binary"}}
+            for media_type in EXPORT_MEDIA_TYPES.values()
+        },
+    }
+}
+
+
+def _csv_value(value: Any) -> Any:
+    # csv.writer ghi True/False, bảng tính đọc 1/0 dễ hơn
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+def csv_chunk(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode rows as CSV lines"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+def ndjson_chunk(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """Encode rows as one JSON object per line"""
+    return b"".join(
+        orjson.dumps(dict(zip(keys, row)), option=orjson.OPT_APPEND_NEWLINE)
+        for row in rows
+    )
+
+
+async def encode_rows(
+    keys: List[str],
+    partitions: AsyncIterable[Sequence[Sequence[Any]]],
+    format: str
+) -> AsyncIterator[bytes]:
+    """
+    Encode each partition of rows into one body chunk, CSV bắt đầu bằng dòng tiêu đề.
+    Chỉ giữ một partition trong bộ nhớ tại một thời điểm
+    """
+    if format == "csv":
+        # BOM để Excel nhận đúng UTF-8 (tên tiếng Việt)
+        yield "﻿".encode() + csv_chunk([keys])
+    async for rows in partitions:
+        if not rows:
+            continue
+        yield csv_chunk(rows) if format == "csv" else ndjson_chunk(keys, rows)
+
+def export_response(body: AsyncIterator[bytes], format: str, filename: str) -> StreamingResponse:
+    """StreamingResponse tải về file filename.<format>"""
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+
+async def spool_body(request: Request) -> IO[bytes]:
+    """
+    Copy the request body chunk by chunk into a temporary file, positioned at the start.
+    Body phải được đọc hết trong handler: khi StreamingResponse chạy, Starlette dùng receive()
+    để chờ client ngắt kết nối
+    """
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        async for chunk in request.stream():
+            file.write(chunk)
+    except BaseException:
+        file.close()
+        raise
+    file.seek(0)
+    return file
+
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+def iter_csv_records(file: IO[bytes]) -> Iterator[Record]:
+    """
+    Parse CSV with a header row incrementally, yielding (line, {column: value}, None) per record.
+    Ô trống bị bỏ để schema dùng giá trị mặc định. Khi phần còn lại của file không đọc được
+    (sai encoding, CSV hỏng) trả về một dòng lỗi rồi dừng
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    try:
+        for record in reader:
+            if None in record:
+                yield reader.line_num, None, "Số cột nhiều hơn dòng tiêu đề"
+                continue
+            yield reader.line_num, {key: value for key, value in record.items() if value not in (None, "")}, None
+    except (UnicodeDecodeError, csv.Error) as exc:
+        yield reader.line_num + 1, None, f"File không hợp lệ, dừng đọc: {exc}"
+
+def iter_ndjson_records(file: IO[bytes]) -> Iterator[Record]:
+    """Parse one JSON object per line, yielding (line, object, None) or (line, None, error)"""
+    for line_number, line in enumerate(file, start=1):
+        if line_number == 1:
+            line = line.removeprefix(codecs.BOM_UTF8)
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield line_number, None, f"JSON không hợp lệ: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Mỗi dòng phải là một JSON object"
+            continue
+        yield line_number, record, None